@@ -0,0 +1,5 @@
+"""
+benchmarks for the thrilang compiler pipeline.
+
+run them from the repository root, e.g. `python -m benchmark.bench_source`.
+"""
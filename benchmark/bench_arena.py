@@ -0,0 +1,99 @@
+"""
+memory and query time of the arena AST against the node object AST.
+
+the AST of a generated program is built as node objects and copied into an
+ArenaTree. reports the traced bytes per node of both, the time to copy, and
+the best of --repeat for two whole tree queries, counting the nodes of
+every kind and finding every call, as a stack walk over the node objects,
+as a loop over the arena columns and, when NumPy is installed, over the
+kind column as a NumPy array.
+
+usage: python -m benchmark.bench_arena [--size 1M] [--seed 0] [--repeat 3]
+"""
+import argparse
+import gc
+import tracemalloc
+from collections import Counter
+from typing import Callable, List, Tuple
+from benchmark.bench_throughput import best_of
+from benchmark.corpus import ProgramGenerator, parse_size
+from src import arena as arena_module
+from src.arena import ArenaTree
+from src.ast import SourceRoot
+from src.lexer import Lexer
+from src.parser import NodeKind, ParseNode
+from src.source import StringSource
+from src.token import Token, TokenSource
+
+
+def traced(build: Callable):
+    """the result of build and the bytes it keeps alive"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def object_kind_counts(root: ParseNode) -> Counter:
+    counts: Counter = Counter()
+    stack: List[ParseNode] = [root]
+    while stack:
+        node = stack.pop()
+        counts[node.kind] += 1
+        stack.extend(node.child)
+    return counts
+
+
+def object_calls(root: ParseNode) -> List[ParseNode]:
+    calls: List[ParseNode] = []
+    stack: List[ParseNode] = [root]
+    while stack:
+        node = stack.pop()
+        if node.kind is NodeKind.AST_POSTFIX_EXP and node.symbol == "call":
+            calls.append(node)
+        stack.extend(node.child)
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='1M', help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs, the best one is reported')
+    args = parser.parse_args()
+
+    text: str = ProgramGenerator(args.seed, "ast").generate(parse_size(args.size))
+    tokens: List[Token] = Lexer(StringSource(text), engine="regex").match()
+    # the tokens stay alive for both, the AST holds them and the arena copies them.
+    ast, ast_bytes = traced(lambda: SourceRoot.parse(TokenSource(tokens)))
+    arena, arena_bytes = traced(lambda: ArenaTree.from_tree(ast))
+    nodes: int = len(arena)
+    assert object_kind_counts(ast) == arena.kind_counts(False), "the arena holds other nodes"
+
+    print("nodes %d" % nodes)
+    print("%-8s %14s" % ("", "bytes per node"))
+    print("%-8s %14.1f" % ("objects", ast_bytes / nodes))
+    print("%-8s %14.1f" % ("arena", arena_bytes / nodes))
+    print("from_tree %.4fs" % best_of(args.repeat, lambda: ArenaTree.from_tree(ast)))
+
+    queries: List[Tuple[str, Callable]] = [
+        ("kind counts, objects", lambda: object_kind_counts(ast)),
+        ("kind counts, arena", lambda: arena.kind_counts(False)),
+        ("calls, objects", lambda: object_calls(ast)),
+        ("calls, arena", lambda: arena.find(NodeKind.AST_POSTFIX_EXP, "call", False)),
+    ]
+    if arena_module.numpy is not None:
+        queries.insert(2, ("kind counts, numpy", lambda: arena.kind_counts(True)))
+        queries.append(("calls, numpy", lambda: arena.find(NodeKind.AST_POSTFIX_EXP, "call", True)))
+    else:
+        print("numpy is not installed, its queries are skipped")
+    print("%-22s %10s" % ("", "seconds"))
+    for name, query in queries:
+        print("%-22s %10.4f" % (name, best_of(args.repeat, query)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+node count and memory of the full CST against the compact one.
+
+compact drops the statement, expression, cast, unary and postfix nodes that
+only wrap a single child, the leaves (one per token) stay. nodes are split
+into leaves and inner nodes, memory is the tracemalloc peak of one parse
+and time the best of --repeat. both trees are checked to transform to the
+same AST first.
+
+usage: python -m benchmark.bench_compact [--size 1M] [--seed 0] [--repeat 3] [--engine descent]
+"""
+import argparse
+import tracemalloc
+from typing import List, Tuple
+from benchmark.bench_throughput import best_of
+from benchmark.corpus import ProgramGenerator, parse_size
+from src.ast import SourceRoot
+from src.lexer import Lexer
+from src.parser import EXPRESSION_ENGINES, ParseNode, ParseTranslationUnit
+from src.source import StringSource
+from src.token import Token, TokenSource
+
+
+def count_leaves(root: ParseNode) -> Tuple[int, int]:
+    """(leaves, inner nodes) of a tree"""
+    leaves: int = 0
+    inner: int = 0
+    stack: List[ParseNode] = [root]
+    while stack:
+        node = stack.pop()
+        if node.child:
+            inner += 1
+            stack.extend(node.child)
+        else:
+            leaves += 1
+    return leaves, inner
+
+
+def peak_memory(tokens: List[Token], engine: str, compact: bool) -> int:
+    """peak traced bytes of one parse"""
+    tracemalloc.start()
+    try:
+        ParseTranslationUnit.parse(TokenSource(tokens), engine, compact)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='1M', help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--repeat', type=int, default=3, help='timed parses, the best one is reported')
+    parser.add_argument('--engine', choices=EXPRESSION_ENGINES, default="descent", help='expression engine')
+    args = parser.parse_args()
+
+    text: str = ProgramGenerator(args.seed, "ast").generate(parse_size(args.size))
+    tokens: List[Token] = Lexer(StringSource(text), engine="regex").match()
+    full: ParseNode = ParseTranslationUnit.parse(TokenSource(tokens), args.engine)
+    compact: ParseNode = ParseTranslationUnit.parse(TokenSource(tokens), args.engine, compact=True)
+    assert ParseNode.parse_dict(SourceRoot.transform(full)) == ParseNode.parse_dict(SourceRoot.transform(compact)), \
+        "the compact CST transformed to another AST"
+
+    print("tokens %d" % len(tokens))
+    print("%-8s %10s %10s %10s %12s %10s" % ("cst", "nodes", "leaves", "inner", "peak KiB", "parse s"))
+    results = {}
+    for name, tree in (("full", full), ("compact", compact)):
+        leaves, inner = count_leaves(tree)
+        peak: int = peak_memory(tokens, args.engine, name == "compact")
+        seconds: float = best_of(args.repeat, lambda: ParseTranslationUnit.parse(
+            TokenSource(tokens), args.engine, name == "compact"))
+        results[name] = (leaves + inner, inner, peak, seconds)
+        print("%-8s %10d %10d %10d %12.1f %10.4f" % (name, leaves + inner, leaves, inner, peak / 1024, seconds))
+    print("full / compact: nodes %.2f, inner nodes %.2f, peak memory %.2f, time %.2f" % tuple(
+        results["full"][index] / results["compact"][index] for index in range(4)))
+
+
+if __name__ == '__main__':
+    main()
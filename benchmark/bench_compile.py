@@ -0,0 +1,44 @@
+"""
+compile a directory of generated files with a growing number of workers.
+
+usage: python -m benchmark.bench_compile [--files 200] [--repeat-source 20] [--jobs 1 2 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+from src.compiler import compile_many
+from test.testConfig import source_str
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=200, help='number of source files')
+    parser.add_argument('--repeat-source', type=int, default=20,
+                        help='how many times a sample is repeated in each file')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4],
+                        help='worker counts to compare')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(args.files):
+            path: str = os.path.join(directory, "file%d.tl" % index)
+            with open(path, 'w') as file_obj:
+                file_obj.write(source_str[index % 2] * args.repeat_source)
+            paths.append(path)
+
+        print("%6s %10s %10s %8s" % ("jobs", "seconds", "files/s", "speedup"))
+        baseline: float = None
+        for jobs in args.jobs:
+            start: float = time.perf_counter()
+            results = compile_many(paths, jobs=jobs)
+            elapsed: float = time.perf_counter() - start
+            assert not any(result.error for result in results)
+            baseline = baseline or elapsed
+            print("%6d %10.3f %10.1f %8.2f" % (jobs, elapsed, len(paths) / elapsed, baseline / elapsed))
+    print("cpu count: %s" % os.cpu_count())
+
+
+if __name__ == '__main__':
+    main()
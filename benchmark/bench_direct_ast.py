@@ -0,0 +1,71 @@
+"""
+compare the two pass AST (ParseTranslationUnit.parse then SourceRoot.transform)
+with SourceRoot.parse building the AST straight from the tokens.
+
+both start from an already lexed token list, time is the best of --repeat
+runs and memory the tracemalloc peak of one more run. the trees are checked
+to be identical first.
+
+usage: python -m benchmark.bench_direct_ast [--size 1M] [--seed 0] [--repeat 3]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+from benchmark.corpus import ProgramGenerator, parse_size
+from src.ast import SourceRoot
+from src.lexer import Lexer
+from src.parser import ParseNode, ParseTranslationUnit
+from src.source import StringSource
+from src.token import Token, TokenSource
+
+
+def two_pass(tokens: List[Token]) -> ParseNode:
+    return SourceRoot.transform(ParseTranslationUnit.parse(TokenSource(tokens)))
+
+
+def direct(tokens: List[Token]) -> ParseNode:
+    return SourceRoot.parse(TokenSource(tokens))
+
+
+def measure(tokens: List[Token], function: Callable, repeat: int) -> Tuple[float, int]:
+    """best time and peak traced bytes of function over tokens"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function(tokens)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function(tokens)
+        peak: int = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='1M', help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs, the best one is reported')
+    args = parser.parse_args()
+
+    text: str = ProgramGenerator(args.seed, "ast").generate(parse_size(args.size))
+    tokens: List[Token] = Lexer(StringSource(text), engine="regex").match()
+    assert ParseNode.parse_dict(direct(tokens)) == ParseNode.parse_dict(two_pass(tokens)), \
+        "SourceRoot.parse built another tree"
+
+    print("tokens %d" % len(tokens))
+    results = {}
+    for name, function in (("two pass", two_pass), ("direct", direct)):
+        results[name] = measure(tokens, function, args.repeat)
+        seconds, peak = results[name]
+        print("%-10s %9.4fs %12.0f tok/s  peak %10.1f KiB" % (name, seconds, len(tokens) / seconds, peak / 1024))
+    print("direct / two pass: time %.2f, peak memory %.2f" % (
+        results["direct"][0] / results["two pass"][0], results["direct"][1] / results["two pass"][1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+compare the descent and pratt expression engines on expression heavy input.
+
+usage: python -m benchmark.bench_expressions [--size 512K] [--max-chain 256] [--seed 0] [--repeat 5]
+"""
+import argparse
+import gc
+import time
+from benchmark.corpus import ProgramGenerator, parse_size
+from src.lexer import Lexer
+from src.parser import EXPRESSION_ENGINES, ParseTranslationUnit
+from src.source import StringSource
+from src.token import TokenSource
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='512K', help='corpus size')
+    parser.add_argument('--max-chain', type=int, default=256, help='operands of the longest expression chains')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--repeat', type=int, default=5, help='parses per engine, the best one is reported')
+    args = parser.parse_args()
+
+    text: str = ProgramGenerator(args.seed, "full", max_chain=args.max_chain).generate(parse_size(args.size))
+    tokens = Lexer(StringSource(text), engine="regex").match()
+    trees = {engine: str(ParseTranslationUnit.parse(TokenSource(tokens), expression_engine=engine))
+             for engine in EXPRESSION_ENGINES}
+    assert len(set(trees.values())) == 1, "the engines built different trees"
+
+    print("%10s %10s %12s" % ("engine", "seconds", "tokens/s"))
+    for engine in EXPRESSION_ENGINES:
+        timings = []
+        for _ in range(args.repeat):
+            gc.collect()
+            start: float = time.perf_counter()
+            ParseTranslationUnit.parse(TokenSource(tokens), expression_engine=engine)
+            timings.append(time.perf_counter() - start)
+        print("%10s %10.3f %12.0f" % (engine, min(timings), len(tokens) / min(timings)))
+
+
+if __name__ == '__main__':
+    main()
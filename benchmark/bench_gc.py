@@ -0,0 +1,107 @@
+"""
+cyclic gc pauses and peak memory of the pipeline under every gc mode.
+
+a generated program is compiled once per pipeline and gc mode, each run in
+a fresh process so its peak RSS is its own. "compile" is compile_file, the
+lexer and SourceRoot.parse, "two_pass" parses the CST and transforms it,
+"release" transforms with release=True so the CST is freed as the AST is
+built. reports the wall time, the number of collections, their total and
+longest pause, the objects a full collection frees once the tree is
+dropped, those left in reference cycles, its time, and the peak RSS.
+
+usage: python -m benchmark.bench_gc [--size 1M] [--seed 0] [--pipeline NAME ...] [--gc MODE ...]
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Dict, List
+from benchmark.corpus import ProgramGenerator, parse_size
+from src.ast import SourceRoot
+from src.compiler import GC_MODES, compile_file
+from src.lexer import Lexer
+from src.parser import ParseNode, ParseTranslationUnit
+from src.source import FileSource
+from src.token import TokenSource
+from src.util.gc_control import frozen_gc, paused_gc
+
+PIPELINES = ("compile", "two_pass", "release")
+
+
+def two_pass(path: str, gc_mode: str, release: bool) -> str:
+    """compile_file over the CST and SourceRoot.transform"""
+    with ExitStack() as while_writing:
+        with paused_gc(gc_mode != "on"):
+            cst: ParseNode = ParseTranslationUnit.parse(TokenSource(Lexer(FileSource(path), engine="regex").match()))
+            ast: ParseNode = SourceRoot.transform(cst, release=release)
+            del cst
+            while_writing.enter_context(frozen_gc(gc_mode == "freeze"))
+        return ParseNode.to_json(ast, separators=(',', ':'))
+
+
+def measure(path: str, pipeline: str, gc_mode: str) -> Dict[str, float]:
+    """run one pipeline in this process and time the collections it triggers"""
+    pauses: List[float] = []
+    started: List[float] = []
+
+    def on_collection(phase: str, _):
+        if phase == "start":
+            started.append(time.perf_counter())
+        else:
+            pauses.append(time.perf_counter() - started.pop())
+
+    gc.collect()
+    gc.callbacks.append(on_collection)
+    start: float = time.perf_counter()
+    if pipeline == "compile":
+        output: str = compile_file(path, engine="regex", gc_mode=gc_mode)
+    else:
+        output = two_pass(path, gc_mode, pipeline == "release")
+    seconds: float = time.perf_counter() - start
+    gc.callbacks.remove(on_collection)
+    del output
+    start = time.perf_counter()
+    freed: int = gc.collect()
+    return {'seconds': seconds, 'collections': len(pauses), 'pause': sum(pauses), 'max_pause': max(pauses, default=0),
+            'freed': freed, 'full_collect': time.perf_counter() - start,
+            # KiB on linux.
+            'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='1M', help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--pipeline', nargs='+', choices=PIPELINES, default=PIPELINES, help='pipelines to run')
+    parser.add_argument('--gc', nargs='+', choices=GC_MODES, default=GC_MODES, help='gc modes to run')
+    # run one pipeline in this process on the source file and print its measurements as json.
+    parser.add_argument('--child', nargs=3, metavar=('PATH', 'PIPELINE', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(measure(*args.child)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path: str = os.path.join(directory, "source.tl")
+        with open(path, 'w') as file_obj:
+            file_obj.write(ProgramGenerator(args.seed, "ast").generate(parse_size(args.size)))
+        print("%-9s %-7s %8s %11s %9s %9s %12s %9s %8s" % (
+            "pipeline", "gc", "seconds", "collections", "pause s", "max s", "cycles freed", "full s", "rss MiB"))
+        for pipeline in args.pipeline:
+            for gc_mode in args.gc:
+                output: bytes = subprocess.check_output(
+                    [sys.executable, "-m", "benchmark.bench_gc", "--child", path, pipeline, gc_mode])
+                result: Dict[str, float] = json.loads(output.decode())
+                print("%-9s %-7s %8.2f %11d %9.3f %9.3f %12d %9.3f %8.0f" % (
+                    pipeline, gc_mode, result['seconds'], result['collections'], result['pause'],
+                    result['max_pause'], result['freed'], result['full_collect'], result['max_rss']))
+
+
+if __name__ == '__main__':
+    main()
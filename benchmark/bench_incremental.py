@@ -0,0 +1,65 @@
+"""
+time a one token edit reparsed by IncrementalParser against a full parse.
+
+every edit replaces an identifier inside a random function of a generated
+program by another one, the new tokens come from Lexer.relex. the full
+pipeline lexes, parses and transforms the whole text again. both trees are
+checked to be the same after every edit.
+
+usage: python -m benchmark.bench_incremental [--size 256K] [--seed 0] [--edits 20]
+"""
+import argparse
+import random
+import re
+import time
+from typing import List
+from benchmark.corpus import ProgramGenerator, parse_size
+from src.ast import SourceRoot
+from src.incremental import IncrementalParser
+from src.lexer import Lexer
+from src.parser import ParseNode, ParseTranslationUnit
+from src.source import StringSource
+from src.token import TokenSource
+
+
+def full_parse(text: str) -> ParseNode:
+    return SourceRoot.transform(ParseTranslationUnit.parse(TokenSource(Lexer(StringSource(text), engine="regex").match())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='256K', help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus and edit seed')
+    parser.add_argument('--edits', type=int, default=20, help='edits to time')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lexer = Lexer(StringSource(ProgramGenerator(args.seed, "ast").generate(parse_size(args.size))), engine="regex")
+    incremental = IncrementalParser()
+    incremental.parse(lexer.match())
+
+    full_seconds: List[float] = []
+    incremental_seconds: List[float] = []
+    changed: int = 0
+    for _ in range(args.edits):
+        match = rng.choice(list(re.finditer(r'\bv\d+\b', lexer.src.text)))
+        start: float = time.perf_counter()
+        result = incremental.reparse(*lexer.relex(incremental.tokens, match.start(), match.end(), "v0"))
+        incremental_seconds.append(time.perf_counter() - start)
+        changed += len(result.changed)
+
+        start = time.perf_counter()
+        ast: ParseNode = full_parse(lexer.src.text)
+        full_seconds.append(time.perf_counter() - start)
+        assert ParseNode.parse_dict(ast) == ParseNode.parse_dict(incremental.ast), "the reparse built another tree"
+
+    print("declarations %d, tokens %d, changed per edit %.2f" % (
+        len(incremental.spans), len(incremental.tokens), changed / args.edits))
+    print("%-12s %10s %10s" % ("", "mean ms", "best ms"))
+    for name, seconds in (("full", full_seconds), ("incremental", incremental_seconds)):
+        print("%-12s %10.2f %10.2f" % (name, sum(seconds) / len(seconds) * 1e3, min(seconds) * 1e3))
+    print("full / incremental: %.1f" % (sum(full_seconds) / sum(incremental_seconds)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+parse the bundled sample programs scaled up.
+
+usage: python -m benchmark.bench_parser [--repeat-source 2000] [--repeat 5]
+"""
+import argparse
+import time
+from src.lexer import Lexer
+from src.parser import ParseTranslationUnit
+from src.source import StringSource
+from src.token import TokenSource
+from test.testConfig import source_str
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat-source', type=int, default=2000,
+                        help='how many times each sample is repeated')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs per sample, the best one is reported')
+    args = parser.parse_args()
+
+    print("%8s %10s %10s %12s" % ("sample", "tokens", "seconds", "tokens/s"))
+    for index in (0, 1):
+        tokens = Lexer(StringSource(source_str[index] * args.repeat_source), engine="regex").match()
+        timings = []
+        for _ in range(args.repeat):
+            start: float = time.perf_counter()
+            ParseTranslationUnit.parse(TokenSource(tokens))
+            timings.append(time.perf_counter() - start)
+        print("%8d %10d %10.3f %12.0f" % (index, len(tokens), min(timings), len(tokens) / min(timings)))
+
+
+if __name__ == '__main__':
+    main()
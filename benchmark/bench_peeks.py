@@ -0,0 +1,54 @@
+"""
+count the lookahead the parser does per token on a generated corpus.
+
+usage: python -m benchmark.bench_peeks [--size 256K] [--seed 0] [--repeat 3]
+"""
+import argparse
+import time
+from collections import Counter
+from benchmark.corpus import ProgramGenerator, parse_size
+from src.lexer import Lexer
+from src.parser import ParseTranslationUnit
+from src.source import StringSource
+from src.token import TokenSource
+
+
+class CountingTokenSource(TokenSource):
+    """TokenSource counting its peek calls by lookahead distance"""
+
+    def __init__(self, token_list):
+        super(CountingTokenSource, self).__init__(token_list)
+        self.peeks: Counter = Counter()
+
+    def peek(self, seq: int=1):
+        self.peeks[seq] += 1
+        return super(CountingTokenSource, self).peek(seq)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='256K', help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--repeat', type=int, default=3, help='timed parses, the best one is reported')
+    args = parser.parse_args()
+
+    tokens = Lexer(StringSource(ProgramGenerator(args.seed, "full").generate(parse_size(args.size))),
+                   engine="regex").match()
+    token_source = CountingTokenSource(tokens)
+    ParseTranslationUnit.parse(token_source)
+    peeks: int = sum(token_source.peeks.values())
+    print("tokens           %10d" % len(tokens))
+    print("peeks            %10d" % peeks)
+    print("peeks per token  %10.2f  (%s)" % (peeks / len(tokens), ", ".join(
+        "peek(%d): %.2f" % (seq, count / len(tokens)) for seq, count in sorted(token_source.peeks.items()))))
+
+    timings = []
+    for _ in range(args.repeat):
+        start: float = time.perf_counter()
+        ParseTranslationUnit.parse(TokenSource(tokens))
+        timings.append(time.perf_counter() - start)
+    print("tokens per second %9.0f" % (len(tokens) / min(timings)))
+
+
+if __name__ == '__main__':
+    main()
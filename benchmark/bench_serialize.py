@@ -0,0 +1,52 @@
+"""
+size and speed of the binary tree format against json and re-parsing.
+
+for the CST and the AST of a generated program, reports the bytes of
+serialize.dumps and of the indented json str() writes, the time of dumps,
+loads and str(), and the time to get the tree back by lexing and parsing
+the text again. the loaded trees are checked to be the same first.
+
+usage: python -m benchmark.bench_serialize [--size 256K] [--seed 0] [--repeat 3]
+"""
+import argparse
+from benchmark.bench_throughput import best_of
+from benchmark.corpus import ProgramGenerator, parse_size
+from src import serialize
+from src.ast import SourceRoot
+from src.lexer import Lexer
+from src.parser import ParseNode, ParseTranslationUnit
+from src.source import StringSource
+from src.token import TokenSource
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='256K', help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs, the best one is reported')
+    args = parser.parse_args()
+
+    text: str = ProgramGenerator(args.seed, "ast").generate(parse_size(args.size))
+
+    def parse_cst() -> ParseNode:
+        return ParseTranslationUnit.parse(TokenSource(Lexer(StringSource(text), engine="regex").match()))
+
+    parsers = {"cst": parse_cst, "ast": lambda: SourceRoot.transform(parse_cst())}
+    print("%-4s %10s %12s %10s %10s %10s %10s %12s" % (
+        "tree", "bytes", "json bytes", "dumps s", "loads s", "str s", "parse s", "parse/loads"))
+    for name, parse in parsers.items():
+        tree: ParseNode = parse()
+        data: bytes = serialize.dumps(tree)
+        assert ParseNode.to_json(serialize.loads(data)) == ParseNode.to_json(tree), "loads built another tree"
+        json_bytes: int = len(str(tree).encode('utf-8'))
+        dumps_seconds: float = best_of(args.repeat, lambda: serialize.dumps(tree))
+        loads_seconds: float = best_of(args.repeat, lambda: serialize.loads(data))
+        str_seconds: float = best_of(args.repeat, lambda: str(tree))
+        parse_seconds: float = best_of(args.repeat, parse)
+        print("%-4s %10d %12d %10.4f %10.4f %10.4f %10.4f %12.1f" % (
+            name, len(data), json_bytes, dumps_seconds, loads_seconds, str_seconds, parse_seconds,
+            parse_seconds / loads_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+compare FileSource and MmapFileSource on large generated inputs.
+
+usage: python -m benchmark.bench_source [--sizes 1 10 100] [--lex] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable
+from src.lexer import Lexer
+from src.source import BaseSource, FileSource, MmapFileSource
+from test.testConfig import source_str
+
+MEGABYTE = 1 << 20
+
+
+def write_input(file_name: str, size: int):
+    """write the default sample repeatedly until file reaches size bytes"""
+    chunk: str = source_str[1] * 64
+    with open(file_name, 'w') as file_obj:
+        written: int = 0
+        while written < size:
+            written += file_obj.write(chunk)
+
+
+def drain(source: BaseSource) -> int:
+    """consume every character of source the way the lexer does"""
+    count: int = 0
+    while source.next_char(True) != -1:
+        source.next_char()
+        count += 1
+    return count
+
+
+def lex(source: BaseSource) -> int:
+    """lex source and return the token count"""
+    return len(Lexer(source).match())
+
+
+def measure(work: Callable[[BaseSource], int], source_class, file_name: str, repeat: int):
+    """return (best seconds, work result) over repeat runs"""
+    timings = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        source = source_class(file_name)
+        result: int = work(source)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100],
+                        help='input sizes in MB')
+    parser.add_argument('--lex', action='store_true',
+                        help='run the lexer instead of only draining characters')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per measurement, the best one is reported')
+    args = parser.parse_args()
+
+    work = lex if args.lex else drain
+    print("%8s %16s %10s %10s %8s" % ("size", "source", "seconds", "MB/s", "items"))
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            file_name: str = os.path.join(directory, 'bench.tl')
+            write_input(file_name, size * MEGABYTE)
+            for source_class in (FileSource, MmapFileSource):
+                seconds, result = measure(work, source_class, file_name, args.repeat)
+                print("%6dMB %16s %10.2f %10.2f %8d" % (
+                    size, source_class.__name__, seconds, size / seconds, result))
+
+
+if __name__ == '__main__':
+    main()
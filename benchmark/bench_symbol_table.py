@@ -0,0 +1,166 @@
+"""
+declare and lookup cost of the scoped symbol table against the flat one.
+
+a random program of --symbols symbols spread over --functions functions,
+with nested blocks that shadow outer names, is replayed as a stream of
+enter scope, declare, lookup and exit scope events against SymbolTable and
+against the one flat dict keyed by bare name it replaced. reports the best
+of --repeat replays, the ns per event, the traced bytes per symbol when
+every scope is kept, the flat table only keeps the last declaration of a
+name, and the lookups that found another declaration than the innermost
+visible one.
+
+usage: python -m benchmark.bench_symbol_table [--symbols 100000] [--functions 2000] [--globals 1000] [--seed 0]
+                                              [--repeat 3]
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+from benchmark.bench_throughput import best_of
+from src.symbol_table import SymbolTable
+
+ENTER, DECLARE, LOOKUP, EXIT = range(4)
+# names most functions declare, the flat table mixes them up.
+COMMON_NAMES: List[str] = ["i", "j", "k", "n", "tmp", "sum", "count", "result"] + ["v%d" % index for index in range(192)]
+TYPES: List[str] = ["int", "bool", "char", "float"]
+
+
+class FlatTable(object):
+    """the symbol table before scopes, one dict of dicts keyed by bare name"""
+    _var_size: Dict[str, int] = SymbolTable._var_size
+
+    def __init__(self):
+        self._symbol_table: Dict[str, Dict[str, str or int]] = dict()
+        self._addr: int = 0
+
+    def create_item(self, name: str, value_type: str, scope: str):
+        self._symbol_table[name] = {"addr": self._addr, "type": value_type, "scope": scope}
+        self._addr += self._var_size[value_type]
+
+    def lookup(self, name: str) -> Dict[str, str or int]:
+        return self._symbol_table.get(name)
+
+
+def generate(symbols: int, functions: int, globals_: int, seed: int) -> List[Tuple]:
+    """
+    the events of a random program. a lookup event carries the label of the
+    scope its name must resolve to.
+    """
+    rng = random.Random(seed)
+    events: List[Tuple] = []
+    visible: Dict[str, str] = {}
+    for index in range(globals_):
+        events.append((DECLARE, "g%d" % index, rng.choice(TYPES), "global"))
+        visible["g%d" % index] = "global"
+    per_function: int = max(1, (symbols - globals_) // functions)
+
+    def block(label: str, count: int, depth: int):
+        events.append((ENTER, label, depth == 1))
+        outer: Dict[str, str] = dict(visible)
+        declared: int = min(count, rng.randint(1, 8)) if depth < 4 else count
+        for name in rng.sample(COMMON_NAMES, declared):
+            events.append((DECLARE, name, rng.choice(TYPES), label))
+            visible[name] = label
+        # most references are to locals, the rest to globals.
+        names: List[str] = [name for name, scope in visible.items() if scope != "global"]
+        lookups: List[Tuple] = [(LOOKUP, name, visible[name]) for name in
+                                (rng.choice(names) if rng.random() < 0.9 else "g%d" % rng.randrange(globals_)
+                                 for _ in range(declared * 2))]
+        # half of the lookups come after the nested blocks, once their names are out of scope again.
+        events.extend(lookups[:declared])
+        rest: int = count - declared
+        nested: int = 0
+        while rest > 0:
+            size: int = min(rest, rng.randint(1, max(1, rest)))
+            block("%s.b%d" % (label, nested), size, depth + 1)
+            nested += 1
+            rest -= size
+        events.extend(lookups[declared:])
+        events.append((EXIT, ))
+        visible.clear()
+        visible.update(outer)
+
+    for index in range(functions):
+        block("f%d" % index, per_function, 1)
+    return events
+
+
+def replay_scoped(events: List[Tuple], keep: List = None) -> int:
+    """replay events into a SymbolTable, return the lookups that resolved wrong"""
+    table = SymbolTable()
+    wrong: int = 0
+    for event in events:
+        action: int = event[0]
+        if action == LOOKUP:
+            if table.lookup(event[1]).scope.name != event[2]:
+                wrong += 1
+        elif action == DECLARE:
+            table.create_item(event[1], event[2])
+        elif action == ENTER:
+            scope = table.enter_scope(event[1], event[2])
+            if keep is not None:
+                keep.append(scope)
+        else:
+            table.exit_scope()
+    return wrong
+
+
+def replay_flat(events: List[Tuple], keep: List = None) -> int:
+    """replay events into a FlatTable, return the lookups that resolved wrong"""
+    table = FlatTable()
+    if keep is not None:
+        keep.append(table)
+    wrong: int = 0
+    scopes: List[str] = ["global"]
+    for event in events:
+        action: int = event[0]
+        if action == LOOKUP:
+            if table.lookup(event[1])["scope"] != event[2]:
+                wrong += 1
+        elif action == DECLARE:
+            table.create_item(event[1], event[2], scopes[-1])
+        elif action == ENTER:
+            scopes.append(event[1])
+        else:
+            scopes.pop()
+    return wrong
+
+
+def traced_bytes(replay: Callable, events: List[Tuple]) -> int:
+    """bytes the tables of one replay keep alive"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        keep: List = []
+        replay(events, keep)
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=100000, help='symbols of the program')
+    parser.add_argument('--functions', type=int, default=2000, help='functions the symbols are spread over')
+    parser.add_argument('--globals', type=int, default=1000, help='global symbols among them')
+    parser.add_argument('--seed', type=int, default=0, help='program seed')
+    parser.add_argument('--repeat', type=int, default=3, help='timed replays, the best one is reported')
+    args = parser.parse_args()
+
+    events: List[Tuple] = generate(args.symbols, args.functions, args.globals, args.seed)
+    declared: int = sum(1 for event in events if event[0] == DECLARE)
+    print("events %d, symbols %d, scopes %d, lookups %d" % (
+        len(events), declared, sum(1 for event in events if event[0] == ENTER),
+        sum(1 for event in events if event[0] == LOOKUP)))
+    print("%-7s %10s %14s %16s %14s" % ("", "seconds", "ns per event", "bytes per symbol", "wrong lookups"))
+    for name, replay in (("flat", replay_flat), ("scoped", replay_scoped)):
+        wrong: int = replay(events)
+        seconds: float = best_of(args.repeat, lambda: replay(events))
+        print("%-7s %10.4f %14.1f %16.1f %14d" % (name, seconds, seconds / len(events) * 1e9,
+                                                  traced_bytes(replay, events) / declared, wrong))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+lexer, parser and transform throughput over generated corpora.
+
+every size is generated with benchmark.corpus ("ast" profile, so the whole
+pipeline runs) and reported as tokens/s for both lexer engines, cst
+nodes/s for ParseTranslationUnit.parse, ast nodes/s for SourceRoot.transform
+and end-to-end MB/s from a FileSource to the AST through SourceRoot.parse.
+
+usage: python -m benchmark.bench_throughput [--sizes 1K 10K 100K 1M] [--seed 0] [--repeat 3] [--json FILE]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+from benchmark.corpus import ProgramGenerator, parse_size
+from src.ast import SourceRoot
+from src.lexer import Lexer
+from src.parser import ParseNode, ParseTranslationUnit
+from src.source import FileSource, StringSource
+from src.token import StreamingTokenSource, TokenSource
+
+
+def count_nodes(root: ParseNode) -> int:
+    """count the nodes of a tree without recursion"""
+    count: int = 0
+    stack: List[ParseNode] = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.child)
+    return count
+
+
+def best_of(repeat: int, function: Callable) -> float:
+    """best wall time of repeat calls"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def end_to_end(path: str):
+    lexer: Lexer = Lexer(FileSource(path), engine="regex")
+    SourceRoot.parse(StreamingTokenSource(lexer.iter_tokens()))
+
+
+def measure(size: int, seed: int, repeat: int) -> Dict[str, float]:
+    """measure every stage on one generated program"""
+    text: str = ProgramGenerator(seed, "ast").generate(size)
+    tokens = Lexer(StringSource(text)).match()
+    cst: ParseNode = ParseTranslationUnit.parse(TokenSource(tokens))
+    cst_nodes: int = count_nodes(cst)
+    ast_nodes: int = count_nodes(SourceRoot.transform(cst))
+    result: Dict[str, float] = {'bytes': len(text), 'tokens': len(tokens),
+                                'cst_nodes': cst_nodes, 'ast_nodes': ast_nodes}
+
+    for engine in ("char", "regex"):
+        seconds: float = best_of(repeat, lambda: Lexer(StringSource(text), engine=engine).match())
+        result['lex_%s_tokens_per_s' % engine] = len(tokens) / seconds
+    seconds = best_of(repeat, lambda: ParseTranslationUnit.parse(TokenSource(tokens)))
+    result['parse_nodes_per_s'] = cst_nodes / seconds
+    seconds = best_of(repeat, lambda: SourceRoot.transform(cst))
+    result['transform_nodes_per_s'] = ast_nodes / seconds
+
+    with tempfile.NamedTemporaryFile('w', suffix='.tl', delete=False) as file_obj:
+        file_obj.write(text)
+    try:
+        seconds = best_of(repeat, lambda: end_to_end(file_obj.name))
+    finally:
+        os.remove(file_obj.name)
+    result['end_to_end_mb_per_s'] = len(text) / seconds / 1024 ** 2
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', nargs='+', default=['1K', '10K', '100K', '1M'],
+                        help='corpus sizes, e.g. 1K 10M 100M')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage, the best one is reported')
+    parser.add_argument('--json', default=None, help="write the results as json to FILE, '-' for stdout")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    if args.json != '-':
+        print("%8s %10s %14s %14s %14s %14s %8s" % ("size", "tokens", "char tok/s", "regex tok/s",
+                                                    "parse node/s", "ast node/s", "MB/s"))
+    for size in args.sizes:
+        result: Dict[str, float] = measure(parse_size(size), args.seed, args.repeat)
+        results[size] = result
+        if args.json != '-':
+            print("%8s %10d %14.0f %14.0f %14.0f %14.0f %8.3f" % (
+                size, result['tokens'], result['lex_char_tokens_per_s'], result['lex_regex_tokens_per_s'],
+                result['parse_nodes_per_s'], result['transform_nodes_per_s'], result['end_to_end_mb_per_s']))
+
+    report = {'seed': args.seed, 'repeat': args.repeat, 'python': sys.version.split()[0], 'results': results}
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as file_obj:
+            json.dump(report, file_obj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
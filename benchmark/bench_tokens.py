@@ -0,0 +1,44 @@
+"""
+memory per token of a token list against a TokenBuffer.
+
+usage: python -m benchmark.bench_tokens [--tokens 1000000]
+"""
+import argparse
+import gc
+import tracemalloc
+from src.lexer import Lexer
+from src.source import StringSource
+from test.testConfig import source_str
+
+
+def make_text(token_count: int) -> str:
+    """repeat the default sample until it holds about token_count tokens"""
+    sample_tokens: int = len(Lexer(StringSource(source_str[1])).match())
+    return source_str[1] * (token_count // sample_tokens + 1)
+
+
+def measure(build) -> (int, int):
+    """return (retained bytes, token count) of what build returns"""
+    gc.collect()
+    tracemalloc.start()
+    tokens = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained, len(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=1000000)
+    args = parser.parse_args()
+
+    text: str = make_text(args.tokens)
+    print("%12s %10s %12s %10s" % ("storage", "tokens", "bytes", "B/token"))
+    for name, build in (("list", lambda: Lexer(StringSource(text), engine="regex").match()),
+                        ("TokenBuffer", lambda: Lexer(StringSource(text), engine="regex").match_buffer())):
+        retained, count = measure(build)
+        print("%12s %10d %12d %10.1f" % (name, count, retained, retained / count))
+
+
+if __name__ == '__main__':
+    main()
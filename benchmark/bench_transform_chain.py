@@ -0,0 +1,57 @@
+"""
+time the AST stages on one long a - b - c ... chain per size.
+
+the CST is parsed once per size and transformed --repeat times, which only
+works because transform leaves the CST as it is. SourceRoot.parse, the
+iterative ParseNode.parse_dict and ParseNode.to_json run on the same chain,
+whose left folded AST is as deep as the chain is long. time per operand
+should stay flat as the chain grows. the cyclic gc scans every live node on
+its full collections, which shows up on the biggest sizes, --no-gc leaves it
+out.
+
+usage: python -m benchmark.bench_transform_chain [--operands 10000 100000 1000000] [--repeat 1] [--no-gc]
+"""
+import argparse
+import gc
+from typing import Callable, List, Tuple
+from benchmark.bench_throughput import best_of, count_nodes
+from src.ast import SourceRoot
+from src.lexer import Lexer
+from src.parser import ParseNode, ParseTranslationUnit
+from src.source import StringSource
+from src.token import Token, TokenSource
+
+
+def chain_program(operands: int) -> str:
+    return "int main ( ) { a = %s ; }" % " - ".join("v%d" % (index % 64) for index in range(operands))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--operands', nargs='+', type=int, default=[10000, 100000, 1000000],
+                        help='chain lengths')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per stage, the best one is reported')
+    parser.add_argument('--no-gc', action='store_true', help='disable the cyclic gc while timing')
+    args = parser.parse_args()
+
+    if args.no_gc:
+        gc.disable()
+
+    stages: Tuple[str, ...] = ("transform", "direct parse", "parse_dict", "to_json")
+    print("%10s %12s %s" % ("operands", "ast nodes", " ".join("%16s" % ("%s us" % stage) for stage in stages)))
+    for operands in args.operands:
+        tokens: List[Token] = Lexer(StringSource(chain_program(operands)), engine="regex").match()
+        cst: ParseNode = ParseTranslationUnit.parse(TokenSource(tokens))
+        ast: ParseNode = SourceRoot.transform(cst)
+        runs: Tuple[Callable, ...] = (lambda: SourceRoot.transform(cst),
+                                      lambda: SourceRoot.parse(TokenSource(tokens)),
+                                      lambda: ParseNode.parse_dict(ast),
+                                      lambda: ParseNode.to_json(ast, separators=(',', ':')))
+        seconds: List[float] = [best_of(args.repeat, run) for run in runs]
+        print("%10d %12d %s" % (operands, count_nodes(ast),
+                                " ".join("%16.3f" % (second / operands * 1e6) for second in seconds)))
+        del cst, ast, runs
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+visit overhead of the ASTVisitor dispatch on a large AST.
+
+a visitor with a counting handler for every node class visits each node of
+the AST of a generated program three ways: through the isinstance chain the
+old semantic_analyze ran, through the dispatch table lookup of
+semantic_analyze, and with traverse. the handlers do no work, so the
+timings are the cost of dispatch and walking alone.
+
+usage: python -m benchmark.bench_visitor [--size 1M] [--seed 0] [--repeat 5]
+"""
+import argparse
+from typing import List
+from benchmark.bench_throughput import best_of, count_nodes
+from benchmark.corpus import ProgramGenerator, parse_size
+from src import ast
+from src.lexer import Lexer
+from src.quad import AST_NODE_CLASSES, ASTVisitor
+from src.source import StringSource
+from src.token import TokenSource
+
+# the node classes in the order the old isinstance chain tested them.
+CHAIN_ORDER: List[type] = [ast.SourceRoot, ast.ExternalDecl, ast.InitDeclaratorList, ast.InitDeclarator,
+                           ast.VarDeclarator, ast.Initializer, ast.FunctionDefinition, ast.ParamList,
+                           ast.ParamDecl, ast.LocalDeclList, ast.CompoundStat, ast.LabeledStat, ast.ExpStat,
+                           ast.SelectionStat, ast.IterationStat, ast.JumpStat, ast.Expression, ast.LogicalOrExp,
+                           ast.LogicalAndExp, ast.EqualityExp, ast.RelationalExp, ast.AdditiveExp, ast.MultExp,
+                           ast.CastExp, ast.PostfixExp, ast.PrimaryExp]
+
+
+class CountingVisitor(ASTVisitor):
+    """count the handled nodes, the same handler for every node class"""
+
+    def __init__(self):
+        self.count: int = 0
+
+    @classmethod
+    def build_dispatch_table(cls):
+        return {node_class.kind: cls.handle for node_class in AST_NODE_CLASSES}
+
+    def handle(self, ast_node):
+        self.count += 1
+
+
+class WalkingVisitor(CountingVisitor):
+    """count the handled nodes and go on below them, the shape of a real visitor"""
+
+    def handle(self, ast_node):
+        self.count += 1
+        self.visit_children(ast_node)
+
+
+def chain_dispatch(visitor: CountingVisitor, ast_node):
+    for node_class in CHAIN_ORDER:
+        if isinstance(ast_node, node_class):
+            visitor.handle(ast_node)
+            return
+
+
+def walk(root, dispatch):
+    """call dispatch on every node, the walk of the old traverse"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        dispatch(node)
+        stack.extend(reversed(node.child))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='1M', help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    parser.add_argument('--repeat', type=int, default=5, help='timed walks, the best one is reported')
+    args = parser.parse_args()
+
+    text: str = ProgramGenerator(args.seed, "ast").generate(parse_size(args.size))
+    root = ast.SourceRoot.parse(TokenSource(Lexer(StringSource(text), engine="regex").match()))
+    nodes: int = count_nodes(root)
+
+    visitor = CountingVisitor()
+    walking_visitor = WalkingVisitor()
+    timings = (
+        ("isinstance chain", best_of(args.repeat, lambda: walk(root, lambda node: chain_dispatch(visitor, node)))),
+        ("dispatch table", best_of(args.repeat, lambda: walk(root, visitor.semantic_analyze))),
+        ("traverse", best_of(args.repeat, lambda: walking_visitor.traverse(root))),
+    )
+    print("nodes %d" % nodes)
+    print("%-18s %10s %14s" % ("", "seconds", "ns per node"))
+    for name, seconds in timings:
+        print("%-18s %10.4f %14.1f" % (name, seconds, seconds / nodes * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+generate seeded, syntactically valid thrilang programs of a target size.
+
+the "full" profile covers every construct the parser accepts: global and
+local declarations, nested arrays, brace initializers, if/else, while,
+do-while, switch with case/default, labels, calls and long expression
+chains. the "ast" profile leaves out the constructs SourceRoot.transform
+can not handle yet (if/else, switch, labels, casts, prefix '++',
+multi-argument calls, empty array bounds and brace initializers), so its
+output runs through the whole pipeline.
+
+tokens are always separated by a space, the lexer rejects an integer
+directly followed by an operator.
+
+usage: python -m benchmark.corpus [--size 1M] [--seed 0] [--profile full] [-o corpus.tl]
+"""
+import argparse
+import random
+import sys
+from typing import Iterator, List
+
+PROFILES = ("full", "ast")
+VARTYPES = ("int", "float", "char", "bool")
+BINARY_OPERATORS = ("+", "-", "*", "/", "<", ">", "<=", ">=", "==", "!=", "&&", "||")
+UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(size: str) -> int:
+    """parse a byte size like 512, 10K or 100M"""
+    size = size.strip().upper().rstrip('B')
+    if size and size[-1] in UNITS:
+        return int(float(size[:-1]) * UNITS[size[-1]])
+    return int(size)
+
+
+class ProgramGenerator(object):
+    """
+    seeded generator of thrilang source.
+
+    the same seed and profile always give the same program, output grows
+    one external declaration at a time until the target size is reached.
+    """
+
+    def __init__(self, seed: int = 0, profile: str = "full", max_depth: int = 3,
+                 max_chain: int = 64, variables: int = 64):
+        if profile not in PROFILES:
+            raise ValueError("unknown profile '%s', expect one of %s" % (profile, ", ".join(PROFILES)))
+        self.random: random.Random = random.Random(seed)
+        self.full: bool = profile == "full"
+        self.max_depth: int = max_depth
+        self.max_chain: int = max_chain
+        self.variables: List[str] = ["v%d" % index for index in range(variables)]
+        self.functions: List[str] = []
+
+    def iter_chunks(self, size: int) -> Iterator[str]:
+        """yield external declarations until at least size bytes are produced"""
+        produced: int = 0
+        while produced < size or not self.functions:
+            chunk: str = self.external_decl() + "\n"
+            produced += len(chunk)
+            yield chunk
+
+    def generate(self, size: int) -> str:
+        """return a program of at least size bytes"""
+        return ''.join(self.iter_chunks(size))
+
+    def external_decl(self) -> str:
+        """a function definition or a global declaration"""
+        if self.random.random() < 0.2:
+            return self.decl(global_scope=True)
+        return self.function_definition()
+
+    def function_definition(self) -> str:
+        name: str = "f%d" % len(self.functions)
+        params: List[str] = []
+        choice: float = self.random.random()
+        if self.full and choice < 0.1:
+            params = [self.variable() for _ in range(self.random.randint(1, 3))]
+        elif choice < 0.7:
+            params = [self.type_spec() + " " + self.declarator(allow_empty=False)
+                      for _ in range(self.random.randint(1, 3))]
+        self.functions.append(name)
+        return "%s %s ( %s ) %s" % (self.type_spec(), name, " , ".join(params), self.compound_stat(0))
+
+    def decl(self, global_scope: bool = False) -> str:
+        declarators: List[str] = [self.init_declarator(global_scope)
+                                  for _ in range(self.random.randint(1, 3))]
+        return "%s %s ;" % (self.type_spec(), " , ".join(declarators))
+
+    def init_declarator(self, global_scope: bool) -> str:
+        choice: float = self.random.random()
+        if choice < 0.3:
+            return self.declarator(allow_empty=global_scope)
+        elif self.full and choice < 0.4:
+            return "%s = { %s }" % (self.variable(), " , ".join(
+                self.variable() for _ in range(self.random.randint(1, 4))))
+        return "%s = %s" % (self.variable(), self.chain(0))
+
+    def declarator(self, allow_empty: bool) -> str:
+        parts: List[str] = [self.variable()]
+        for _ in range(self.random.choice((0, 0, 1, 2, 3))):
+            if self.full and allow_empty and self.random.random() < 0.2:
+                parts.append("[ ]")
+            else:
+                parts.append("[ %d ]" % self.random.randint(1, 64))
+        return " ".join(parts)
+
+    def compound_stat(self, depth: int) -> str:
+        lines: List[str] = ["{"]
+        lines.extend(self.decl() for _ in range(self.random.randint(0, 3)))
+        lines.extend(self.stat(depth + 1) for _ in range(self.random.randint(1, 6)))
+        lines.append("}")
+        return "\n".join(lines)
+
+    def stat(self, depth: int) -> str:
+        choice: float = self.random.random()
+        if depth >= self.max_depth or choice < 0.45:
+            return self.exp_stat()
+        elif choice < 0.55:
+            return self.compound_stat(depth)
+        elif choice < 0.67:
+            if self.full and self.random.random() < 0.5:
+                return "if ( %s ) %s else %s" % (self.chain(0), self.compound_stat(depth),
+                                                 self.stat(depth + 1))
+            return "if ( %s ) %s" % (self.chain(0), self.compound_stat(depth))
+        elif choice < 0.75:
+            return "while ( %s ) %s" % (self.chain(0), self.loop_body(depth))
+        elif choice < 0.8:
+            return "do %s while ( %s ) ;" % (self.loop_body(depth), self.chain(0))
+        elif choice < 0.87 and self.full:
+            return self.switch_stat(depth)
+        elif choice < 0.9 and self.full:
+            return "l%d : %s" % (self.random.randint(0, 99), self.exp_stat())
+        elif choice < 0.95:
+            return "return %s ;" % self.chain(0)
+        return ";"
+
+    def loop_body(self, depth: int) -> str:
+        body: str = self.compound_stat(depth)
+        if self.random.random() < 0.3:
+            return body[:-1] + "%s ;\n}" % self.random.choice(("break", "continue"))
+        return body
+
+    def switch_stat(self, depth: int) -> str:
+        cases: List[str] = ["case %d : %s" % (value, self.stat(depth + 1))
+                            for value in range(self.random.randint(1, 4))]
+        cases.append("default : break ;")
+        return "switch ( %s ) {\n%s\n}" % (self.variable(), "\n".join(cases))
+
+    def exp_stat(self) -> str:
+        choice: float = self.random.random()
+        if choice < 0.1:
+            return "%s ;" % self.call()
+        elif choice < 0.2:
+            return "%s ++ ;" % self.variable()
+        elif self.full and choice < 0.25:
+            return "++ %s ;" % self.variable()
+        elif self.full and choice < 0.3:
+            return "%s = %s , %s = %s ;" % (self.variable(), self.chain(0), self.variable(), self.chain(0))
+        elif choice < 0.35:
+            return "%s = %s = %s ;" % (self.variable(), self.variable(), self.chain(0))
+        return "%s = %s ;" % (self.variable(), self.chain(0))
+
+    def chain(self, depth: int) -> str:
+        """a left to right chain of binary operators, a few of them long"""
+        if self.random.random() < 0.05:
+            length: int = self.random.randint(self.max_chain // 2, self.max_chain)
+        else:
+            length = self.random.choice((1, 1, 2, 3, 4, 6))
+        parts: List[str] = [self.operand(depth)]
+        for _ in range(length - 1):
+            parts.append(self.random.choice(BINARY_OPERATORS))
+            parts.append(self.operand(depth))
+        return " ".join(parts)
+
+    def operand(self, depth: int) -> str:
+        choice: float = self.random.random()
+        if choice < 0.4:
+            return self.variable()
+        elif choice < 0.6:
+            return str(self.random.randint(0, 1000))
+        elif choice < 0.65:
+            return "%d.%d" % (self.random.randint(0, 99), self.random.randint(0, 99))
+        elif choice < 0.68:
+            return "true"
+        elif choice < 0.76 and depth < 2:
+            return "%s [ %s ]" % (self.variable(), self.chain(depth + 1))
+        elif choice < 0.84 and depth < 2 and self.functions:
+            return self.call(depth + 1)
+        elif choice < 0.88:
+            return "%s ++" % self.variable()
+        elif self.full and choice < 0.92:
+            return "( %s ) %s" % (self.type_spec(), self.variable())
+        elif self.full and choice < 0.95:
+            return "++ %s" % self.variable()
+        return self.variable()
+
+    def call(self, depth: int = 0) -> str:
+        name: str = self.random.choice(self.functions) if self.functions else "main"
+        count: int = self.random.randint(0, 3 if self.full else 1)
+        arguments: List[str] = [self.chain(depth + 1) for _ in range(count)]
+        return "%s ( %s )" % (name, " , ".join(arguments)) if arguments else "%s ( )" % name
+
+    def type_spec(self) -> str:
+        return self.random.choice(VARTYPES)
+
+    def variable(self) -> str:
+        return self.random.choice(self.variables)
+
+
+def write_corpus(output_file: str, size: int, seed: int = 0, profile: str = "full"):
+    """write a generated program of at least size bytes to output_file"""
+    with open(output_file, 'w') as file_obj:
+        for chunk in ProgramGenerator(seed, profile).iter_chunks(size):
+            file_obj.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='1M', help='target size, e.g. 1K, 10M, 100M')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--profile', choices=PROFILES, default="full", help='constructs to cover')
+    parser.add_argument('-o', '--output', default=None, help='output file, default to stdout')
+    args = parser.parse_args()
+
+    if args.output:
+        write_corpus(args.output, parse_size(args.size), args.seed, args.profile)
+    else:
+        for chunk in ProgramGenerator(args.seed, args.profile).iter_chunks(parse_size(args.size)):
+            sys.stdout.write(chunk)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+run the pipeline benchmarks into a json baseline and compare two baselines.
+
+every benchmark gets warmup runs and then repeated trials on a generated
+corpus, the baseline keeps the raw timings with their median and p95 and
+the peak memory of one extra run under tracemalloc. compare flags a
+benchmark as slower only when its median grew by more than the threshold
+and a one-sided Mann-Whitney U test on the raw timings is significant.
+
+usage: python -m benchmark.runner run [-o baseline.json] [--size 64K] [--repeat 20] [--warmup 3] [--only NAME ...]
+       python -m benchmark.runner compare OLD.json NEW.json [--threshold 0.05] [--alpha 0.01]
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Sequence, Tuple
+from benchmark.corpus import ProgramGenerator, parse_size
+from src import serialize
+from src.ast import SourceRoot
+from src.compiler import compile_file
+from src.lexer import Lexer
+from src.parser import ParseTranslationUnit
+from src.source import StringSource
+from src.token import TokenSource
+
+BASELINE_VERSION = 1
+
+
+def _write_source(text: str, directory: str) -> Tuple[str, str]:
+    source_file: str = os.path.join(directory, "source.tl")
+    with open(source_file, 'w') as file_obj:
+        file_obj.write(text)
+    return source_file, os.path.join(directory, "tree.dot")
+
+
+def _cold_cache(text: str, directory: str) -> Tuple[str, str]:
+    source_file: str = _write_source(text, directory)[0]
+    cache_dir: str = os.path.join(directory, "cache")
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    return source_file, cache_dir
+
+
+def _warm_cache(text: str, directory: str) -> Tuple[str, str]:
+    source_file, cache_dir = _cold_cache(text, directory)
+    compile_file(source_file, engine="regex", cache_dir=cache_dir)
+    return source_file, cache_dir
+
+
+def _generate_ast_dot(files: Tuple[str, str]):
+    # pydot is optional, a missing module skips the benchmark.
+    from src.util.parse_tree_dot import generate_ast_dot
+    generate_ast_dot(*files)
+
+
+# name -> (prepare, run). prepare(text, scratch_directory) turns the corpus
+# into the argument of run before every trial and is not timed.
+BENCHMARKS: Dict[str, Tuple[Callable, Callable]] = {
+    'lex_char': (lambda text, _: text, lambda text: Lexer(StringSource(text)).match()),
+    'lex_regex': (lambda text, _: text, lambda text: Lexer(StringSource(text), engine="regex").match()),
+    'parse': (lambda text, _: Lexer(StringSource(text), engine="regex").match(),
+              lambda tokens: ParseTranslationUnit.parse(TokenSource(tokens))),
+    'transform': (lambda text, _: ParseTranslationUnit.parse(
+        TokenSource(Lexer(StringSource(text), engine="regex").match())), SourceRoot.transform),
+    'direct_ast': (lambda text, _: Lexer(StringSource(text), engine="regex").match(),
+                   lambda tokens: SourceRoot.parse(TokenSource(tokens))),
+    'load_ast': (lambda text, _: serialize.dumps(SourceRoot.parse(
+        TokenSource(Lexer(StringSource(text), engine="regex").match()))), serialize.loads),
+    'generate_ast_dot': (_write_source, _generate_ast_dot),
+    # compile_file with an empty and with a filled cache, compile runs without one.
+    'compile': (_write_source, lambda files: compile_file(files[0], engine="regex")),
+    'compile_cold': (_cold_cache, lambda files: compile_file(files[0], engine="regex", cache_dir=files[1])),
+    'compile_warm': (_warm_cache, lambda files: compile_file(files[0], engine="regex", cache_dir=files[1])),
+}
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """nearest-rank percentile"""
+    ordered: List[float] = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run_benchmark(name: str, text: str, repeat: int, warmup: int) -> Dict[str, object]:
+    """time one benchmark and measure its peak memory"""
+    prepare, function = BENCHMARKS[name]
+    samples: List[float] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for trial in range(warmup + repeat):
+            argument = prepare(text, directory)
+            start: float = time.perf_counter()
+            function(argument)
+            elapsed: float = time.perf_counter() - start
+            if trial >= warmup:
+                samples.append(elapsed)
+
+        argument = prepare(text, directory)
+        tracemalloc.start()
+        try:
+            function(argument)
+            peak: int = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'median': statistics.median(samples), 'p95': percentile(samples, 0.95),
+            'min': min(samples), 'peak_bytes': peak, 'samples': samples}
+
+
+def run(names: Sequence[str], size: int, seed: int, repeat: int, warmup: int) -> Dict[str, object]:
+    """run the benchmarks and return the baseline document"""
+    text: str = ProgramGenerator(seed, "ast").generate(size)
+    baseline: Dict[str, object] = {'version': BASELINE_VERSION, 'python': sys.version.split()[0],
+                                   'size': len(text), 'seed': seed, 'repeat': repeat,
+                                   'warmup': warmup, 'benchmarks': {}, 'skipped': {}}
+    for name in names:
+        try:
+            result: Dict[str, object] = run_benchmark(name, text, repeat, warmup)
+        except ImportError as exception:
+            baseline['skipped'][name] = str(exception)
+            print("%-18s skipped: %s" % (name, exception), file=sys.stderr)
+            continue
+        baseline['benchmarks'][name] = result
+        print("%-18s median %9.4fs  p95 %9.4fs  peak %8.1f KiB" % (
+            name, result['median'], result['p95'], result['peak_bytes'] / 1024), file=sys.stderr)
+    return baseline
+
+
+def mann_whitney_greater(old: Sequence[float], new: Sequence[float]) -> float:
+    """
+    one-sided p value of new being stochastically greater than old.
+
+    normal approximation of the Mann-Whitney U statistic with continuity
+    correction, good enough from about 8 samples per side.
+    """
+    u_statistic: float = 0.0
+    for new_sample in new:
+        for old_sample in old:
+            if new_sample > old_sample:
+                u_statistic += 1.0
+            elif new_sample == old_sample:
+                u_statistic += 0.5
+    mean: float = len(old) * len(new) / 2.0
+    deviation: float = math.sqrt(len(old) * len(new) * (len(old) + len(new) + 1) / 12.0)
+    if deviation == 0:
+        return 1.0
+    z_score: float = (u_statistic - mean - 0.5) / deviation
+    return 0.5 * math.erfc(z_score / math.sqrt(2))
+
+
+def compare(old: Dict[str, object], new: Dict[str, object], threshold: float,
+            alpha: float) -> List[Tuple[str, float, float, float, float, str]]:
+    """
+    compare the benchmarks both baselines have.
+
+    return (name, old median, new median, ratio, p value, verdict) rows, the
+    verdict is "slower", "faster" or "same".
+    """
+    rows: List[Tuple[str, float, float, float, float, str]] = []
+    for name in sorted(set(old['benchmarks']) & set(new['benchmarks'])):
+        old_result, new_result = old['benchmarks'][name], new['benchmarks'][name]
+        ratio: float = new_result['median'] / old_result['median']
+        slower_p: float = mann_whitney_greater(old_result['samples'], new_result['samples'])
+        faster_p: float = mann_whitney_greater(new_result['samples'], old_result['samples'])
+        if ratio > 1 + threshold and slower_p < alpha:
+            verdict, p_value = "slower", slower_p
+        elif ratio < 1 - threshold and faster_p < alpha:
+            verdict, p_value = "faster", faster_p
+        else:
+            verdict, p_value = "same", min(slower_p, faster_p)
+        rows.append((name, old_result['median'], new_result['median'], ratio, p_value, verdict))
+    return rows
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command')
+    run_parser = commands.add_parser('run', help='run the benchmarks and write a baseline')
+    run_parser.add_argument('-o', '--output', default='baseline.json', help="baseline file, '-' for stdout")
+    run_parser.add_argument('--size', default='64K', help='corpus size')
+    run_parser.add_argument('--seed', type=int, default=0, help='corpus seed')
+    run_parser.add_argument('--repeat', type=int, default=20, help='timed trials per benchmark')
+    run_parser.add_argument('--warmup', type=int, default=3, help='untimed runs before the trials')
+    run_parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), default=sorted(BENCHMARKS),
+                            help='benchmarks to run')
+    compare_parser = commands.add_parser('compare', help='flag significant slowdowns between two baselines')
+    compare_parser.add_argument('old', help='baseline before the change')
+    compare_parser.add_argument('new', help='baseline after the change')
+    compare_parser.add_argument('--threshold', type=float, default=0.05,
+                                help='relative median change below which nothing is flagged')
+    compare_parser.add_argument('--alpha', type=float, default=0.01, help='significance level')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        baseline = run(args.only, parse_size(args.size), args.seed, args.repeat, args.warmup)
+        if args.output == '-':
+            json.dump(baseline, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.output, 'w') as file_obj:
+                json.dump(baseline, file_obj, indent=2)
+        return 0
+    elif args.command == 'compare':
+        with open(args.old) as file_obj:
+            old = json.load(file_obj)
+        with open(args.new) as file_obj:
+            new = json.load(file_obj)
+        rows = compare(old, new, args.threshold, args.alpha)
+        print("%-18s %12s %12s %8s %10s  %s" % ("benchmark", "old median", "new median", "ratio", "p", "verdict"))
+        for row in rows:
+            print("%-18s %11.4fs %11.4fs %8.3f %10.2g  %s" % row)
+        return 1 if any(row[-1] == "slower" for row in rows) else 0
+    parser.print_help()
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
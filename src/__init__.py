@@ -3,3 +3,5 @@
 # @Date:   2017-04-13 00:42:20
 # @Last Modified by:   Macsnow
 # @Last Modified time: 2017-04-13 00:42:21
+
+__version__ = "0.1.0"
@@ -0,0 +1,235 @@
+"""
+Flat arena form of a tree, one array column per node field.
+
+a node is its preorder index. the columns hold its NodeKind, its symbol,
+either an index into the string table or a token of the TokenBuffer, its
+first child, next sibling and father, the end of its subtree and the row of
+its semantic attributes, -1 where there is none. as nodes are in preorder
+the subtree of a node is the index range up to its end, so whole tree
+queries are loops over ranges, and over NumPy arrays of the kind column
+when NumPy is installed.
+
+NodeRef is a node object view of one index, so visitors and the json
+writers run on an arena as they do on node objects.
+
+    arena = ArenaTree.from_tree(SourceRoot.transform(cst))
+    calls = arena.find(NodeKind.AST_POSTFIX_EXP, "call")
+    visitor.traverse(arena.root)
+"""
+from array import array
+from typing import Dict, List
+from src.ast import SourceRoot
+from src.parser import NodeKind, ParseNode
+from src.token import Token, TokenBuffer, TokenSource, TokenView
+
+try:
+    import numpy
+except ImportError:
+    # numpy is optional, the queries fall back to loops over the columns.
+    numpy = None
+
+NO_NODE = -1
+# the semantic attributes of an attribute row, in column order.
+ATTRIBUTES = ('scope', 'type', 'value', 'array_dimension')
+# value of an attribute row column never set.
+_UNSET = object()
+
+
+class ArenaTree(object):
+    """a tree stored in parallel array columns, a node is its preorder index"""
+
+    def __init__(self):
+        self.kinds: array = array('H')
+        # >= 0 an index into strings, < 0 the token ~symbol of tokens.
+        self.symbols: array = array('i')
+        self.first_children: array = array('i')
+        self.next_siblings: array = array('i')
+        self.parents: array = array('i')
+        # one past the last node of the subtree.
+        self.ends: array = array('i')
+        self.attribute_rows: array = array('i')
+        self.tokens: TokenBuffer = TokenBuffer()
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self.attributes: List[list] = []
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def from_tree(cls, root: ParseNode):
+        """copy the tree under root, an AST or a CST, into a new arena"""
+        arena = cls()
+        kinds, symbols, first_children, next_siblings, parents = \
+            arena.kinds, arena.symbols, arena.first_children, arena.next_siblings, arena.parents
+        token_ids: Dict[int, int] = {}
+        # the last child added to every node so far.
+        last_children: List[int] = []
+        stack = [(root, NO_NODE)]
+        while stack:
+            node, parent = stack.pop()
+            index: int = len(kinds)
+            kinds.append(node.kind)
+            symbol = node.symbol
+            if symbol.__class__ is str:
+                symbols.append(arena.intern(symbol))
+            else:
+                token_id: int = token_ids.get(id(symbol))
+                if token_id is None:
+                    token_id = token_ids[id(symbol)] = len(arena.tokens)
+                    arena.tokens.append(symbol.kind, symbol.value, symbol.cursor.line, symbol.cursor.col)
+                symbols.append(~token_id)
+            first_children.append(NO_NODE)
+            next_siblings.append(NO_NODE)
+            parents.append(parent)
+            last_children.append(NO_NODE)
+            if parent != NO_NODE:
+                if last_children[parent] == NO_NODE:
+                    first_children[parent] = index
+                else:
+                    next_siblings[last_children[parent]] = index
+                last_children[parent] = index
+            stack.extend((child, index) for child in reversed(node.child))
+
+        # backwards, the subtree of a node ends where the one of its last child does.
+        ends: List[int] = [0] * len(kinds)
+        for index in range(len(kinds) - 1, -1, -1):
+            last_child: int = last_children[index]
+            ends[index] = index + 1 if last_child == NO_NODE else ends[last_child]
+        arena.ends = array('i', ends)
+        arena.attribute_rows = array('i', [NO_NODE]) * len(kinds)
+        return arena
+
+    @classmethod
+    def parse(cls, token_source: TokenSource):
+        """build the AST of token_source with SourceRoot.parse into an arena, the node objects are dropped"""
+        return cls.from_tree(SourceRoot.parse(token_source))
+
+    def intern(self, string: str) -> int:
+        """return the string table index of string"""
+        string_id: int = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    @property
+    def root(self):
+        return NodeRef(self, 0)
+
+    def symbol(self, index: int) -> Token or str:
+        symbol: int = self.symbols[index]
+        return self.strings[symbol] if symbol >= 0 else TokenView(self.tokens, ~symbol)
+
+    def children(self, index: int) -> List[int]:
+        children: List[int] = []
+        child: int = self.first_children[index]
+        while child != NO_NODE:
+            children.append(child)
+            child = self.next_siblings[child]
+        return children
+
+    def subtree(self, index: int = 0) -> range:
+        """the node and every node below it, in preorder"""
+        return range(index, self.ends[index])
+
+    def attribute_row(self, index: int) -> list:
+        """the attribute row of a node, added on first use"""
+        row: int = self.attribute_rows[index]
+        if row == NO_NODE:
+            row = self.attribute_rows[index] = len(self.attributes)
+            self.attributes.append([_UNSET] * len(ATTRIBUTES))
+        return self.attributes[row]
+
+    def kind_counts(self, use_numpy: bool = None) -> Dict[NodeKind, int]:
+        """number of nodes of every kind in the arena, with numpy if use_numpy, default if it is installed"""
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if use_numpy:
+            counts = numpy.bincount(numpy.frombuffer(self.kinds, dtype=numpy.uint16))
+            return {NodeKind(kind): int(counts[kind]) for kind in numpy.flatnonzero(counts)}
+        counts = [0] * (max(NodeKind) + 1)
+        for kind in self.kinds:
+            counts[kind] += 1
+        return {NodeKind(kind): count for kind, count in enumerate(counts) if count}
+
+    def find(self, kind: NodeKind, symbol: str = None, use_numpy: bool = None) -> List[int]:
+        """
+        indices of the nodes of kind, in preorder, only those whose symbol is
+        the string symbol if given, e.g. "call" for the calls among the
+        postfix expressions.
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        symbol_id: int = NO_NODE if symbol is None else self._string_ids.get(symbol, len(self.strings))
+        if use_numpy:
+            matches = numpy.frombuffer(self.kinds, dtype=numpy.uint16) == kind
+            if symbol is not None:
+                matches &= numpy.frombuffer(self.symbols, dtype=numpy.int32) == symbol_id
+            return numpy.flatnonzero(matches).tolist()
+        if symbol is None:
+            return [index for index, node_kind in enumerate(self.kinds) if node_kind == kind]
+        symbols: array = self.symbols
+        return [index for index, node_kind in enumerate(self.kinds) if node_kind == kind and
+                symbols[index] == symbol_id]
+
+
+def _attribute(column: int) -> property:
+    def getter(self):
+        row: int = self.arena.attribute_rows[self.index]
+        value = _UNSET if row == NO_NODE else self.arena.attributes[row][column]
+        if value is _UNSET:
+            raise AttributeError(ATTRIBUTES[column])
+        return value
+
+    def setter(self, value):
+        self.arena.attribute_row(self.index)[column] = value
+
+    return property(getter, setter)
+
+
+class NodeRef(object):
+    """
+    one node of an ArenaTree behind the node object interface, created on
+    access. two refs of the same node are equal but not the same object.
+    """
+    __slots__ = ('arena', 'index')
+
+    def __init__(self, arena: ArenaTree, index: int):
+        self.arena: ArenaTree = arena
+        self.index: int = index
+
+    def __eq__(self, other):
+        return isinstance(other, NodeRef) and self.arena is other.arena and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.arena), self.index))
+
+    def __repr__(self):
+        return "NodeRef(%d, %s)" % (self.index, NodeKind(self.kind).name)
+
+    @property
+    def kind(self) -> int:
+        return self.arena.kinds[self.index]
+
+    @property
+    def symbol(self) -> Token or str:
+        return self.arena.symbol(self.index)
+
+    @property
+    def child(self) -> List:
+        return [NodeRef(self.arena, child) for child in self.arena.children(self.index)]
+
+    @property
+    def father_node(self):
+        parent: int = self.arena.parents[self.index]
+        return None if parent == NO_NODE else NodeRef(self.arena, parent)
+
+    scope = _attribute(0)
+    type = _attribute(1)
+    value = _attribute(2)
+    array_dimension = _attribute(3)
+
+    def accept(self, visitor):
+        """accept method for different visitor"""
+        visitor.semantic_analyze(self)
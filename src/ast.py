@@ -3,37 +3,160 @@ Transform a concrete syntax tree(CST) to a abstract syntax tree(AST)
 Base assumption:
     CST is valid.
 
+SourceRoot.parse builds the same AST straight from a token source without
+the CST, for the constructs transform supports. transform also takes the
+compact CST, where a node may stand for the single child wrappers above it.
+
 [AST structure form](http://www.cs.xu.edu/csci310/09s/ast.html)
 """
 # NOTE: semantic analyze by travel ast.
 # TODO: make each kind of node unique.
 
+import weakref
 from typing import List
-from .parser import ParseNode
-from .token import Token
-from .exceptions import TransformException
+from .parser import (NodeKind, ParseNode, ParseToken, ParseTypeSpec, ParseIdList, ParseInitializer, ParseStatement,
+                     ParseLabeledStat, ParseExpStat, ParseCompoundStat, ParseSelectionStat, ParseIterationStat,
+                     ParseJumpStat, ParseArgumentExpList, ParseExpression, ParseAssignmentExp, ParseLogicalOrExp,
+                     ParseLogicalAndExp, ParseEqualityExp, ParseRelationalExp, ParseAdditiveExp, ParseMultExp,
+                     ParseCastExp, ParseUnaryExp, ParsePostfixExp, ParsePrimaryExp,
+                     VARTYPE_KINDS, PRIMARY_KINDS, POSTFIX_FIRST_KINDS, UNARY_OPERATOR_KINDS, INCREMENT_KINDS,
+                     EXP_FIRST_KINDS, DECLARATOR_SUFFIX_KINDS, ASSIGNMENT_OPERATOR_KINDS, COMMA_KINDS,
+                     LOGICAL_OR_OPERATOR_KINDS, LOGICAL_AND_OPERATOR_KINDS, EQUALITY_OPERATOR_KINDS,
+                     RELATIONAL_OPERATOR_KINDS, ADDITIVE_OPERATOR_KINDS, MULTIPLICATIVE_OPERATOR_KINDS,
+                     LEAF_CHILDREN)
+from .token import Token, TokenSource, TokenType
+from .exceptions import ParseException, TransformException
 
 
 class AbstractSyntaxTreeNode(ParseNode):
-    """base class node for AST with method for visitor"""
+    """
+    base class node for AST with method for visitor.
+
+    the father of a node is held by a weak reference, so a tree has no
+    reference cycle and is freed by refcounting alone once its root is
+    dropped, the cyclic gc never has to find it. the children of a node
+    share one weakref object.
+    """
+    # the semantic attributes visitors fill in have their own slots.
+    __slots__ = ('_father_ref', 'scope', 'type', 'value', 'array_dimension', '__weakref__')
+    # name of the ASTVisitor handler of the node class, see ASTVisitor.dispatch_table.
+    visit_key: str = None
 
     def __init__(self, symbol: Token or str, father_node):
         self.symbol: Token or str = symbol
         self.child: List[ParseNode] = list()
-        self.father_node = father_node
+        self._father_ref = None if father_node is None else weakref.ref(father_node)
+
+    @property
+    def father_node(self):
+        """the father node, None at the root and once the father is freed"""
+        father_ref = self._father_ref
+        return None if father_ref is None else father_ref()
+
+    @father_node.setter
+    def father_node(self, father_node):
+        self._father_ref = None if father_node is None else weakref.ref(father_node)
 
     def accept(self, visitor):
         """accept method for different visitor"""
         visitor.semantic_analyze(self)
 
+    def adopt(self, node):
+        """append a node that was built before its father"""
+        node.father_node = self
+        self.child.append(node)
+
+    @classmethod
+    def fold_right(cls, operands: List, operators: List[Token], father_node):
+        """nest operands under one node per operator, a = b = c is a = (b = c)"""
+        root = node = cls(operators[0], father_node)
+        for index in range(1, len(operators)):
+            node.adopt(operands[index - 1])
+            inner = cls(operators[index], node)
+            node.child.append(inner)
+            node = inner
+        node.adopt(operands[-2])
+        node.adopt(operands[-1])
+        return root
+
+    @classmethod
+    def parse_chain(cls, token_source: TokenSource, father_node, operand_class, operator_kinds):
+        """parse operand { operator operand } of one binary level, folded to the left"""
+        operand = operand_class.parse(token_source, father_node)
+        while token_source.peek(1).kind in operator_kinds:
+            ast_node = cls(token_source.get(), father_node)
+            ast_node.adopt(operand)
+            ast_node.child.append(operand_class.parse(token_source, ast_node))
+            operand = ast_node
+        return operand
+
+    @classmethod
+    def transform_chain(cls, cst_node, father_node, operand_class):
+        """
+        transform operand { operator operand } children walking them by
+        index, a op b op c is folded to the left into (a op b) op c.
+        """
+        children: List[ParseNode] = cst_node.child
+        # the last operator is the root and every node's left child the chain before it.
+        nodes: List[AbstractSyntaxTreeNode] = [cls(children[-2].symbol, father_node)]
+        for index in range(len(children) - 4, 0, -2):
+            inner = cls(children[index].symbol, nodes[-1])
+            nodes[-1].child.append(inner)
+            nodes.append(inner)
+        nodes[-1].child.append(operand_class.transform(children[0], nodes[-1]))
+        for index, node in enumerate(reversed(nodes)):
+            node.child.append(operand_class.transform(children[2 * index + 2], node))
+        return nodes[0]
+
+    @staticmethod
+    def transform_collapsed(cst_node, father_node):
+        """transform a compact CST node handed to the transform of a wrapper it was collapsed into"""
+        return COLLAPSED_NODES[type(cst_node)].transform(cst_node, father_node)
+
+    @staticmethod
+    def suffixed(token: Token, suffix: str) -> Token:
+        """a copy of token with suffix on its value, the token itself stays as lexed"""
+        return Token(token.type, token.value + suffix, token.cursor, token.kind)
+
+    @staticmethod
+    def unsupported(token: Token, construct: str):
+        """the AST has no node for construct yet"""
+        return TransformException("at %s, %s are not support yet." % (token.cursor, construct))
+
+    @staticmethod
+    def parse_unsupported(token_source: TokenSource, construct: str, parse_routine=None):
+        """
+        unsupported for the construct ahead of token_source.
+
+        parse_routine still parses the construct into a thrown away CST
+        first, so a syntax error in it is reported like the two pass does.
+        """
+        token: Token = token_source.peek(1)
+        if parse_routine is not None:
+            parse_routine(token_source)
+        return AbstractSyntaxTreeNode.unsupported(token, construct)
+
 
 class SourceRoot(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_SOURCE_ROOT
+    visit_key = "_source_root"
 
     @classmethod
-    def transform(cls, cst_node):
+    def transform(cls, cst_node, release: bool = False):
+        """
+        the AST of the translation unit cst_node. with release every external
+        declaration is taken out of cst_node once its AST is built, so the CST
+        is freed while the AST grows and cst_node is left without children.
+        """
         ast_node = cls("source root", None)
 
-        if cst_node.symbol == "translation Unit":
+        if cst_node.kind is NodeKind.TRANSLATION_UNIT and release:
+            declarations: List[ParseNode] = cst_node.child
+            declarations.reverse()
+            while declarations:
+                ast_node.child.append(ExternalDecl.transform(declarations.pop(), ast_node))
+        elif cst_node.kind is NodeKind.TRANSLATION_UNIT:
             for node in cst_node.child:
                 ast_node.child.append(ExternalDecl.transform(node, ast_node))
         else:
@@ -41,22 +164,64 @@ class SourceRoot(AbstractSyntaxTreeNode):
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource):
+        """
+        parse token source straight into the AST, no CST is built.
+
+        every routine mirrors the grammar of its Parse* counterpart and
+        builds the node transform would build from that CST, constructs
+        transform can not handle raise TransformException.
+        """
+        ast_node = cls("source root", None)
+
+        ast_node.child.append(ExternalDecl.parse(token_source, ast_node))
+        while token_source.peek(1).kind in VARTYPE_KINDS:
+            ast_node.child.append(ExternalDecl.parse(token_source, ast_node))
+
+        return ast_node
+
 
 class ExternalDecl(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_EXTERNAL_DECL
+    visit_key = "_external_decl"
 
     @classmethod
     def transform(cls, cst_node, father_node):
         ast_node = cls("external declaration", father_node)
 
-        if cst_node.child[1].symbol == "init declarator list":
+        if len(cst_node.child) == 1:
+            raise TransformException("at %s, expect a declarator after the type spec." % (
+                cst_node.child[0].symbol.cursor))
+        if cst_node.child[1].kind is NodeKind.INIT_DECLARATOR_LIST:
             ast_node.child.append(InitDeclaratorList.transform(cst_node.child[0], cst_node.child[1], ast_node))
         else:
             ast_node.child.append(FunctionDefinition.transform(cst_node.child[0], cst_node.child[1], ast_node))
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        ast_node = cls("external declaration", father_node)
+
+        type_spec: ParseTypeSpec = ParseTypeSpec.parse(token_source)
+        if token_source.peek(1).type != TokenType.IDENTIFIER:
+            raise ParseException("at %s, '%s' is not ID, expect a declarator after the type spec." % (
+                token_source.peek(1).cursor, token_source.peek(1).value))
+        if token_source.peek(2).value == '(':
+            ast_node.child.append(FunctionDefinition.parse(type_spec, token_source, ast_node))
+        else:
+            ast_node.child.append(InitDeclaratorList.parse(type_spec, token_source, ast_node))
+            token_source.get()
+
+        return ast_node
+
 
 class InitDeclaratorList(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_INIT_DECLARATOR_LIST
+    visit_key = "_init_declarator_list"
 
     @classmethod
     def transform(cls, type_spec, cst_node, father_node):
@@ -64,13 +229,28 @@ class InitDeclaratorList(AbstractSyntaxTreeNode):
 
         ast_node.child.append(type_spec)
         for node in cst_node.child:
-            if node.symbol == "init declarator":
+            if node.kind is NodeKind.INIT_DECLARATOR:
                 ast_node.child.append(InitDeclarator.transform(node, ast_node))
 
         return ast_node
 
+    @classmethod
+    def parse(cls, type_spec, token_source: TokenSource, father_node):
+        ast_node = cls("init declarator list", father_node)
+        ast_node.child.append(type_spec)
+
+        ast_node.child.append(InitDeclarator.parse(token_source, ast_node))
+        while token_source.peek(1).value == ',':
+            token_source.get()
+            ast_node.child.append(InitDeclarator.parse(token_source, ast_node))
+
+        return ast_node
+
 
 class InitDeclarator(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_INIT_DECLARATOR
+    visit_key = "_init_declarator"
 
     @classmethod
     def transform(cls, cst_node, father_node):
@@ -82,16 +262,37 @@ class InitDeclarator(AbstractSyntaxTreeNode):
         else:
             return VarDeclarator.transform(cst_node.child[0], father_node)
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        declarator = VarDeclarator.parse(token_source, father_node)
+        if token_source.peek(1).value != '=':
+            return declarator
+
+        ast_node = cls(token_source.get(), father_node)
+        ast_node.adopt(declarator)
+        ast_node.child.append(Initializer.parse(token_source, ast_node))
+
+        return ast_node
+
 
 class Initializer(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_INITIALIZER
+    visit_key = "_initializer"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        if isinstance(cst_node.child[0].symbol, Token) and cst_node.child[0].symbol == '{':
-            return TransformException("array init are not support yet.")
+        if isinstance(cst_node.child[0].symbol, Token) and cst_node.child[0].symbol.value == '{':
+            raise cls.unsupported(cst_node.child[0].symbol, "array init")
         else:
             return AsignmentExp.transform(cst_node.child[0], father_node)
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        if token_source.peek(1).value == '{':
+            raise cls.parse_unsupported(token_source, "array init", ParseInitializer.parse)
+        return AsignmentExp.parse(token_source, father_node)
+
 
 # class InitializerList(AbstractSyntaxTreeNode):
 
@@ -101,33 +302,96 @@ class Initializer(AbstractSyntaxTreeNode):
 
 
 class VarDeclarator(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_VAR_DECLARATOR
+    visit_key = "_var_declarator"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        if len(cst_node.child) > 1:
-            ast_node = None
-            if isinstance(cst_node.child[1].symbol, Token) and cst_node.child[1].symbol.value == "[":
-                ast_node = cls("array decl", father_node)
-                cst_node.child.pop(-1)
-                ast_node.child.append(LogicalOrExp.transform(cst_node.child.pop(-1), ast_node))
-                cst_node.child.pop(-1)
-                ast_node.child.append(VarDeclarator.transform(cst_node, ast_node))
+        children: List[ParseNode] = cst_node.child
+        if len(children) == 1:
+            return cls(children[0].symbol, father_node)
+
+        if isinstance(children[1].symbol, Token) and children[1].symbol.value == "[":
+            # id '[' size ']' ... , the last bracket is the outermost array decl.
+            ast_node = node = cls("array decl", father_node)
+            for size_index in range(len(children) - 2, 0, -3):
+                if isinstance(children[size_index], ParseToken):
+                    raise cls.unsupported(children[0].symbol, "array decl without size")
+                if node.child:
+                    inner = cls("array decl", node)
+                    node.child.append(inner)
+                    node = inner
+                node.child.append(LogicalOrExp.transform(children[size_index], node))
+            node.child.append(cls(children[0].symbol, node))
+        else:
+            ast_node = cls("function decl", father_node)
+            ast_node.child.append(cls(children[0].symbol, ast_node))
+            if len(children) > 3:
+                ast_node.child.append(ParamList.transform(children[2], ast_node))
+
+        return ast_node
+
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        if token_source.peek(1).type != TokenType.IDENTIFIER:
+            raise ParseException("at %s, '%s' is not ID, expect ID." % (token_source.peek(1).cursor,
+                                                                          token_source.peek(1).value))
+        identifier: Token = token_source.get()
+
+        # (suffix, content): the size of '[' or the param list of '('.
+        suffixes: List = []
+        while token_source.peek(1).kind in DECLARATOR_SUFFIX_KINDS:
+            if token_source.get().value == '[':
+                size = None
+                if token_source.peek(1).kind in EXP_FIRST_KINDS:
+                    size = LogicalOrExp.parse(token_source, None)
+                if token_source.peek(1).value != ']':
+                    raise ParseException("at %s, expect ']'" % (token_source.peek(1).cursor))
+                token_source.get()
+                suffixes.append(('[', size))
             else:
-                ast_node = cls("function decl", father_node)
-                ast_node.child.append(cls(cst_node.child[0].symbol, ast_node))
-                if len(cst_node.child) > 3:
-                    cst_node.child.pop(0)
-                    cst_node.child.pop(0)
-                    cst_node.child.pop(-1)
-                    ast_node.child.append(ParamList.transform(cst_node.child[0], ast_node))
-            
+                params = None
+                if token_source.peek(1).kind in VARTYPE_KINDS:
+                    params = ParamList.parse(token_source, None)
+                elif token_source.peek(1).type == TokenType.IDENTIFIER:
+                    # an identifier list declares no typed param.
+                    ParseIdList.parse(token_source)
+                    params = ParamList("param list", None)
+                if token_source.peek(1).value != ')':
+                    raise ParseException("'%s' is not ')', expect ')'" % (token_source.peek(1).value))
+                token_source.get()
+                suffixes.append(('(', params))
+
+        if not suffixes:
+            return cls(identifier, father_node)
+        if suffixes[0][0] == '(':
+            ast_node = cls("function decl", father_node)
+            ast_node.child.append(cls(identifier, ast_node))
+            params = suffixes[0][1]
+            if params is not None or len(suffixes) > 1:
+                ast_node.adopt(params if params is not None else ParamList("param list", None))
             return ast_node
-                
-        else:
-            return cls(cst_node.child[0].symbol, father_node)
+        if any(suffix != '[' or size is None for suffix, size in suffixes):
+            raise cls.unsupported(identifier, "array decl without size")
+
+        # the last bracket is the outermost array decl.
+        ast_node = node = cls("array decl", father_node)
+        for index in range(len(suffixes) - 1, 0, -1):
+            node.adopt(suffixes[index][1])
+            inner = cls("array decl", node)
+            node.child.append(inner)
+            node = inner
+        node.adopt(suffixes[0][1])
+        node.child.append(cls(identifier, node))
+
+        return ast_node
 
 
 class FunctionDefinition(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_FUNCTION_DEFINITION
+    visit_key = "_function_defination"
 
     @classmethod
     def transform(cls, type_spec, cst_node, father_node):
@@ -139,21 +403,48 @@ class FunctionDefinition(AbstractSyntaxTreeNode):
 
         return ast_node
 
+    @classmethod
+    def parse(cls, type_spec, token_source: TokenSource, father_node):
+        ast_node = cls("function definition", father_node)
+
+        ast_node.child.append(type_spec)
+        ast_node.child.append(VarDeclarator.parse(token_source, ast_node))
+        ast_node.child.append(CompoundStat.parse(token_source, ast_node))
+
+        return ast_node
+
 
 class ParamList(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_PARAM_LIST
+    visit_key = "_param_list"
 
     @classmethod
     def transform(cls, cst_node, father_node):
         ast_node = cls("param list", father_node)
         
         for node in cst_node.child:
-            if node.symbol == "param decl":
+            if node.kind is NodeKind.PARAM_DECL:
                 ast_node.child.append(ParamDecl.transform(node, ast_node))
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        ast_node = cls("param list", father_node)
+
+        ast_node.child.append(ParamDecl.parse(token_source, ast_node))
+        while token_source.peek(1).value == ',':
+            token_source.get()
+            ast_node.child.append(ParamDecl.parse(token_source, ast_node))
+
+        return ast_node
+
 
 class ParamDecl(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_PARAM_DECL
+    visit_key = "_param_decl"
 
     @classmethod
     def transform(cls, cst_node, father_node):
@@ -165,23 +456,56 @@ class ParamDecl(AbstractSyntaxTreeNode):
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        ast_node = cls("param decl", father_node)
+
+        ast_node.child.append(ParseToken.parse(token_source))
+        if token_source.peek(1).type == TokenType.IDENTIFIER:
+            ast_node.child.append(VarDeclarator.parse(token_source, ast_node))
+
+        return ast_node
+
 
 class CompoundStat(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_COMPOUND_STAT
+    visit_key = "_compound_stat"
 
     @classmethod
     def transform(cls, cst_node, father_node):
         ast_node = cls("compound statement", father_node)
 
         for node in cst_node.child:
-            if node.symbol == "declaration list":
+            if node.kind is NodeKind.DECL_LIST:
                 ast_node.child.append(LocalDeclList.transform(node, ast_node))
-            elif node.symbol == "statement list":
+            elif node.kind is NodeKind.STAT_LIST:
                 ast_node.child.append(StatList.transform(node, ast_node))
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        if token_source.peek(1).value != '{':
+            raise ParseException("at %s expect '{'" % (token_source.peek(1).cursor))
+        token_source.get()
+        ast_node = cls("compound statement", father_node)
+
+        if token_source.peek(1).kind in VARTYPE_KINDS:
+            ast_node.child.append(LocalDeclList.parse(token_source, ast_node))
+        if ParseStatement.is_stat(token_source):
+            ast_node.child.append(StatList.parse(token_source, ast_node))
+        if token_source.peek(1).value != '}':
+            raise ParseException("at %s, expect '}'" % (token_source.peek(1).cursor))
+        token_source.get()
+
+        return ast_node
+
 
 class LocalDeclList(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_LOCAL_DECL_LIST
+    visit_key = "_local_decl_list"
 
     @classmethod
     def transform(cls, cst_node, father_node):
@@ -192,8 +516,31 @@ class LocalDeclList(AbstractSyntaxTreeNode):
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        ast_node = cls("declaration list", father_node)
+
+        ast_node.child.append(cls.parse_decl(token_source, ast_node))
+        while token_source.peek(1).kind in VARTYPE_KINDS:
+            ast_node.child.append(cls.parse_decl(token_source, ast_node))
+
+        return ast_node
+
+    @staticmethod
+    def parse_decl(token_source: TokenSource, father_node):
+        type_spec: ParseTypeSpec = ParseTypeSpec.parse(token_source)
+        ast_node = InitDeclaratorList.parse(type_spec, token_source, father_node)
+        if token_source.peek(1).value != ';':
+            raise ParseException("at %s, declaration must end up with ';'." % (
+                token_source.peek(1).cursor))
+        token_source.get()
+        return ast_node
+
 
 class StatList(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_STAT_LIST
+    visit_key = "_stat_list"
 
     @classmethod
     def transform(cls, cst_node, father_node):
@@ -204,329 +551,566 @@ class StatList(AbstractSyntaxTreeNode):
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        ast_node = cls("statement list", father_node)
+
+        ast_node.child.append(Statement.parse(token_source, ast_node))
+        while ParseStatement.is_stat(token_source):
+            ast_node.child.append(Statement.parse(token_source, ast_node))
+
+        return ast_node
+
 
 class Statement(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_STATEMENT
+    visit_key = "_statement"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        if cst_node.child[0].symbol == "labeled statement":
+        if type(cst_node) is not ParseStatement:
+            return cls.transform_collapsed(cst_node, father_node)
+        if cst_node.child[0].kind is NodeKind.LABELED_STAT:
             return LabeledStat.transform(cst_node.child[0], father_node)
-        elif cst_node.child[0].symbol == "expression statement":
+        elif cst_node.child[0].kind is NodeKind.EXP_STAT:
             return ExpStat.transform(cst_node.child[0], father_node)
-        elif cst_node.child[0].symbol == "compound statement":
+        elif cst_node.child[0].kind is NodeKind.COMPOUND_STAT:
             return CompoundStat.transform(cst_node.child[0], father_node)
-        elif cst_node.child[0].symbol == "selection statement":
+        elif cst_node.child[0].kind is NodeKind.SELECTION_STAT:
             return SelectionStat.transform(cst_node.child[0], father_node)
-        elif cst_node.child[0].symbol == "iteration statement":
+        elif cst_node.child[0].kind is NodeKind.ITERATION_STAT:
             return IterationStat.transform(cst_node.child[0], father_node)
-        elif cst_node.child[0].symbol == "jump statement":
+        elif cst_node.child[0].kind is NodeKind.JUMP_STAT:
             return JumpStat.transform(cst_node.child[0], father_node)
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        routine = ParseStatement.dispatch(token_source)
+        if routine is None:
+            raise ParseException("at %s, expect Statement" % (token_source.peek(1).cursor))
+        return STATEMENT_NODES[routine].parse(token_source, father_node)
+
 
 class LabeledStat(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_LABELED_STAT
+    visit_key = "_labeled_stat"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
+        raise cls.unsupported(cst_node.child[0].symbol, "labeled statement")
 
-        if isinstance(cst_node.child[0].symbol, Token) and cst_node.child[0].symbol.value == "case":
-            ast_node = cls(cst_node.child[0].symbol, father_node)
-            ast_node.child.append(Expression.transform(cst_node.child[1], ast_node))
-            ast_node.child.append(Statement.transform(cst_node.child[1], ast_node))
-        elif isinstance(cst_node.child[0].symbol, Token) and cst_node.child[0].symbol.value == "default":
-            ast_node = cls(cst_node.child[0].symbol, father_node)
-            ast_node.child.append(Statement.transform(cst_node.child[1], ast_node))
-
-        return ast_node
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        raise cls.parse_unsupported(token_source, "labeled statement", ParseLabeledStat.parse)
 
 
 class ExpStat(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_EXP_STAT
+    visit_key = "_exp_stat"
 
     @classmethod
     def transform(cls, cst_node, father_node):
         ast_node = cls("expression statement", father_node)
 
-        if cst_node.child[0].symbol == "expression":
+        if len(cst_node.child) > 1:
             ast_node.child.append(Expression.transform(cst_node.child[0], ast_node))
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        ast_node = cls("expression statement", father_node)
+
+        if token_source.peek(1).kind in EXP_FIRST_KINDS:
+            ast_node.child.append(Expression.parse(token_source, ast_node))
+        if token_source.peek(1).value != ';':
+            raise ParseException("at %s, '%s' is not ';', expect ';'" % (
+                token_source.peek(1).cursor, token_source.peek(1).value))
+        token_source.get()
+
+        return ast_node
+
 
 class SelectionStat(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_SELECTION_STAT
+    visit_key = "_selection_stat"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
-        if isinstance(cst_node.child[0].symbol, Token) and cst_node.child[0].symbol.value == "if":
-            ast_node = cls("if then else", father_node)
-            for node in cst_node.child[1:]:
-                if node.symbol == "expression":
-                    ast_node.child.append(Expression.transform(node, ast_node))
-                elif node.symbol == "statement":
-                    ast_node.child.append(Statement.transform(node, ast_node))
-                elif isinstance(node.symbol, Token) and node.symbol.value == "else":
-                    ast_node.child.append(Statement.transform(node, ast_node))
-        else:
-            ast_node = cls("switch", father_node)
-            for node in cst_node[1:]:
-                if node.symbol == "expression":
-                    ast_node.child.append(Expression.transform(node, ast_node))
-                elif node.symbol == "statement":
-                    ast_node.child.append(Statement.transform(node, ast_node))
+        if cst_node.child[0].symbol.value != "if":
+            raise cls.unsupported(cst_node.child[0].symbol, "switch statement")
+
+        # 'if' '(' exp ')' stat [ 'else' stat ]
+        children: List[ParseNode] = cst_node.child
+        ast_node = cls("if then else", father_node)
+        ast_node.child.append(Expression.transform(children[2], ast_node))
+        ast_node.child.append(Statement.transform(children[4], ast_node))
+        if len(children) > 5:
+            raise cls.unsupported(children[5].symbol, "else branch")
+
+        return ast_node
+
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        if token_source.peek(1).value == 'switch':
+            raise cls.parse_unsupported(token_source, "switch statement", ParseSelectionStat.parse)
+        token_source.get()
+        ast_node = cls("if then else", father_node)
+
+        ast_node.child.append(cls.parse_condition(token_source, ast_node))
+        ast_node.child.append(Statement.parse(token_source, ast_node))
+        if token_source.peek(1).value == 'else':
+            raise cls.parse_unsupported(token_source, "else branch", cls.parse_else)
 
         return ast_node
 
+    @staticmethod
+    def parse_else(token_source: TokenSource):
+        token_source.get()
+        ParseStatement.parse(token_source)
+
+    @staticmethod
+    def parse_condition(token_source: TokenSource, father_node):
+        """parse '(' exp ')'"""
+        if token_source.peek(1).value != '(':
+            raise ParseException("at %s, expect '('." % (token_source.peek(1).cursor))
+        token_source.get()
+        ast_node = Expression.parse(token_source, father_node)
+        if token_source.peek(1).value != ')':
+            raise ParseException("at %s, expect ')'." % (token_source.peek(1).cursor))
+        token_source.get()
+        return ast_node
+
 
 class IterationStat(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_ITERATION_STAT
+    visit_key = "_iteration_stat"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
-        if isinstance(cst_node.child[0].symbol, Token) and cst_node.child[0].symbol.value == "do":
+        children: List[ParseNode] = cst_node.child
+        if children[0].symbol.value == "do":
+            # 'do' stat 'while' '(' exp ')' ';'
             ast_node = cls("do while", father_node)
+            ast_node.child.append(Statement.transform(children[1], ast_node))
+            ast_node.child.append(Expression.transform(children[4], ast_node))
         else:
+            # 'while' '(' exp ')' stat
             ast_node = cls("while do", father_node)
-        for node in cst_node.child[1:]:
-            if node.symbol == "expression":
-                ast_node.child.append(Expression.transform(node, ast_node))
-            elif node.symbol == "statement":
-                ast_node.child.append(Statement.transform(node, ast_node))
+            ast_node.child.append(Expression.transform(children[2], ast_node))
+            ast_node.child.append(Statement.transform(children[4], ast_node))
+
+        return ast_node
+
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        if token_source.get().value == 'while':
+            ast_node = cls("while do", father_node)
+            ast_node.child.append(SelectionStat.parse_condition(token_source, ast_node))
+            ast_node.child.append(Statement.parse(token_source, ast_node))
+        else:
+            ast_node = cls("do while", father_node)
+            ast_node.child.append(Statement.parse(token_source, ast_node))
+            if token_source.peek(1).value != 'while':
+                raise ParseException("at %s, expect 'while'." % (token_source.peek(1).cursor))
+            token_source.get()
+            ast_node.child.append(SelectionStat.parse_condition(token_source, ast_node))
+            if token_source.peek(1).value != ';':
+                raise ParseException("at %s, expect ';'." % (token_source.peek(1).cursor))
+            token_source.get()
 
         return ast_node
 
 
 class JumpStat(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_JUMP_STAT
+    visit_key = "_jump_stat"
 
     # TODO: Do I need check if there are semantic error.
     @classmethod
     def transform(cls, cst_node, father_node):
         ast_node = cls(cst_node.child[0].symbol, father_node)
-        if isinstance(cst_node.child[1].symbol, str) and cst_node.child[1].symbol == "expression":
+        if len(cst_node.child) > 2:
             ast_node.child.append(Expression.transform(cst_node.child[1], ast_node))
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        ast_node = cls(token_source.get(), father_node)
+
+        if ast_node.symbol.value == 'return':
+            if token_source.peek(1).kind in EXP_FIRST_KINDS:
+                ast_node.child.append(Expression.parse(token_source, ast_node))
+            if token_source.peek(1).value != ';':
+                raise ParseException("at %s, '%s' is not ';', expect ';'" % (
+                    token_source.peek(1).cursor, token_source.peek(1).value))
+        elif token_source.peek(1).value != ';':
+            raise ParseException("at %s, expect ';'." % (token_source.peek(1).cursor))
+        token_source.get()
+
+        return ast_node
+
 
 class Expression(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_EXPRESSION
+    visit_key = "_comma_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
+        if type(cst_node) is not ParseExpression:
+            return cls.transform_collapsed(cst_node, father_node)
         if len(cst_node.child) > 1:
-            ast_node = cls(cst_node.child.pop(1).symbol, father_node)
-            ast_node.child.append(AsignmentExp.transform(cst_node.child.pop(0), ast_node))
-            ast_node.child.append(Expression.transform(cst_node, ast_node))
-        else:
-            return AsignmentExp.transform(cst_node.child[0], father_node)
+            return cls.transform_chain(cst_node, father_node, AsignmentExp)
+        return AsignmentExp.transform(cst_node.child[0], father_node)
 
-        return ast_node
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        return cls.parse_chain(token_source, father_node, AsignmentExp, COMMA_KINDS)
 
 
 class AsignmentExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_ASSIGNMENT_EXP
+    visit_key = "_assignment_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
-        if len(cst_node.child) > 1:
-            if cst_node.child[1].symbol.value == '=':
-                ast_node = cls(cst_node.child.pop(1).symbol,father_node)
-                ast_node.child.append(UnaryExp.transform(cst_node.child.pop(0), ast_node))
-                ast_node.child.append(cls.transform(cst_node, ast_node))
+        if type(cst_node) is not ParseAssignmentExp:
+            return cls.transform_collapsed(cst_node, father_node)
+        children: List[ParseNode] = cst_node.child
+        if len(children) == 1:
+            return LogicalOrExp.transform(children[0], father_node)
+
+        # unary '=' unary '=' ... logical_or, nested to the right.
+        ast_node = node = None
+        for index in range(1, len(children), 2):
+            if children[index].symbol.value != '=':
+                raise cls.unsupported(children[index].symbol, "compound assignment")
+            inner = cls(children[index].symbol, node or father_node)
+            if node is None:
+                ast_node = inner
             else:
-                ast_node = cls('=', father_node)
-                ast_node.child.append(UnaryExp.transform(cst_node.child[0], ast_node))
-                ast_node.child.append(cst_node.child.pop(1).symbol.value[0])
-                ast_node.child[1].child.append(UnaryExp.transform(cst_node.child.pop(0), ast_node))
-                ast_node.child[1].child.append(cls.transform(cst_node, ast_node))
-        else:
-            return LogicalOrExp.transform(cst_node.child[0], father_node)
+                node.child.append(inner)
+            inner.child.append(UnaryExp.transform(children[index - 1], inner))
+            node = inner
+        node.child.append(LogicalOrExp.transform(children[-1], node))
 
         return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        targets: List = []
+        operators: List[Token] = []
+        while token_source.peek(2).kind in ASSIGNMENT_OPERATOR_KINDS and \
+                token_source.peek(1).kind in EXP_FIRST_KINDS:
+            targets.append(UnaryExp.parse(token_source, None))
+            if token_source.peek(1).kind not in ASSIGNMENT_OPERATOR_KINDS:
+                raise ParseException("at %s, '%s' is not an assignment operator, expect assignment operator" % (
+                    token_source.peek(1).cursor, token_source.peek(1).value))
+            if token_source.peek(1).value != '=':
+                raise cls.parse_unsupported(token_source, "compound assignment")
+            operators.append(token_source.get())
+        if not targets:
+            return LogicalOrExp.parse(token_source, father_node)
+
+        targets.append(LogicalOrExp.parse(token_source, None))
+        return cls.fold_right(targets, operators, father_node)
+
 
 class LogicalOrExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_LOGICAL_OR_EXP
+    visit_key = "_logical_or_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
+        if type(cst_node) is not ParseLogicalOrExp:
+            return cls.transform_collapsed(cst_node, father_node)
         if len(cst_node.child) > 1:
-            ast_node = cls(cst_node.child.pop(1).symbol, father_node)
-            ast_node.child.append(LogicalAndExp.transform(cst_node.child.pop(0), ast_node))
-            ast_node.child.append(LogicalOrExp.transform(cst_node, ast_node))
-        else:
-            return LogicalAndExp.transform(cst_node.child[0], father_node)
+            return cls.transform_chain(cst_node, father_node, LogicalAndExp)
+        return LogicalAndExp.transform(cst_node.child[0], father_node)
 
-        return ast_node
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        return cls.parse_chain(token_source, father_node, LogicalAndExp, LOGICAL_OR_OPERATOR_KINDS)
 
 
 class LogicalAndExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_LOGICAL_AND_EXP
+    visit_key = "_logical_and_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
+        if type(cst_node) is not ParseLogicalAndExp:
+            return cls.transform_collapsed(cst_node, father_node)
         if len(cst_node.child) > 1:
-            ast_node = cls(cst_node.child.pop(1).symbol, father_node)
-            ast_node.child.append(EqualityExp.transform(cst_node.child.pop(0), ast_node))
-            ast_node.child.append(LogicalAndExp.transform(cst_node, ast_node))
-        else:
-            return EqualityExp.transform(cst_node.child[0], father_node)
+            return cls.transform_chain(cst_node, father_node, EqualityExp)
+        return EqualityExp.transform(cst_node.child[0], father_node)
 
-        return ast_node
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        return cls.parse_chain(token_source, father_node, EqualityExp, LOGICAL_AND_OPERATOR_KINDS)
 
 
 class EqualityExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_EQUALITY_EXP
+    visit_key = "_equality_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
+        if type(cst_node) is not ParseEqualityExp:
+            return cls.transform_collapsed(cst_node, father_node)
         if len(cst_node.child) > 1:
-            ast_node = cls(cst_node.child.pop(1).symbol, father_node)
-            ast_node.child.append(RelationalExp.transform(cst_node.child.pop(0), ast_node))
-            ast_node.child.append(EqualityExp.transform(cst_node, ast_node))
-        else:
-            return RelationalExp.transform(cst_node.child[0], father_node)
+            return cls.transform_chain(cst_node, father_node, RelationalExp)
+        return RelationalExp.transform(cst_node.child[0], father_node)
 
-        return ast_node
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        return cls.parse_chain(token_source, father_node, RelationalExp, EQUALITY_OPERATOR_KINDS)
 
 
 class RelationalExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_RELATIONAL_EXP
+    visit_key = "_relational_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
+        if type(cst_node) is not ParseRelationalExp:
+            return cls.transform_collapsed(cst_node, father_node)
         if len(cst_node.child) > 1:
-            ast_node = cls(cst_node.child.pop(1).symbol, father_node)
-            ast_node.child.append(AdditiveExp.transform(cst_node.child.pop(0), ast_node))
-            ast_node.child.append(RelationalExp.transform(cst_node, ast_node))
-        else:
-            return AdditiveExp.transform(cst_node.child[0], father_node)
+            return cls.transform_chain(cst_node, father_node, AdditiveExp)
+        return AdditiveExp.transform(cst_node.child[0], father_node)
 
-        return ast_node
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        return cls.parse_chain(token_source, father_node, AdditiveExp, RELATIONAL_OPERATOR_KINDS)
 
 
 class AdditiveExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_ADDITIVE_EXP
+    visit_key = "_additive_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
+        if type(cst_node) is not ParseAdditiveExp:
+            return cls.transform_collapsed(cst_node, father_node)
         if len(cst_node.child) > 1:
-            ast_node = cls(cst_node.child.pop(1).symbol, father_node)
-            ast_node.child.append(MultExp.transform(cst_node.child.pop(0), ast_node))
-            ast_node.child.append(AdditiveExp.transform(cst_node, ast_node))
-        else:
-            return MultExp.transform(cst_node.child[0], father_node)
+            return cls.transform_chain(cst_node, father_node, MultExp)
+        return MultExp.transform(cst_node.child[0], father_node)
 
-        return ast_node
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        return cls.parse_chain(token_source, father_node, MultExp, ADDITIVE_OPERATOR_KINDS)
 
 
 class MultExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_MULT_EXP
+    visit_key = "_mult_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
+        if type(cst_node) is not ParseMultExp:
+            return cls.transform_collapsed(cst_node, father_node)
         if len(cst_node.child) > 1:
-            ast_node = cls(cst_node.child.pop(1).symbol, father_node)
-            ast_node.child.append(CastExp.transform(cst_node.child.pop(0), ast_node))
-            ast_node.child.append(MultExp.transform(cst_node, ast_node))
-        else:
-            return CastExp.transform(cst_node.child[0], father_node)
+            return cls.transform_chain(cst_node, father_node, CastExp)
+        return CastExp.transform(cst_node.child[0], father_node)
 
-        return ast_node
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        return cls.parse_chain(token_source, father_node, CastExp, MULTIPLICATIVE_OPERATOR_KINDS)
 
 
 class CastExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_CAST_EXP
+    visit_key = "_cast_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
+        if type(cst_node) is not ParseCastExp:
+            return cls.transform_collapsed(cst_node, father_node)
         if isinstance(cst_node.child[0].symbol, Token) and cst_node.child[0].symbol.value == '(':
-            ast_node = cls(cst_node.child.pop(1).symbol, father_node)
-            cst_node.child.pop(0)
-            cst_node.child.pop(0)
-            ast_node.child.append(UnaryExp.transform(cst_node, ast_node))
-        else:
-            return UnaryExp.transform(cst_node.child[0], father_node)
+            raise cls.unsupported(cst_node.child[0].symbol, "cast expression")
+        return UnaryExp.transform(cst_node.child[0], father_node)
+
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        if token_source.peek(1).value == '(':
+            raise cls.parse_unsupported(token_source, "cast expression", ParseCastExp.parse)
+        return UnaryExp.parse(token_source, father_node)
 
 
 class UnaryExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_UNARY_EXP
+    visit_key = "_unary_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        ast_node = None
-
-        if isinstance(cst_node.child[0].symbol, Token) and cst_node.child[0].symbol.value in ('++', '--'):
-            cst_node.child[0].symbol.value += "_pre"
-            ast_node = cls(cst_node.child[0].symbol, father_node)
-            if cst_node.child[1].symbol.value in ('+', '-', '!'):
-                raise TransformException("semantic error")
-            else:
-                ast_node.child.append(PostfixExp.transform(cst_node.child[1], ast_node))
-        else:
-            if isinstance(cst_node.child[0].symbol, Token) and cst_node.child[0].symbol.value in ('+', '-', '!'):
-                ast_node = cls(cst_node.child[0].symbol, father_node)
-                ast_node.child.append(CastExp.transform(cst_node.child[0], ast_node))
-            else:
-                return PostfixExp.transform(cst_node.child[0], father_node)
+        if type(cst_node) is not ParseUnaryExp:
+            return cls.transform_collapsed(cst_node, father_node)
+        symbol = cst_node.child[0].symbol
+        if isinstance(symbol, Token) and symbol.value in ('++', '--'):
+            raise cls.unsupported(symbol, "prefix increment")
+        elif isinstance(symbol, Token) and symbol.value in ('+', '-', '!'):
+            raise cls.unsupported(symbol, "unary operator")
+        return PostfixExp.transform(cst_node.child[0], father_node)
 
-        return ast_node
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        kind: int = token_source.peek(1).kind
+        if kind in POSTFIX_FIRST_KINDS:
+            return PostfixExp.parse(token_source, father_node)
+        elif kind in INCREMENT_KINDS:
+            raise cls.parse_unsupported(token_source, "prefix increment", ParseUnaryExp.parse)
+        elif kind in UNARY_OPERATOR_KINDS:
+            raise cls.parse_unsupported(token_source, "unary operator", ParseUnaryExp.parse)
+        raise ParseException("at %s, expect ID, unary operator or const value." % (token_source.peek(1).cursor))
 
 
 class PostfixExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_POSTFIX_EXP
+    visit_key = "_postfix_exp"
 
     @classmethod
     def transform(cls, cst_node, father_node):
+        if type(cst_node) is not ParsePostfixExp:
+            return cls.transform_collapsed(cst_node, father_node)
+        children: List[ParseNode] = cst_node.child
+        if len(children) == 1:
+            return PrimaryExp.transform(children[0], father_node)
+
+        if isinstance(children[1].symbol, Token) and children[1].symbol.value in ('++', '--'):
+            ast_node = cls(cls.suffixed(children[1].symbol, "_post"), father_node)
+            ast_node.child.append(PrimaryExp.transform(children[0], ast_node))
+        elif isinstance(children[1].symbol, Token) and children[1].symbol.value == "(":
+            ast_node = cls("call", father_node)
+            ast_node.child.append(PrimaryExp.transform(children[0], ast_node))
+            if children[2].kind is NodeKind.ARGUMENT_EXP_LIST:
+                ast_node.child.append(ArgumentExpList.transform(children[2], ast_node))
+        else:
+            ast_node = cls("array deref", father_node)
+            ast_node.child.append(Expression.transform(children[2], ast_node))
+            ast_node.child.append(PrimaryExp.transform(children[0], ast_node))
 
-        if len(cst_node.child) > 1:
-            ast_node = None
-            if isinstance(cst_node.child[1].symbol, Token) and cst_node.child[1].symbol.value in ('++', '--'):
-                cst_node.child[1].symbol.value += "_post"
-                ast_node = cls(cst_node.child[1].symbol, father_node)
-                ast_node.child.append(PrimaryExp.transform(cst_node.child[0], ast_node))
-            elif isinstance(cst_node.child[1].symbol, Token) and cst_node.child[1].symbol.value == "(":
-                ast_node = cls("call", father_node)
-                ast_node.child.append(PrimaryExp.transform(cst_node.child[0], ast_node))
-                if isinstance(cst_node.child[2].symbol, str) and cst_node.child[2].symbol == "argument expression":
-                    ast_node.child.append(ArgumentExpList.transform(cst_node.child[2], ast_node))
-            else:
-                ast_node = cls("array deref", father_node)
-                cst_node.child.pop(-1)
-                ast_node.child.append(Expression.transform(cst_node.child.pop(-1), ast_node))
-                cst_node.child.pop(-1)
-                ast_node.child.append(PostfixExp.transform(cst_node, ast_node))
-            return ast_node
+        return ast_node
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        primary = PrimaryExp.parse(token_source, father_node)
+        suffix = token_source.peek(1).value
+        if suffix == '[':
+            token_source.get()
+            ast_node = cls("array deref", father_node)
+            ast_node.child.append(Expression.parse(token_source, ast_node))
+            if token_source.peek(1).value != ']':
+                raise ParseException("at %s, '%s' is not ']', expect ']'" % (
+                    token_source.peek(1).cursor, token_source.peek(1).value))
+            token_source.get()
+            ast_node.adopt(primary)
+        elif suffix == '(':
+            token_source.get()
+            ast_node = cls("call", father_node)
+            ast_node.adopt(primary)
+            if token_source.peek(1).kind in EXP_FIRST_KINDS:
+                ast_node.child.append(ArgumentExpList.parse(token_source, ast_node))
+            if token_source.peek(1).value != ')':
+                raise ParseException("at %s, '%s' is not ')', expect ')'" % (
+                    token_source.peek(1).cursor, token_source.peek(1).value))
+            token_source.get()
+        elif suffix in ('++', '--'):
+            token: Token = token_source.get()
+            ast_node = cls(cls.suffixed(token, "_post"), father_node)
+            ast_node.adopt(primary)
         else:
-            return PrimaryExp.transform(cst_node.child[0], father_node)
+            return primary
+
+        return ast_node
 
 
 class PrimaryExp(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_PRIMARY_EXP
+    visit_key = "_primary_exp"
+
+    def __init__(self, symbol: Token or str, father_node):
+        self.symbol: Token or str = symbol
+        self.child: List[ParseNode] = LEAF_CHILDREN
+        self._father_ref = None if father_node is None else weakref.ref(father_node)
 
     @classmethod
     def transform(cls, cst_node, father_node):
-        if isinstance(cst_node.symbol, str) and cst_node.symbol == "bracket expression":
+        if cst_node.child:
             return Expression.transform(cst_node.child[1], father_node)
         else:
             return cls(cst_node.symbol, father_node)
 
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        if token_source.peek(1).kind in PRIMARY_KINDS:
+            return cls(token_source.get(), father_node)
+        elif token_source.peek(1).value == '(':
+            token_source.get()
+            ast_node = Expression.parse(token_source, father_node)
+            token_source.get()
+            return ast_node
+        raise ParseException("at %s, expect id, const value, string or '('" % (token_source.peek(1).cursor))
+
+
 class ArgumentExpList(AbstractSyntaxTreeNode):
+    __slots__ = ()
+    kind = NodeKind.AST_ARGUMENT_EXP_LIST
+    visit_key = "_argument_exp_list"
 
     @classmethod
     def transform(cls, cst_node, father_node):
+        if len(cst_node.child) > 1:
+            raise cls.unsupported(cst_node.child[1].symbol, "calls with more than one argument")
         ast_node = cls("argument expression", father_node)
 
-        for node in cst_node.child:
-            if not isinstance(cst_node.symbol, Token):
-                ast_node.child.append(AsignmentExp.transform(node, ast_node))
+        ast_node.child.append(AsignmentExp.transform(cst_node.child[0], ast_node))
 
         return ast_node
+
+    @classmethod
+    def parse(cls, token_source: TokenSource, father_node):
+        ast_node = cls("argument expression", father_node)
+
+        ast_node.child.append(AsignmentExp.parse(token_source, ast_node))
+        if token_source.peek(1).value == ',':
+            raise cls.parse_unsupported(token_source, "calls with more than one argument", cls.parse_rest)
+
+        return ast_node
+
+    @staticmethod
+    def parse_rest(token_source: TokenSource):
+        token_source.get()
+        ParseArgumentExpList.parse(token_source)
+
+
+# statement parse routine picked by ParseStatement.dispatch -> the AST node parsing it directly.
+STATEMENT_NODES = {ParseLabeledStat: LabeledStat, ParseExpStat: ExpStat, ParseCompoundStat: CompoundStat,
+                   ParseSelectionStat: SelectionStat, ParseIterationStat: IterationStat, ParseJumpStat: JumpStat}
+
+# CST node class -> the AST node transforming it, for the compact CST whose
+# statement and expression nodes stand in for collapsed wrappers.
+COLLAPSED_NODES = dict(STATEMENT_NODES)
+COLLAPSED_NODES.update({ParseStatement: Statement, ParseExpression: Expression, ParseAssignmentExp: AsignmentExp,
+                        ParseLogicalOrExp: LogicalOrExp, ParseLogicalAndExp: LogicalAndExp,
+                        ParseEqualityExp: EqualityExp, ParseRelationalExp: RelationalExp,
+                        ParseAdditiveExp: AdditiveExp, ParseMultExp: MultExp, ParseCastExp: CastExp,
+                        ParseUnaryExp: UnaryExp, ParsePostfixExp: PostfixExp, ParsePrimaryExp: PrimaryExp})
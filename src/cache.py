@@ -0,0 +1,122 @@
+"""
+Content addressed on-disk cache of compiler artifacts.
+
+an entry is keyed by the sha256 of the compiler version, the entry format
+and tree format versions, the lexer engine and the source bytes, so an
+edited file, a new compiler or format, or another engine simply misses. it holds the
+artifacts produced so far by name, "tokens" for the lexer output as flat
+tuples and "ast" or "cst" for the trees in the src.serialize format, pickled
+and zlib compressed as one file. writes go through a temporary file and
+os.replace, so a reader never sees half an entry, and the directory is
+kept under max_bytes by dropping the least recently used entries.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Dict, List, Tuple
+from src import __version__
+from src import serialize
+from src.source import Cursor
+from src.token import KIND_TYPES, TOKEN_KINDS, Token
+from src.util.gc_control import paused_gc
+
+ENTRY_MAGIC = b"TLC2"
+# the artifacts an entry holds and their encoding, bump it when they change.
+FORMAT_VERSION = 2
+ENTRY_SUFFIX = ".tlc"
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+# entries are written on every miss, the fastest level still packs them about 3.5 times.
+COMPRESS_LEVEL = 1
+
+
+def encode_token(token: Token) -> Tuple:
+    return int(token.kind), token.value, token.cursor.line, token.cursor.col
+
+
+def decode_token(fields: Tuple) -> Token:
+    kind, value, line, col = fields
+    return Token(KIND_TYPES[kind], value, Cursor(line, col), TOKEN_KINDS[kind])
+
+
+def encode_tokens(tokens: List[Token]) -> List[Tuple]:
+    with paused_gc():
+        return [encode_token(token) for token in tokens]
+
+
+def decode_tokens(fields: List[Tuple]) -> List[Token]:
+    with paused_gc():
+        return [decode_token(token_fields) for token_fields in fields]
+
+
+def default_directory() -> str:
+    """$THRIVE_CACHE_DIR, else thrive-compiler in the user cache directory"""
+    return os.environ.get('THRIVE_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'thrive-compiler')
+
+
+class CompileCache(object):
+    """artifacts of compiled sources in one directory, an entry file per source."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+
+    @staticmethod
+    def key(source: bytes, engine: str) -> str:
+        """the key of source lexed with engine"""
+        header: str = "%s\0%d\0%d\0%s\0" % (__version__, FORMAT_VERSION, serialize.VERSION, engine)
+        return hashlib.sha256(header.encode() + source).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def load(self, key: str) -> Dict[str, object]:
+        """artifacts of key, empty on a miss or an unreadable entry, a hit makes the entry the most recent"""
+        path: str = self.path(key)
+        try:
+            os.utime(path)
+            with open(path, 'rb') as file_obj:
+                data: bytes = file_obj.read()
+            if not data.startswith(ENTRY_MAGIC):
+                return {}
+            return pickle.loads(zlib.decompress(data[len(ENTRY_MAGIC):]))
+        except (OSError, EOFError, ValueError, zlib.error, pickle.UnpicklingError):
+            return {}
+
+    def store(self, key: str, artifacts: Dict[str, object]):
+        """write the entry of key atomically, then evict down to max_bytes"""
+        os.makedirs(self.directory, exist_ok=True)
+        data: bytes = ENTRY_MAGIC + zlib.compress(pickle.dumps(artifacts, pickle.HIGHEST_PROTOCOL), COMPRESS_LEVEL)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, 'wb') as file_obj:
+                file_obj.write(data)
+            os.replace(temporary, self.path(key))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        self.evict()
+
+    def evict(self):
+        """remove the least recently used entries until the directory fits max_bytes"""
+        entries: List[Tuple[float, int, str]] = []
+        total: int = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # another process evicted it first.
+                pass
+            total -= size
@@ -0,0 +1,190 @@
+"""
+Compile many thrilang source files, optionally spread over a process pool.
+
+every file runs the FileSource -> Lexer -> SourceRoot.parse pipeline, or
+ParseTranslationUnit.parse for the CST, and comes back as a compact json
+string of the tree, errors are collected per file instead of aborting the
+batch. the tokens and trees are kept in a CompileCache keyed by the source
+bytes, a file compiled before skips the lexer and the parser.
+
+the cyclic gc rescans the nodes of a tree under construction many times
+over although they all stay alive. --gc pause keeps it off while the tree
+is built, --gc freeze also moves it to the permanent generation with
+gc.freeze until its json is written, so the collections meanwhile skip it.
+freeze is pause on python before 3.7 and when the process froze objects
+itself, see frozen_gc.
+
+usage: python -m src.compiler [-j JOBS] [--emit {ast,cst}] [-o OUTPUT_DIR]
+                              [--cache-dir DIR] [--cache-size MiB] [--no-cache] [--gc {on,pause,freeze}]
+                              source.tl [source.tl ...]
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import List, Sequence
+from src.ast import SourceRoot
+from src import serialize
+from src.cache import DEFAULT_MAX_BYTES, CompileCache, decode_tokens, default_directory, encode_tokens
+from src.lexer import ENGINES, Lexer
+from src.parser import ParseNode, ParseTranslationUnit
+from src.source import FileSource
+from src.token import StreamingTokenSource, TokenSource
+from src.util.gc_control import frozen_gc, paused_gc
+
+EMITS = ("ast", "cst")
+GC_MODES = ("on", "pause", "freeze")
+
+# options of the current worker process, set once by init_worker.
+_worker_options = {'emit': "ast", 'engine': "char", 'cache_dir': None, 'cache_size': DEFAULT_MAX_BYTES,
+                   'gc_mode': "on"}
+
+
+class CompileResult(object):
+    """result of compiling one file, exactly one of output and error is set."""
+    __slots__ = ('path', 'output', 'error')
+
+    def __init__(self, path: str, output: str = None, error: str = None):
+        self.path: str = path
+        self.output: str = output
+        self.error: str = error
+
+    def __repr__(self):
+        return "CompileResult(%r, %s)" % (self.path, "error=%r" % self.error if self.error else "ok")
+
+
+def parse_tree(token_source, emit: str) -> ParseNode:
+    if emit == "ast":
+        return SourceRoot.parse(token_source)
+    return ParseTranslationUnit.parse(token_source)
+
+
+def cached_tree(path: str, emit: str, engine: str, cache: CompileCache) -> ParseNode:
+    """
+    the tree of path out of cache, only the artifacts it misses are made.
+
+    the tokens are stored even when the parse fails, the next run then
+    raises the same error without lexing.
+    """
+    with open(path, 'rb') as file_obj:
+        key: str = cache.key(file_obj.read(), engine)
+    artifacts = cache.load(key)
+    if emit in artifacts:
+        return serialize.loads(artifacts[emit])
+
+    if 'tokens' in artifacts:
+        tokens = decode_tokens(artifacts['tokens'])
+    else:
+        tokens = Lexer(FileSource(path), engine=engine).match()
+        artifacts['tokens'] = encode_tokens(tokens)
+    try:
+        tree: ParseNode = parse_tree(TokenSource(tokens), emit)
+        artifacts[emit] = serialize.dumps(tree)
+    finally:
+        cache.store(key, artifacts)
+    return tree
+
+
+def compile_file(path: str, emit: str = "ast", engine: str = "char", cache_dir: str = None,
+                 cache_size: int = DEFAULT_MAX_BYTES, gc_mode: str = "on") -> str:
+    """
+    run the pipeline over one file and return the tree as compact json,
+    through the cache in cache_dir if given. gc_mode is one of GC_MODES, see
+    the module doc.
+    """
+    if emit not in EMITS:
+        raise ValueError("unknown emit '%s', expect one of %s" % (emit, ", ".join(EMITS)))
+    if gc_mode not in GC_MODES:
+        raise ValueError("unknown gc mode '%s', expect one of %s" % (gc_mode, ", ".join(GC_MODES)))
+    with ExitStack() as while_writing:
+        with paused_gc(gc_mode != "on"):
+            if cache_dir is None:
+                tree: ParseNode = parse_tree(
+                    StreamingTokenSource(Lexer(FileSource(path), engine=engine).iter_tokens()), emit)
+            else:
+                tree = cached_tree(path, emit, engine, CompileCache(cache_dir, cache_size))
+            # frozen before the gc is back on, the first collection would scan the whole new tree.
+            while_writing.enter_context(frozen_gc(gc_mode == "freeze"))
+        return ParseNode.to_json(tree, separators=(',', ':'))
+
+
+def init_worker(emit: str, engine: str, cache_dir: str = None, cache_size: int = DEFAULT_MAX_BYTES,
+                gc_mode: str = "on"):
+    """initializer of each worker process, keep the options for every later job"""
+    _worker_options['emit'] = emit
+    _worker_options['engine'] = engine
+    _worker_options['cache_dir'] = cache_dir
+    _worker_options['cache_size'] = cache_size
+    _worker_options['gc_mode'] = gc_mode
+
+
+def _compile_job(path: str) -> CompileResult:
+    """compile one file in a worker, any failure is turned into the result's error"""
+    try:
+        return CompileResult(path, output=compile_file(path, **_worker_options))
+    except Exception as exception:  # pylint: disable=broad-except
+        return CompileResult(path, error="%s: %s" % (type(exception).__name__, exception))
+
+
+def compile_many(paths: Sequence[str], jobs: int = None, emit: str = "ast", engine: str = "char",
+                 cache_dir: str = None, cache_size: int = DEFAULT_MAX_BYTES,
+                 gc_mode: str = "on") -> List[CompileResult]:
+    """
+    compile every path and return the results in the same order.
+
+    jobs is the number of worker processes, default to the cpu count, and
+    1 compiles in the current process without a pool. cache_dir None
+    compiles without the cache.
+    """
+    if emit not in EMITS:
+        raise ValueError("unknown emit '%s', expect one of %s" % (emit, ", ".join(EMITS)))
+    if gc_mode not in GC_MODES:
+        raise ValueError("unknown gc mode '%s', expect one of %s" % (gc_mode, ", ".join(GC_MODES)))
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) < 2:
+        init_worker(emit, engine, cache_dir, cache_size, gc_mode)
+        return [_compile_job(path) for path in paths]
+    # hand out files in chunks so the per task ipc cost is paid per chunk.
+    chunksize: int = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(emit, engine, cache_dir, cache_size, gc_mode)) as executor:
+        return list(executor.map(_compile_job, paths, chunksize=chunksize))
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """command line entry, return the exit status"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('paths', nargs='+', help='thrilang source files')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='worker processes, default to the cpu count')
+    parser.add_argument('--emit', choices=EMITS, default="ast", help='tree to output')
+    parser.add_argument('--engine', choices=ENGINES, default="char", help='lexing engine')
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help='write <name>.json per file here instead of to stdout')
+    parser.add_argument('--cache-dir', default=None,
+                        help='compile cache directory, default to $THRIVE_CACHE_DIR or ~/.cache/thrive-compiler')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help='MiB the cache directory is kept under')
+    parser.add_argument('--no-cache', action='store_true', help='neither read nor write the compile cache')
+    parser.add_argument('--gc', choices=GC_MODES, default="on", help='cyclic gc while a tree is built')
+    args = parser.parse_args(argv)
+
+    cache_dir: str = None if args.no_cache else args.cache_dir or default_directory()
+    results: List[CompileResult] = compile_many(args.paths, jobs=args.jobs, emit=args.emit, engine=args.engine,
+                                                cache_dir=cache_dir, cache_size=args.cache_size * 1024 ** 2,
+                                                gc_mode=args.gc)
+    for result in results:
+        if result.error:
+            print("%s: %s" % (result.path, result.error), file=sys.stderr)
+        elif args.output_dir:
+            name: str = os.path.splitext(os.path.basename(result.path))[0] + ".json"
+            with open(os.path.join(args.output_dir, name), 'w') as file_obj:
+                file_obj.write(result.output)
+        else:
+            print(result.output)
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
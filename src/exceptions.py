@@ -20,3 +20,10 @@ class TransformException(Exception):
     raise when detect an invalid node.
     """
     pass
+
+
+class SemanticException(Exception):
+    """
+    raise when detect an invalid use of a symbol.
+    """
+    pass
@@ -0,0 +1,170 @@
+"""
+Reparse a source after an edit, reusing the external declarations the edit
+did not touch.
+
+IncrementalParser keeps the token list, the CST and the AST of the last
+parse, with the token span and a hash of the tokens of every external
+declaration. reparse takes the new token list and the replaced token range
+as Lexer.relex returns them, parses from the last declaration before the
+edit until the parse lines up with an old declaration after it again, and
+splices the new subtrees into the same roots. the result tells which
+declarations changed, so later passes can skip the rest.
+
+    lexer = Lexer(StringSource(text))
+    parser = IncrementalParser()
+    parser.parse(lexer.match())
+    result = parser.reparse(*lexer.relex(parser.tokens, edit_start, edit_end, new_text))
+"""
+from typing import Dict, List, Sequence, Tuple
+from src.ast import ExternalDecl, SourceRoot
+from src.parser import VARTYPE_KINDS, ParseExternalDecl, ParseTranslationUnit, check_expression_engine
+from src.token import Token, TokenKind, TokenSource
+
+# a declaration ending with one of these never looked at the token after it.
+CLOSING_KINDS = frozenset((TokenKind.SEMICOLON, TokenKind.RIGHT_BRACE))
+
+
+class ReparseResult(object):
+    """
+    what a parse changed. changed are indices of the new declarations,
+    removed of the old ones, reused counts the declarations kept unparsed.
+    """
+    __slots__ = ('changed', 'removed', 'reused')
+
+    def __init__(self, changed: List[int], removed: List[int], reused: int):
+        self.changed: List[int] = changed
+        self.removed: List[int] = removed
+        self.reused: int = reused
+
+    def __repr__(self):
+        return "ReparseResult(changed=%r, removed=%r, reused=%d)" % (self.changed, self.removed, self.reused)
+
+
+class IncrementalParser(object):
+    """parse a token list once, then reparse it edit by edit."""
+
+    def __init__(self, expression_engine: str = "descent", compact: bool = False, build_ast: bool = True):
+        check_expression_engine(expression_engine)
+        self.expression_engine: str = expression_engine
+        self.compact: bool = compact
+        self.build_ast: bool = build_ast
+        self.tokens: List[Token] = []
+        # (start, end, digest) per external declaration, tokens[start:end] are its tokens.
+        self.spans: List[Tuple[int, int, int]] = []
+        self.cst: ParseTranslationUnit = ParseTranslationUnit('translation Unit')
+        self.ast: SourceRoot = SourceRoot("source root", None) if build_ast else None
+
+    @staticmethod
+    def digest(tokens: Sequence[Token]) -> int:
+        """hash of the kinds and values of tokens, their positions left out"""
+        return hash(tuple((token.kind, token.value) for token in tokens))
+
+    @staticmethod
+    def same_tokens(tokens: Sequence[Token], other: Sequence[Token]) -> bool:
+        """compare kinds and values, the hash only picks the candidates"""
+        return len(tokens) == len(other) and all(
+            token.kind == other_token.kind and token.value == other_token.value
+            for token, other_token in zip(tokens, other))
+
+    @staticmethod
+    def splice(old_tokens: List[Token], tokens: List[Token]) -> Tuple[List[Token], Tuple[int, int, int]]:
+        """
+        find the one range a freshly lexed token list differs from
+        old_tokens in, return old_tokens with that range replaced and
+        (first, old_stop, new_stop) like Lexer.relex.
+
+        the old tokens outside the range are kept, as the reused subtrees
+        hold them. they keep their positions here, reparse moves them to the
+        ones of the new tokens once the parse succeeded.
+        """
+        limit: int = min(len(old_tokens), len(tokens))
+        first: int = 0
+        while first < limit and old_tokens[first].kind == tokens[first].kind and \
+                old_tokens[first].value == tokens[first].value:
+            first += 1
+        common: int = 0
+        while common < limit - first and old_tokens[-1 - common].kind == tokens[-1 - common].kind and \
+                old_tokens[-1 - common].value == tokens[-1 - common].value:
+            common += 1
+        old_stop, new_stop = len(old_tokens) - common, len(tokens) - common
+        return old_tokens[:first] + tokens[first:new_stop] + old_tokens[old_stop:], (first, old_stop, new_stop)
+
+    def parse(self, tokens: List[Token]) -> ReparseResult:
+        """parse the whole token list, declarations with the same tokens as before are not reported"""
+        return self.reparse(tokens, (0, len(self.tokens), len(tokens)))
+
+    def reparse(self, tokens: List[Token], edit: Tuple[int, int, int] = None) -> ReparseResult:
+        """
+        parse tokens, where self.tokens[first:old_stop] were replaced by
+        tokens[first:new_stop] and the rest are the same token objects.
+
+        without edit the range is found by comparing the token lists. the
+        state, and then the positions of the kept old tokens, is only
+        updated when the parse succeeds, ParseException and
+        TransformException propagate as they do from a full parse. tokens
+        from Lexer.relex are the exception: relex has shifted the kept old
+        tokens in place before reparse runs, they keep the new positions
+        even when the parse fails.
+        """
+        old_tokens, old_spans = self.tokens, self.spans
+        new_tokens: List[Token] = None
+        if edit is None:
+            new_tokens = tokens
+            tokens, edit = self.splice(old_tokens, tokens)
+        first, old_stop, new_stop = edit
+        delta: int = new_stop - old_stop
+
+        # declarations wholly before the edit, one ending right at it only when closed.
+        head: int = 0
+        while head < len(old_spans) and (old_spans[head][1] < first or (
+                old_spans[head][1] == first and old_tokens[first - 1].kind in CLOSING_KINDS)):
+            head += 1
+        # the first declaration wholly after the edit, its tokens moved by delta.
+        tail: int = head
+        while tail < len(old_spans) and old_spans[tail][0] < old_stop:
+            tail += 1
+
+        token_source = TokenSource(tokens, self.expression_engine, self.compact)
+        token_source.token_pointer = old_spans[head - 1][1] if head else 0
+        nodes: List[ParseExternalDecl] = []
+        spans: List[Tuple[int, int, int]] = []
+        while True:
+            while tail < len(old_spans) and old_spans[tail][0] + delta < token_source.token_pointer:
+                tail += 1
+            if tail < len(old_spans) and old_spans[tail][0] + delta == token_source.token_pointer:
+                break
+            if (head or nodes) and token_source.peek(1).kind not in VARTYPE_KINDS:
+                tail = len(old_spans)
+                break
+            start: int = token_source.token_pointer
+            nodes.append(ParseExternalDecl.parse(token_source))
+            spans.append((start, token_source.token_pointer, self.digest(tokens[start:token_source.token_pointer])))
+        ast_nodes: List[ExternalDecl] = [ExternalDecl.transform(node, self.ast) for node in nodes] \
+            if self.build_ast else []
+
+        # a reparsed declaration with the tokens of a replaced one did not change.
+        replaced: Dict[int, List[int]] = {}
+        for index in range(head, tail):
+            replaced.setdefault(old_spans[index][2], []).append(index)
+        changed: List[int] = []
+        for offset, (start, end, digest) in enumerate(spans):
+            for index in replaced.get(digest, ()):
+                old_start, old_end = old_spans[index][:2]
+                if self.same_tokens(old_tokens[old_start:old_end], tokens[start:end]):
+                    replaced[digest].remove(index)
+                    break
+            else:
+                changed.append(head + offset)
+
+        self.cst.child[head:tail] = nodes
+        if self.build_ast:
+            self.ast.child[head:tail] = ast_nodes
+        self.spans = old_spans[:head] + spans + [(start + delta, end + delta, digest)
+                                                 for start, end, digest in old_spans[tail:]]
+        if new_tokens is not None:
+            for token, new_token in zip(tokens, new_tokens):
+                if token is not new_token:
+                    token.cursor.line, token.cursor.col = new_token.cursor.line, new_token.cursor.col
+        self.tokens = tokens
+        return ReparseResult(changed, sorted(index for indices in replaced.values() for index in indices),
+                             len(old_spans) - (tail - head))
@@ -1,9 +1,10 @@
 """
 Lexer generate tokens for parsing.
 """
-from typing import List
-from src.token import Token, TokenType
-from src.source import BaseSource
+import re
+from typing import Iterator, List, Sequence, Tuple
+from src.token import Token, TokenBuffer, TokenType
+from src.source import BaseSource, Cursor, StringSource
 from src.exceptions import InvalidTokenException
 
 
@@ -13,39 +14,75 @@ KEYWORDS = ("if", "else", "case", "while",
 VARTYPES = ("int", "float", "char", "bool")
 DELIMITERS = (",", ";", ":", "(", ")", "[", "]", "{", "}")
 OPERATORS = ("+", "-", "*", "/", "<", "=", ">", "&", "|", "!")
+ENGINES = ("char", "regex")
+
+# one named group per token type for the regex engine, keywords and bool
+# constants are matched as IDENTIFIER and classified afterwards. whitespace and
+# comments are consumed as the prefix of every match, SKIP only matches the
+# blank tail of the buffer.
+_TOKEN_PATTERN = r"""
+    (?:[ \t\r\n]+|\#[^\n]*)*
+    (?:(?P<SKIP>\Z)
+    |(?P<FLOAT_CONST>[0-9]+\.[0-9]*)
+    |(?P<INT_CONST>[0-9]+)
+    |(?P<IDENTIFIER>%s)
+    |(?P<OPERATOR>\+\+?|--?|==?|!=?|>=?|<=?|&&?|\|\|?|[*/])
+    |(?P<DELIMITER>[,;:()\[\]{}])
+    |(?P<MISMATCH>.))
+"""
+_STR_TOKEN_REGEX = re.compile(_TOKEN_PATTERN % r"[^\W\d_]\w*", re.VERBOSE)
+_BYTES_TOKEN_REGEX = re.compile((_TOKEN_PATTERN % r"[A-Za-z][A-Za-z0-9_]*").encode(), re.VERBOSE)
+# characters allowed right after a literal or a number, the char engine never
+# sees tabs or carriage returns but a raw mmap buffer may contain them.
+_LITERAL_FOLLOWERS = frozenset((" ", "\n", "\t", "\r") + DELIMITERS + OPERATORS)
+_NUMBER_FOLLOWERS = frozenset((" ", "\n", "\t", "\r") + DELIMITERS)
+_KEYWORD_SET = frozenset(KEYWORDS)
+_BYTES_SPACE_RUN = re.compile(b' +')
+
+
+def pretreated_length(gap: bytes) -> int:
+    """length of the raw bytes between two tokens once pretreatment dropped tabs, carriage returns and redundant spaces"""
+    gap = _BYTES_SPACE_RUN.sub(b' ', gap.translate(None, b'\t\r'))
+    return len(gap) - gap.count(b'\n ')
+
+
+def classify_literal(token_literal: str) -> Tuple[TokenType, str or bool]:
+    """return the token type and value of an identifier-like literal"""
+    if token_literal == 'true':
+        return TokenType.BOOL_CONST, True
+    elif token_literal == 'flase':
+        return TokenType.BOOL_CONST, False
+    else:
+        return TokenType.KEYWORD if token_literal in _KEYWORD_SET else TokenType.IDENTIFIER, token_literal
 
 
 class Lexer(object):
     """Lexical analyzer to generate token from source code."""
 
-    def __init__(self, file_source: BaseSource):
+    def __init__(self, file_source: BaseSource, engine: str = "char"):
+        if engine not in ENGINES:
+            raise ValueError("unknown lexer engine %s, expect one of %s" % (engine, ENGINES))
         self.read_buffer: List[str] = []
         self.token_list: List[Token] = []
         self.src: BaseSource = file_source
+        self.engine: str = engine
+        self.token_start: Cursor = None
 
     def create_token(self, t_type: str, token_literal: str) -> Token:
-        """create token from string"""
-        token: Token = Token(t_type, token_literal, self.src)
-        self.token_list.append(token)
-        return token
+        """create token from string, positioned at the start of the current token"""
+        return Token(t_type, token_literal, self.token_start)
 
     def match_literal(self) -> str:
         """match literal elements(identifier, keyword, true and false value)"""
         while True:
             next_char: str = self.src.next_char(True)
-            if next_char == ' ' or self.src.is_line_end(next_char) or next_char in DELIMITERS or next_char in OPERATORS:
-                token_literal: str = ''.join(self.read_buffer)
-                if token_literal == 'true':
-                    return self.create_token(TokenType.BOOL_CONST, True)
-                elif token_literal == 'flase':
-                    return self.create_token(TokenType.BOOL_CONST, False)
-                else:
-                    return self.create_token(TokenType.KEYWORD if token_literal in KEYWORDS else TokenType.IDENTIFIER, token_literal)
+            if next_char == -1:
+                raise InvalidTokenException("unexpected EOF")
+            elif next_char == ' ' or self.src.is_line_end(next_char) or next_char in DELIMITERS or next_char in OPERATORS:
+                return self.create_token(*classify_literal(''.join(self.read_buffer)))
             elif not next_char.isalpha() and not next_char.isdigit() and next_char != '_':
                 raise InvalidTokenException(
                     "illegal character %s appeared" % next_char)
-            elif next_char == -1:
-                raise InvalidTokenException("unexpected EOF")
             self.read_buffer.append(self.src.next_char())
 
     def match_character(self) -> str:
@@ -80,8 +117,10 @@ class Lexer(object):
         """match digit element"""
         while True:
             next_char: str = self.src.next_char(True)
-            if next_char == '.':
-                self.read_buffer.append(next_char)
+            if next_char == -1:
+                raise InvalidTokenException("unexpected EOF")
+            elif next_char == '.':
+                self.read_buffer.append(self.src.next_char())
                 return self.match_float()
             elif next_char == ' ' or self.src.is_line_end(next_char) or next_char in DELIMITERS:
                 token_literal: str = ''.join(self.read_buffer)
@@ -89,22 +128,20 @@ class Lexer(object):
             elif not next_char.isdigit():
                 raise InvalidTokenException(
                     "illegal character %s appeared" % next_char)
-            elif next_char == -1:
-                raise InvalidTokenException("unexpected EOF")
             self.read_buffer.append(self.src.next_char())
 
     def match_float(self) -> float:
         """match float element"""
         while True:
             next_char = self.src.next_char(True)
-            if next_char == ' ' or self.src.is_line_end(next_char) or next_char in DELIMITERS:
+            if next_char == -1:
+                raise InvalidTokenException("unexpected EOF")
+            elif next_char == ' ' or self.src.is_line_end(next_char) or next_char in DELIMITERS:
                 token_literal: str = ''.join(self.read_buffer)
                 return self.create_token(TokenType.FLOAT_CONST, token_literal)
             elif not next_char.isdigit():
                 raise InvalidTokenException(
                     "illegal character %s appeared" % next_char)
-            elif next_char == -1:
-                raise InvalidTokenException("unexpected EOF")
             self.read_buffer.append(self.src.next_char())
 
     def match_line_comment(self) -> None:
@@ -153,26 +190,167 @@ class Lexer(object):
         token_literal: str = ''.join(self.read_buffer)
         return self.create_token(TokenType.DELIMITER, token_literal)
 
-    def match(self):
-        """match engine"""
+    def iter_regex_tokens(self) -> Iterator[Token]:
+        """
+        regex engine, scan the whole buffer with one precompiled pattern.
+
+        whitespace and comments are skipped in bulk, the tokens are the same
+        the char engine produces. a raw mmap buffer still holds the blanks
+        pretreatment drops, so the width of the gap before a token is counted
+        as pretreated, the cursors are the ones of the char engine.
+        """
+        line, col = self.src.cursor.get_position()
+        buffer, position = self.src.scan_buffer()
+        is_text: bool = isinstance(buffer, str)
+        regex = _STR_TOKEN_REGEX if is_text else _BYTES_TOKEN_REGEX
+        line_end: str or bytes = '\n' if is_text else b'\n'
+        length: int = len(buffer)
+        for match in regex.finditer(buffer, position):
+            kind: str = match.lastgroup
+            if kind == 'SKIP':
+                break
+            start: int = match.start(kind)
+            gap: str or bytes = buffer[match.start():start]
+            line += gap.count(line_end)
+            # a single space or line end is kept as it is.
+            if is_text or (len(gap) < 2 and gap != b'\t' and gap != b'\r'):
+                col += len(gap)
+            else:
+                col += pretreated_length(gap)
+            self.token_start = Cursor(line, col)
+            col += match.end(kind) - start
+            token_literal: str = match.group(kind)
+            if not is_text:
+                token_literal = token_literal.decode('latin-1')
+            if kind == 'MISMATCH':
+                raise InvalidTokenException(
+                    "illegal character %s appeared" % token_literal)
+            elif kind == 'OPERATOR':
+                yield self.create_token(TokenType.OPERATOR, token_literal)
+            elif kind == 'DELIMITER':
+                yield self.create_token(TokenType.DELIMITER, token_literal)
+            else:
+                end: int = match.end()
+                if end == length:
+                    raise InvalidTokenException("unexpected EOF")
+                next_char: str = buffer[end] if is_text else chr(buffer[end])
+                if kind == 'IDENTIFIER':
+                    if next_char not in _LITERAL_FOLLOWERS:
+                        raise InvalidTokenException(
+                            "illegal character %s appeared" % next_char)
+                    yield self.create_token(*classify_literal(token_literal))
+                else:
+                    if next_char not in _NUMBER_FOLLOWERS:
+                        raise InvalidTokenException(
+                            "illegal character %s appeared" % next_char)
+                    yield self.create_token(TokenType[kind], token_literal)
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """generate tokens lazily, so lexing interleaves with whoever consumes them"""
+        if self.engine == "regex":
+            yield from self.iter_regex_tokens()
+            return
         while True:
             peek_next_char: str = self.src.next_char(True)
             if peek_next_char == -1:
                 break
+            if self.src.is_line_end(peek_next_char) or peek_next_char == ' ':
+                self.src.next_char()
+                continue
+            self.token_start = Cursor(*self.src.cursor.get_position())
+            token: Token = None
             if peek_next_char.isalpha():
-                self.match_literal()
+                token = self.match_literal()
             elif peek_next_char.isdigit():
-                self.match_digit()
+                token = self.match_digit()
             elif peek_next_char == '#':
                 self.match_line_comment()
             elif peek_next_char in OPERATORS:
-                self.match_operator()
+                token = self.match_operator()
             elif peek_next_char in DELIMITERS:
-                self.match_delimiters()
-            elif self.src.is_line_end(peek_next_char) or peek_next_char == ' ':
-                self.src.next_char()
+                token = self.match_delimiters()
             else:
-                raise InvalidTokenException
+                raise InvalidTokenException(
+                    "illegal character %s appeared" % peek_next_char)
             self.read_buffer = []
+            if token is not None:
+                yield token
 
+    def match(self):
+        """match engine"""
+        self.token_list.extend(self.iter_tokens())
         return self.token_list
+
+    def match_buffer(self) -> TokenBuffer:
+        """match engine, store the tokens in a compact TokenBuffer instead of a list"""
+        return TokenBuffer.from_tokens(self.iter_tokens())
+
+    def relex(self, old_tokens: List[Token], edit_start: int, edit_end: int,
+              new_text: str) -> Tuple[List[Token], Tuple[int, int, int]]:
+        """
+        re-lex a StringSource after text[edit_start:edit_end] is replaced by new_text.
+
+        offsets are offsets into src.text, which is also the cursor.col of
+        every token lexed from a StringSource. new_text is pretreated with the
+        blanks around the edit like StringSource does, so the tokens are the
+        ones of a fresh lex of the edited source. lexing restarts at the token
+        before the edit and stops once the new tokens line up with the old
+        stream again, the old tail is reused: its tokens are the same objects
+        as in old_tokens, their cursors are shifted in place, so old_tokens
+        holds the new positions of the tail afterwards.
+        return the spliced token list and (first, old_stop, new_stop), which
+        tells old_tokens[first:old_stop] were replaced by tokens[first:new_stop].
+        """
+        if not isinstance(self.src, StringSource):
+            raise TypeError("relex needs a StringSource, got %s" % type(self.src).__name__)
+        edit_start, edit_end, new_text = self.src.pretreat_edit(edit_start, edit_end, new_text)
+        text: str = self.src.text
+        delta: int = len(new_text) - (edit_end - edit_start)
+        line_delta: int = new_text.count('\n') - text.count('\n', edit_start, edit_end)
+
+        # the token right before the edit may grow into it, any earlier token
+        # ends before that one starts and can not be affected.
+        # only blanks and comments come before the first token, restart from 0 then.
+        first: int = self._bisect_tokens(old_tokens, edit_start) - 1
+        if first < 0:
+            first, restart = 0, Cursor(0, 0)
+        else:
+            restart = Cursor(*old_tokens[first].cursor.get_position())
+        old_stop: int = self._bisect_tokens(old_tokens, edit_end)
+
+        self.src.text = text[:edit_start] + new_text + text[edit_end:]
+        self.src.length = len(self.src.text)
+        self.src.offset = restart.col
+        self.src.cursor = restart
+        self.read_buffer = []
+        new_edit_end: int = edit_start + len(new_text)
+        new_tokens: List[Token] = []
+        for token in self.iter_tokens():
+            if token.cursor.col >= new_edit_end:
+                while old_stop < len(old_tokens) and old_tokens[old_stop].cursor.col + delta < token.cursor.col:
+                    old_stop += 1
+                if old_stop < len(old_tokens) and old_tokens[old_stop].cursor.col + delta == token.cursor.col:
+                    break
+            new_tokens.append(token)
+        else:
+            old_stop = len(old_tokens)
+
+        tail: List[Token] = old_tokens[old_stop:]
+        if delta or line_delta:
+            for token in tail:
+                token.cursor.col += delta
+                token.cursor.line += line_delta
+        self.token_list = old_tokens[:first] + new_tokens + tail
+        return self.token_list, (first, old_stop, first + len(new_tokens))
+
+    @staticmethod
+    def _bisect_tokens(tokens: Sequence[Token], offset: int) -> int:
+        """return the index of the first token starting at or after offset"""
+        low, high = 0, len(tokens)
+        while low < high:
+            middle: int = (low + high) // 2
+            if tokens[middle].cursor.col < offset:
+                low = middle + 1
+            else:
+                high = middle
+        return low
@@ -4,11 +4,119 @@ paser to generate quaternary.
 Recursive descent parsing.
 """
 import json
+from enum import IntEnum, auto
+from json.encoder import encode_basestring_ascii
 from typing import List
-from .token import Token, TokenSource, TokenType
-from .lexer import VARTYPES
+from .token import Token, TokenKind, TokenSource, TokenType
 from .exceptions import ParseException
 
+# token kind sets tested by the parse routines.
+VARTYPE_KINDS = frozenset((TokenKind.INT, TokenKind.FLOAT, TokenKind.CHAR, TokenKind.BOOL))
+PRIMARY_KINDS = frozenset((TokenKind.IDENTIFIER, TokenKind.BOOL_CONST, TokenKind.CHAR_CONST,
+                           TokenKind.INT_CONST, TokenKind.FLOAT_CONST))
+POSTFIX_FIRST_KINDS = PRIMARY_KINDS | {TokenKind.LEFT_PAREN}
+UNARY_OPERATOR_KINDS = frozenset((TokenKind.PLUS, TokenKind.MINUS, TokenKind.NOT))
+INCREMENT_KINDS = frozenset((TokenKind.INCREMENT, TokenKind.DECREMENT))
+EXP_FIRST_KINDS = POSTFIX_FIRST_KINDS | UNARY_OPERATOR_KINDS | INCREMENT_KINDS
+EXP_STAT_FIRST_KINDS = EXP_FIRST_KINDS | {TokenKind.SEMICOLON}
+LABEL_KINDS = frozenset((TokenKind.CASE, TokenKind.DEFAULT))
+SELECTION_KINDS = frozenset((TokenKind.IF, TokenKind.SWITCH))
+ITERATION_KINDS = frozenset((TokenKind.WHILE, TokenKind.DO))
+JUMP_KINDS = frozenset((TokenKind.CONTINUE, TokenKind.BREAK, TokenKind.RETURN))
+DECLARATOR_SUFFIX_KINDS = frozenset((TokenKind.LEFT_BRACKET, TokenKind.LEFT_PAREN))
+ASSIGNMENT_OPERATOR_KINDS = frozenset((TokenKind.ASSIGN, TokenKind.STAR_ASSIGN, TokenKind.SLASH_ASSIGN,
+                                       TokenKind.PLUS_ASSIGN, TokenKind.MINUS_ASSIGN))
+LOGICAL_OR_OPERATOR_KINDS = frozenset((TokenKind.LOGICAL_OR,))
+LOGICAL_AND_OPERATOR_KINDS = frozenset((TokenKind.LOGICAL_AND,))
+COMMA_KINDS = frozenset((TokenKind.COMMA,))
+EQUALITY_OPERATOR_KINDS = frozenset((TokenKind.NOT_EQUAL, TokenKind.EQUAL))
+RELATIONAL_OPERATOR_KINDS = frozenset((TokenKind.GREATER, TokenKind.LESS,
+                                       TokenKind.GREATER_EQUAL, TokenKind.LESS_EQUAL))
+ADDITIVE_OPERATOR_KINDS = frozenset((TokenKind.PLUS, TokenKind.MINUS))
+MULTIPLICATIVE_OPERATOR_KINDS = frozenset((TokenKind.STAR, TokenKind.SLASH))
+EXPRESSION_ENGINES = ("descent", "pratt")
+# characters of json text ParseNode.write_json collects before each write.
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+class NodeKind(IntEnum):
+    """small-int kind of a node, one per node class, compared instead of the symbol strings."""
+    # concrete syntax tree
+    TOKEN = 0
+    TRANSLATION_UNIT = auto()
+    EXTERNAL_DECL = auto()
+    FUNCTION_DEFINITION = auto()
+    DECL = auto()
+    DECL_LIST = auto()
+    TYPE_SPEC = auto()
+    INIT_DECLARATOR_LIST = auto()
+    INIT_DECLARATOR = auto()
+    DECLARATOR = auto()
+    PARAM_LIST = auto()
+    PARAM_DECL = auto()
+    ID_LIST = auto()
+    INITIALIZER = auto()
+    INITIALIZER_LIST = auto()
+    STATEMENT = auto()
+    LABELED_STAT = auto()
+    EXP_STAT = auto()
+    COMPOUND_STAT = auto()
+    STAT_LIST = auto()
+    SELECTION_STAT = auto()
+    ITERATION_STAT = auto()
+    JUMP_STAT = auto()
+    EXPRESSION = auto()
+    ASSIGNMENT_EXP = auto()
+    ASSIGNMENT_OPERATOR = auto()
+    LOGICAL_OR_EXP = auto()
+    LOGICAL_AND_EXP = auto()
+    EQUALITY_EXP = auto()
+    RELATIONAL_EXP = auto()
+    ADDITIVE_EXP = auto()
+    MULT_EXP = auto()
+    CAST_EXP = auto()
+    UNARY_EXP = auto()
+    UNARY_OPERATOR = auto()
+    POSTFIX_EXP = auto()
+    PRIMARY_EXP = auto()
+    ARGUMENT_EXP_LIST = auto()
+    # abstract syntax tree
+    AST_SOURCE_ROOT = auto()
+    AST_EXTERNAL_DECL = auto()
+    AST_INIT_DECLARATOR_LIST = auto()
+    AST_INIT_DECLARATOR = auto()
+    AST_INITIALIZER = auto()
+    AST_VAR_DECLARATOR = auto()
+    AST_FUNCTION_DEFINITION = auto()
+    AST_PARAM_LIST = auto()
+    AST_PARAM_DECL = auto()
+    AST_COMPOUND_STAT = auto()
+    AST_LOCAL_DECL_LIST = auto()
+    AST_STAT_LIST = auto()
+    AST_STATEMENT = auto()
+    AST_LABELED_STAT = auto()
+    AST_EXP_STAT = auto()
+    AST_SELECTION_STAT = auto()
+    AST_ITERATION_STAT = auto()
+    AST_JUMP_STAT = auto()
+    AST_EXPRESSION = auto()
+    AST_ASSIGNMENT_EXP = auto()
+    AST_LOGICAL_OR_EXP = auto()
+    AST_LOGICAL_AND_EXP = auto()
+    AST_EQUALITY_EXP = auto()
+    AST_RELATIONAL_EXP = auto()
+    AST_ADDITIVE_EXP = auto()
+    AST_MULT_EXP = auto()
+    AST_CAST_EXP = auto()
+    AST_UNARY_EXP = auto()
+    AST_POSTFIX_EXP = auto()
+    AST_PRIMARY_EXP = auto()
+    AST_ARGUMENT_EXP_LIST = auto()
+
+
+# children of every leaf that never gets any, shared instead of an empty list per leaf.
+LEAF_CHILDREN = ()
+
 # TODO: add judgement static method to each class.
 
 
@@ -16,27 +124,152 @@ class ParseNode(object):
     """
     Abstract Syntex Tree base class
     """
+    __slots__ = ('symbol', 'child')
+    kind: NodeKind = None
 
     def __init__(self, symbol: Token or str):
         self.symbol: Token or str = symbol
         self.child: List[ParseNode] = list()
 
     def __str__(self):
-        return json.dumps(ParseNode.parse_dict(self), indent=2)
+        return ParseNode.to_json(self, indent=2)
+
+    @staticmethod
+    def collapse(parse_node, token_source: TokenSource):
+        """
+        when token_source is compact a unit production node with a single
+        child gives way to that child, so a plain operand is one primary
+        node instead of a chain of about ten wrappers.
+        """
+        if token_source.compact and len(parse_node.child) == 1:
+            return parse_node.child[0]
+        return parse_node
+
+    @staticmethod
+    def symbol_value(parse_node):
+        return parse_node.symbol if isinstance(parse_node.symbol, str) else parse_node.symbol.value
 
     @staticmethod
     def parse_dict(parse_node):
         """
         parse AST to dict obj.
+
+        walks with an explicit stack, the depth of the tree is not limited
+        by the recursion limit.
+        """
+        root = {'symbol': ParseNode.symbol_value(parse_node), 'child': []}
+        stack = [(parse_node, root)]
+        while stack:
+            node, node_dict = stack.pop()
+            for child in node.child:
+                child_dict = {'symbol': ParseNode.symbol_value(child), 'child': []}
+                node_dict['child'].append(child_dict)
+                stack.append((child, child_dict))
+        return root
+
+    @staticmethod
+    def iter_json(parse_node, indent: int = None, separators=None):
+        """
+        yield the json text of parse_dict(parse_node) piece by piece.
+
+        the text is the same json.dumps(parse_dict(parse_node), indent=indent,
+        separators=separators) gives, but written with an explicit stack, so
+        it works on trees of any depth.
+        """
+        if separators is None:
+            separators = (',', ': ') if indent is not None else (', ', ': ')
+        item_separator, key_separator = separators
+        symbol_key: str = '"symbol"' + key_separator
+        child_key: str = item_separator + '%s"child"' + key_separator
+
+        def newline(level: int) -> str:
+            return '' if indent is None else '\n' + ' ' * (indent * level)
+
+        # a node with the nesting level of its dict, or text to write as is.
+        stack = [(parse_node, 0)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+            node, level = item
+            value = ParseNode.symbol_value(node)
+            yield '{%s%s%s%s' % (newline(level + 1), symbol_key,
+                                 encode_basestring_ascii(value) if isinstance(value, str) else json.dumps(value),
+                                 child_key % newline(level + 1))
+            if not node.child:
+                yield '[]%s}' % newline(level)
+                continue
+            yield '[' + newline(level + 2)
+            stack.append('%s]%s}' % (newline(level + 1), newline(level)))
+            for index in range(len(node.child) - 1, -1, -1):
+                stack.append((node.child[index], level + 2))
+                if index:
+                    stack.append(item_separator + newline(level + 2))
+
+    @staticmethod
+    def to_json(parse_node, indent: int = None, separators=None) -> str:
+        """json text of parse_dict(parse_node), see iter_json"""
+        return ''.join(ParseNode.iter_json(parse_node, indent, separators))
+
+    @staticmethod
+    def iter_ndjson(parse_node):
         """
-        return {'symbol': parse_node.symbol if isinstance(parse_node.symbol, str) else parse_node.symbol.value,
-                'child': [ParseNode.parse_dict(node) for node in parse_node.child if parse_node.child]}
+        yield one json line per node in preorder, {"id", "parent", "symbol"}
+        with id the preorder index and parent the id of the father, null
+        for the root.
+        """
+        stack = [(parse_node, 'null')]
+        node_id: int = 0
+        while stack:
+            node, parent = stack.pop()
+            value = ParseNode.symbol_value(node)
+            yield '{"id":%d,"parent":%s,"symbol":%s}\n' % (
+                node_id, parent, encode_basestring_ascii(value) if isinstance(value, str) else json.dumps(value))
+            stack.extend((child, str(node_id)) for child in reversed(node.child))
+            node_id += 1
+
+    @staticmethod
+    def write_json(parse_node, file_obj, indent: int = None, separators=None, ndjson: bool = False,
+                   chunk_size: int = JSON_CHUNK_SIZE) -> int:
+        """
+        write the json text of parse_node to file_obj, the iter_ndjson lines
+        if ndjson, in writes of about chunk_size characters. no more than a
+        chunk is held, the text of the whole tree never is. return the
+        characters written.
+        """
+        pieces = ParseNode.iter_ndjson(parse_node) if ndjson else ParseNode.iter_json(parse_node, indent, separators)
+        chunk: List[str] = []
+        size: int = 0
+        written: int = 0
+        for piece in pieces:
+            chunk.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                file_obj.write(''.join(chunk))
+                written += size
+                chunk, size = [], 0
+        file_obj.write(''.join(chunk))
+        return written + size
+
+
+def check_expression_engine(expression_engine: str):
+    """raise ValueError unless expression_engine is one of EXPRESSION_ENGINES"""
+    if expression_engine not in EXPRESSION_ENGINES:
+        raise ValueError("unknown expression engine %s, expect one of %s" % (
+            expression_engine, EXPRESSION_ENGINES))
 
 
 class ParseToken(ParseNode):
     """
     Token as the terminator.
     """
+    __slots__ = ()
+    kind = NodeKind.TOKEN
+
+    def __init__(self, symbol: Token):
+        self.symbol: Token = symbol
+        self.child: List[ParseNode] = LEAF_CHILDREN
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -58,14 +291,32 @@ class ParseTranslationUnit(ParseNode):
     parse translation unit.
     the origin symbol.
     """
+    __slots__ = ()
+    kind = NodeKind.TRANSLATION_UNIT
 
     @classmethod
-    def parse(cls, token_source: TokenSource):
-        """parse token source to recursively construct a node."""
+    def parse(cls, token_source: TokenSource, expression_engine: str = None, compact: bool = None):
+        """
+        parse token source to recursively construct a node.
+
+        the parser options are carried by the token source, every parse
+        routine reads them from the one it is handed. expression_engine and
+        compact, when given, are set on token_source first.
+        expression_engine picks the recursive descent chain or the
+        precedence climbing ParseBinaryExp for expressions, both build the
+        same tree.
+        compact leaves out the single child statement, expression, cast,
+        unary and postfix nodes, SourceRoot.transform accepts both trees.
+        """
+        if expression_engine is not None:
+            check_expression_engine(expression_engine)
+            token_source.expression_engine = expression_engine
+        if compact is not None:
+            token_source.compact = compact
         node = cls('translation Unit')
 
         node.child.append(ParseExternalDecl.parse(token_source))
-        while token_source.peek(1).value in VARTYPES:
+        while token_source.peek(1).kind in VARTYPE_KINDS:
             node.child.append(ParseExternalDecl.parse(token_source))
 
         return node
@@ -83,6 +334,8 @@ class ParseExternalDecl(ParseNode):
 
     parse external declaration.
     """
+    __slots__ = ()
+    kind = NodeKind.EXTERNAL_DECL
     @classmethod
     def parse(cls, token_source: TokenSource):
         """parse token source to recursively construct a node."""
@@ -112,6 +365,8 @@ class ParseFunctionDefinition(ParseNode):
 
     parse function definition.
     """
+    __slots__ = ()
+    kind = NodeKind.FUNCTION_DEFINITION
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -135,6 +390,8 @@ class ParseDecl(ParseNode):
 
     parse declaration.
     """
+    __slots__ = ()
+    kind = NodeKind.DECL
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -164,6 +421,8 @@ class ParseDeclList(ParseNode):
 
     parse declaration list.
     """
+    __slots__ = ()
+    kind = NodeKind.DECL_LIST
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -171,7 +430,7 @@ class ParseDeclList(ParseNode):
         node = cls("declaration list")
 
         node.child.append(ParseDecl.parse(token_source))
-        while token_source.peek(1).value in VARTYPES:
+        while token_source.peek(1).kind in VARTYPE_KINDS:
             node.child.append(ParseDecl.parse(token_source))
 
         return node
@@ -188,9 +447,11 @@ class ParseTypeSpec(ParseNode):
 
     parse type spec.
     """
+    __slots__ = ()
+    kind = NodeKind.TYPE_SPEC
     @staticmethod
     def is_type_spec(token_source):
-        return token_source.peek(1).value in VARTYPES
+        return token_source.peek(1).kind in VARTYPE_KINDS
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -215,6 +476,8 @@ class ParseInitDeclaratorList(ParseNode):
 
     parse init declarator list.
     """
+    __slots__ = ()
+    kind = NodeKind.INIT_DECLARATOR_LIST
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -223,7 +486,7 @@ class ParseInitDeclaratorList(ParseNode):
 
         node.child.append(ParseInitDeclarator.parse(token_source))
         while token_source.peek(1).value == ',':
-            node.child.append(ParseNode(token_source.get()))
+            node.child.append(ParseToken(token_source.get()))
             node.child.append(ParseInitDeclarator.parse(token_source))
 
         return node
@@ -241,6 +504,8 @@ class ParseInitDeclarator(ParseNode):
 
     parse init declarator.
     """
+    __slots__ = ()
+    kind = NodeKind.INIT_DECLARATOR
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -273,6 +538,8 @@ class ParseDeclarator(ParseNode):
 
     parse declarator.
     """
+    __slots__ = ()
+    kind = NodeKind.DECLARATOR
 
     # TODO: cat function declaration down.
     @classmethod
@@ -282,10 +549,10 @@ class ParseDeclarator(ParseNode):
 
         if token_source.peek(1).type == TokenType.IDENTIFIER:
             node.child.append(ParseToken.parse(token_source))
-            while token_source.peek(1).value in ('[', '('):
+            while token_source.peek(1).kind in DECLARATOR_SUFFIX_KINDS:
                 if token_source.peek(1).value == '[':
                     node.child.append(ParseToken.parse(token_source))
-                    if token_source.peek(1).type in (TokenType.IDENTIFIER, TokenType.BOOL_CONST, TokenType.CHAR_CONST, TokenType.INT_CONST, TokenType.FLOAT_CONST) or token_source.peek(1).value in ('(', '+', '-', '!', '++', '--'):
+                    if token_source.peek(1).kind in EXP_FIRST_KINDS:
                         node.child.append(
                             ParseLogicalOrExp.parse(token_source))
                     if token_source.peek(1).value == ']':
@@ -295,7 +562,7 @@ class ParseDeclarator(ParseNode):
                             token_source.peek(1).cursor))
                 elif token_source.peek(1).value == '(':
                     node.child.append(ParseToken.parse(token_source))
-                    if token_source.peek(1).value in VARTYPES:
+                    if token_source.peek(1).kind in VARTYPE_KINDS:
                         node.child.append(ParseParamList.parse(token_source))
                     elif token_source.peek(1).type == TokenType.IDENTIFIER:
                         node.child.append(ParseIdList.parse(token_source))
@@ -323,6 +590,8 @@ class ParseParamList(ParseNode):
 
     parse param list.
     """
+    __slots__ = ()
+    kind = NodeKind.PARAM_LIST
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -349,6 +618,8 @@ class ParseParamDecl(ParseNode):
 
     parse param decl.
     """
+    __slots__ = ()
+    kind = NodeKind.PARAM_DECL
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -374,6 +645,8 @@ class ParseIdList(ParseNode):
 
     parse Id list.
     """
+    __slots__ = ()
+    kind = NodeKind.ID_LIST
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -409,6 +682,8 @@ class ParseInitializer(ParseNode):
                             ;
     parse initializer.
     """
+    __slots__ = ()
+    kind = NodeKind.INITIALIZER
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -439,6 +714,8 @@ class ParseInitializerList(ParseNode):
                             ;
     parse initializer list.
     """
+    __slots__ = ()
+    kind = NodeKind.INITIALIZER_LIST
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -473,56 +750,56 @@ class ParseStatement(ParseNode):
                             ;
     parse statement.
     """
+    __slots__ = ()
+    kind = NodeKind.STATEMENT
+    @staticmethod
+    def dispatch(token_source):
+        """return the parse routine of the statement ahead, None if no statement starts here"""
+        token: Token = token_source.peek(1)
+        if token.kind == TokenKind.IDENTIFIER and token_source.peek(2).value == ':':
+            return ParseLabeledStat
+        return STATEMENT_DISPATCH.get(token.kind)
+
     @staticmethod
     def is_stat(token_source):
-        return ParseStatement.is_labeled_stat(token_source) or ParseStatement.is_exp_stat(token_source) or ParseStatement.is_compound_stat(token_source) or ParseStatement.is_selection_stat(token_source) or ParseStatement.is_iteration_stat(token_source) or ParseStatement.is_jump_stat(token_source)
+        return token_source.peek(1).kind in STATEMENT_DISPATCH
 
     @staticmethod
     def is_labeled_stat(token_source):
-        return token_source.peek(2).value == ':' or token_source.peek(1).value == 'case' or token_source.peek(1).value == 'default'
+        return ParseStatement.dispatch(token_source) is ParseLabeledStat
 
     @staticmethod
     def is_exp_stat(token_source):
-        return token_source.peek(1).type in (TokenType.IDENTIFIER, TokenType.BOOL_CONST, TokenType.CHAR_CONST, TokenType.INT_CONST, TokenType.FLOAT_CONST) or token_source.peek(1).value in ('(', '+', '-', '!', '++', '--', ';')
+        return ParseStatement.dispatch(token_source) is ParseExpStat
 
     @staticmethod
     def is_compound_stat(token_source):
-        return token_source.peek(1).value == '{'
+        return ParseStatement.dispatch(token_source) is ParseCompoundStat
 
     @staticmethod
     def is_selection_stat(token_source):
-        return token_source.peek(1).value in ('if', 'switch')
+        return ParseStatement.dispatch(token_source) is ParseSelectionStat
 
     @staticmethod
     def is_iteration_stat(token_source):
-        return token_source.peek(1).value in ('while', 'do')
+        return ParseStatement.dispatch(token_source) is ParseIterationStat
 
     @staticmethod
     def is_jump_stat(token_source):
-        return token_source.peek(1).value in ('continue', 'break', 'return')
+        return ParseStatement.dispatch(token_source) is ParseJumpStat
 
     @classmethod
     def parse(cls, token_source: TokenSource):
         """parse token source to recursively construct a node."""
         node = cls("statement")
 
-        if cls.is_labeled_stat(token_source):
-            node.child.append(ParseLabeledStat.parse(token_source))
-        elif cls.is_exp_stat(token_source):
-            node.child.append(ParseExpStat.parse(token_source))
-        elif cls.is_compound_stat(token_source):
-            node.child.append(ParseCompoundStat.parse(token_source))
-        elif cls.is_selection_stat(token_source):
-            node.child.append(ParseSelectionStat.parse(token_source))
-        elif cls.is_iteration_stat(token_source):
-            node.child.append(ParseIterationStat.parse(token_source))
-        elif cls.is_jump_stat(token_source):
-            node.child.append(ParseJumpStat.parse(token_source))
-        else:
+        routine = cls.dispatch(token_source)
+        if routine is None:
             raise ParseException("at %s, expect Statement" %
                                  (token_source.peek(1).cursor))
-        # NOTE: maybe using a loop would avoid these ugly selection statements?
-        return node
+        node.child.append(routine.parse(token_source))
+
+        return cls.collapse(node, token_source)
 
 
 class ParseLabeledStat(ParseNode):
@@ -539,6 +816,8 @@ class ParseLabeledStat(ParseNode):
                             ;
     parse labeled statement.
     """
+    __slots__ = ()
+    kind = NodeKind.LABELED_STAT
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -588,13 +867,15 @@ class ParseExpStat(ParseNode):
                             ;
     parse expression statement.
     """
+    __slots__ = ()
+    kind = NodeKind.EXP_STAT
 
     @classmethod
     def parse(cls, token_source: TokenSource):
         """parse token source to recursively construct a node."""
         node = cls("expression statement")
 
-        if token_source.peek(1).type in (TokenType.IDENTIFIER, TokenType.BOOL_CONST, TokenType.CHAR_CONST, TokenType.INT_CONST, TokenType.FLOAT_CONST) or token_source.peek(1).value in ('(', '+', '-', '!', '++', '--'):
+        if token_source.peek(1).kind in EXP_FIRST_KINDS:
             node.child.append(ParseExpression.parse(token_source))
         if token_source.peek(1).value == ';':
             node.child.append(ParseToken.parse(token_source))
@@ -619,6 +900,8 @@ class ParseCompoundStat(ParseNode):
                             ;
     parse compound statement.
     """
+    __slots__ = ()
+    kind = NodeKind.COMPOUND_STAT
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -627,7 +910,7 @@ class ParseCompoundStat(ParseNode):
 
         if token_source.peek(1).value == '{':
             node.child.append(ParseToken.parse(token_source))
-            if token_source.peek(1).value in VARTYPES:
+            if token_source.peek(1).kind in VARTYPE_KINDS:
                 node.child.append(ParseDeclList.parse(token_source))
             if ParseStatement.is_stat(token_source):
                 node.child.append(ParseStatList.parse(token_source))
@@ -654,6 +937,8 @@ class ParseStatList(ParseNode):
                             ;
     parse statement list.
     """
+    __slots__ = ()
+    kind = NodeKind.STAT_LIST
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -680,6 +965,8 @@ class ParseSelectionStat(ParseNode):
                             ;
     parse selection statement.
     """
+    __slots__ = ()
+    kind = NodeKind.SELECTION_STAT
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -736,6 +1023,8 @@ class ParseIterationStat(ParseNode):
                             ;
     parse iteration statement.
     """
+    __slots__ = ()
+    kind = NodeKind.ITERATION_STAT
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -802,6 +1091,8 @@ class ParseJumpStat(ParseNode):
                             ;
     parse jump statement.
     """
+    __slots__ = ()
+    kind = NodeKind.JUMP_STAT
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -824,7 +1115,7 @@ class ParseJumpStat(ParseNode):
                                      (token_source.peek(1).cursor))
         elif token_source.peek(1).value == 'return':
             node.child.append(ParseToken.parse(token_source))
-            if token_source.peek(1).type in (TokenType.IDENTIFIER, TokenType.BOOL_CONST, TokenType.CHAR_CONST, TokenType.INT_CONST, TokenType.FLOAT_CONST) or token_source.peek(1).value in ('(', '+', '-', '!', '++', '--'):
+            if token_source.peek(1).kind in EXP_FIRST_KINDS:
                 node.child.append(ParseExpression.parse(token_source))
             if token_source.peek(1).value == ';':
                 node.child.append(ParseToken.parse(token_source))
@@ -847,6 +1138,8 @@ class ParseExpression(ParseNode):
                             ;
     parse expression.
     """
+    __slots__ = ()
+    kind = NodeKind.EXPRESSION
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -858,7 +1151,7 @@ class ParseExpression(ParseNode):
             node.child.append(ParseToken.parse(token_source))
             node.child.append(ParseAssignmentExp.parse(token_source))
 
-        return node
+        return cls.collapse(node, token_source)
 
 
 class ParseAssignmentExp(ParseNode):
@@ -872,18 +1165,21 @@ class ParseAssignmentExp(ParseNode):
                             ;
     parse assignment expression.
     """
+    __slots__ = ()
+    kind = NodeKind.ASSIGNMENT_EXP
 
     @classmethod
     def parse(cls, token_source: TokenSource):
         """parse token source to recursively construct a node."""
         node = cls("assignment expression")
 
-        while (token_source.peek(1).type in (TokenType.IDENTIFIER, TokenType.BOOL_CONST, TokenType.CHAR_CONST, TokenType.INT_CONST, TokenType.FLOAT_CONST) or token_source.peek(1).value in ('(', '+', '-', '!', '++', '--')) and token_source.peek(2).value in ('=', '*=', '/=', '+=', '-='):
+        # the operator decides, most expressions are not assignments and stop at one peek.
+        while token_source.peek(2).kind in ASSIGNMENT_OPERATOR_KINDS and token_source.peek(1).kind in EXP_FIRST_KINDS:
             node.child.append(ParseUnaryExp.parse(token_source))
             node.child.append(ParseAssignmentOperator.parse(token_source))
         node.child.append(ParseLogicalOrExp.parse(token_source))
 
-        return node
+        return cls.collapse(node, token_source)
 
 
 class ParseAssignmentOperator(ParseNode):
@@ -896,11 +1192,13 @@ class ParseAssignmentOperator(ParseNode):
                             ;
     parse assignment expression.
     """
+    __slots__ = ()
+    kind = NodeKind.ASSIGNMENT_OPERATOR
 
     @staticmethod
     def is_assignment_operator(token_source):
         """check if next token is a assignment operator"""
-        return token_source.peek(1).value in ('=', '*=', '/=', '+=', '-=')
+        return token_source.peek(1).kind in ASSIGNMENT_OPERATOR_KINDS
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -924,10 +1222,14 @@ class ParseLogicalOrExp(ParseNode):
                             ;
     parse logical or expression.
     """
+    __slots__ = ()
+    kind = NodeKind.LOGICAL_OR_EXP
 
     @classmethod
     def parse(cls, token_source: TokenSource):
         """parse token source to recursively construct a node."""
+        if token_source.expression_engine == "pratt":
+            return ParseBinaryExp.parse(token_source)
         node = cls("logical or expression")
 
         node.child.append(ParseLogicalAndExp.parse(token_source))
@@ -935,7 +1237,7 @@ class ParseLogicalOrExp(ParseNode):
             node.child.append(ParseToken.parse(token_source))
             node.child.append(ParseLogicalAndExp.parse(token_source))
 
-        return node
+        return cls.collapse(node, token_source)
 
 
 class ParseLogicalAndExp(ParseNode):
@@ -949,6 +1251,8 @@ class ParseLogicalAndExp(ParseNode):
                             ;
     parse logical and expression.
     """
+    __slots__ = ()
+    kind = NodeKind.LOGICAL_AND_EXP
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -960,7 +1264,7 @@ class ParseLogicalAndExp(ParseNode):
             node.child.append(ParseToken.parse(token_source))
             node.child.append(ParseEqualityExp.parse(token_source))
 
-        return node
+        return cls.collapse(node, token_source)
 
 
 class ParseEqualityExp(ParseNode):
@@ -975,6 +1279,8 @@ class ParseEqualityExp(ParseNode):
                             ;
     parse equality expression.
     """
+    __slots__ = ()
+    kind = NodeKind.EQUALITY_EXP
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -982,11 +1288,11 @@ class ParseEqualityExp(ParseNode):
         node = cls("equality expression")
 
         node.child.append(ParseRelationalExp.parse(token_source))
-        while token_source.peek(1).value in ('!=', '=='):
+        while token_source.peek(1).kind in EQUALITY_OPERATOR_KINDS:
             node.child.append(ParseToken.parse(token_source))
             node.child.append(ParseRelationalExp.parse(token_source))
 
-        return node
+        return cls.collapse(node, token_source)
 
 
 class ParseRelationalExp(ParseNode):
@@ -1003,6 +1309,8 @@ class ParseRelationalExp(ParseNode):
                             ;
     parse relational expression.
     """
+    __slots__ = ()
+    kind = NodeKind.RELATIONAL_EXP
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -1010,11 +1318,11 @@ class ParseRelationalExp(ParseNode):
         node = cls("relational expression")
 
         node.child.append(ParseAdditiveExp.parse(token_source))
-        while token_source.peek(1).value in ('>', '<', '>=', '<='):
+        while token_source.peek(1).kind in RELATIONAL_OPERATOR_KINDS:
             node.child.append(ParseToken.parse(token_source))
             node.child.append(ParseAdditiveExp.parse(token_source))
 
-        return node
+        return cls.collapse(node, token_source)
 
 
 class ParseAdditiveExp(ParseNode):
@@ -1029,6 +1337,8 @@ class ParseAdditiveExp(ParseNode):
                             ;
     parse additive expression.
     """
+    __slots__ = ()
+    kind = NodeKind.ADDITIVE_EXP
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -1036,11 +1346,11 @@ class ParseAdditiveExp(ParseNode):
         node = cls("additive expression")
 
         node.child.append(ParseMultExp.parse(token_source))
-        while token_source.peek(1).value in ('+', '-'):
+        while token_source.peek(1).kind in ADDITIVE_OPERATOR_KINDS:
             node.child.append(ParseToken.parse(token_source))
             node.child.append(ParseMultExp.parse(token_source))
 
-        return node
+        return cls.collapse(node, token_source)
 
 
 class ParseMultExp(ParseNode):
@@ -1055,6 +1365,8 @@ class ParseMultExp(ParseNode):
                             ;
     parse multiple expression.
     """
+    __slots__ = ()
+    kind = NodeKind.MULT_EXP
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -1062,11 +1374,11 @@ class ParseMultExp(ParseNode):
         node = cls("multiple expression")
 
         node.child.append(ParseCastExp.parse(token_source))
-        while token_source.peek(1).value in ('*', '/'):
+        while token_source.peek(1).kind in MULTIPLICATIVE_OPERATOR_KINDS:
             node.child.append(ParseToken.parse(token_source))
             node.child.append(ParseCastExp.parse(token_source))
 
-        return node
+        return cls.collapse(node, token_source)
 
 
 class ParseCastExp(ParseNode):
@@ -1080,6 +1392,8 @@ class ParseCastExp(ParseNode):
                             ;
     parse cast expression.
     """
+    __slots__ = ()
+    kind = NodeKind.CAST_EXP
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -1096,7 +1410,7 @@ class ParseCastExp(ParseNode):
                                      (token_source.peek(1).cursor))
         node.child.append(ParseUnaryExp.parse(token_source))
 
-        return node
+        return cls.collapse(node, token_source)
 
 
 class ParseUnaryExp(ParseNode):
@@ -1112,6 +1426,8 @@ class ParseUnaryExp(ParseNode):
                             ;
     parse unary expression.
     """
+    __slots__ = ()
+    kind = NodeKind.UNARY_EXP
 
     # TODO: fix semantic error.
     @classmethod
@@ -1119,11 +1435,14 @@ class ParseUnaryExp(ParseNode):
         """parse token source to recursively construct a node."""
         node = cls("unary expression")
 
-        while token_source.peek(1).value in ('++', '--'):
+        kind: int = token_source.peek(1).kind
+        while kind in INCREMENT_KINDS:
             node.child.append(ParseToken.parse(token_source))
-        if token_source.peek(1).type in (TokenType.IDENTIFIER, TokenType.BOOL_CONST, TokenType.CHAR_CONST, TokenType.INT_CONST, TokenType.FLOAT_CONST) or token_source.peek(1).value == '(':
+            kind = token_source.peek(1).kind
+        if kind in POSTFIX_FIRST_KINDS:
             node.child.append(ParsePostfixExp.parse(token_source))
-        elif token_source.peek(1).value in ('+', '-', '!'):
+            return cls.collapse(node, token_source)
+        elif kind in UNARY_OPERATOR_KINDS:
             node.child.append(ParseUnaryOperator.parse(token_source))
         else:
             raise ParseException("at %s, expect ID, unary operator or const value." %
@@ -1142,11 +1461,13 @@ class ParseUnaryOperator(ParseNode):
                             ;
     parse unary operator.
     """
+    __slots__ = ()
+    kind = NodeKind.UNARY_OPERATOR
 
     @classmethod
     def parse(cls, token_source: TokenSource):
         """parse token source to recursively construct a node."""
-        if token_source.peek(1).value in ('+', '-', '!'):
+        if token_source.peek(1).kind in UNARY_OPERATOR_KINDS:
             return cls(token_source.get())
         else:
             raise ParseException("at %s, expect unary Operator." %
@@ -1171,6 +1492,8 @@ class ParsePostfixExp(ParseNode):
                             ;
     parse postfix expression.
     """
+    __slots__ = ()
+    kind = NodeKind.POSTFIX_EXP
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -1178,29 +1501,41 @@ class ParsePostfixExp(ParseNode):
         node = cls("postfix expression")
 
         node.child.append(ParsePrimaryExp.parse(token_source))
-        if token_source.peek(1).value == '[':
-            node.child.append(ParseToken.parse(token_source))
-            node.child.append(ParseExpression.parse(token_source))
-            if token_source.peek(1).value == ']':
-                node.child.append(ParseToken.parse(token_source))
-            else:
-                raise ParseException("at %s, '%s' is not ')', expect ')'" % (
-                    token_source.peek(1).cursor))
-        elif token_source.peek(1).value == '(':
-            node.child.append(ParseToken.parse(token_source))
-            if token_source.peek(1).type in (TokenType.IDENTIFIER, TokenType.BOOL_CONST, TokenType.CHAR_CONST, TokenType.INT_CONST, TokenType.FLOAT_CONST) or token_source.peek(1).value in ('+', '-', '!', '(', '++', '--'):
-                node.child.append(ParseArgumentExpList.parse(token_source))
-            if token_source.peek(1).value == ')':
-                node.child.append(ParseToken.parse(token_source))
-            else:
-                raise ParseException("at %s, '%s' is not ')', expect ')'" % (
-                    token_source.peek(1).cursor))
-        elif token_source.peek(1).value == '++':
+        suffix = POSTFIX_SUFFIX_DISPATCH.get(token_source.peek(1).kind)
+        if suffix is not None:
+            suffix(node, token_source)
+
+        return cls.collapse(node, token_source)
+
+    @staticmethod
+    def parse_index(node, token_source: TokenSource):
+        """parse the '[' exp ']' suffix into node."""
+        node.child.append(ParseToken.parse(token_source))
+        node.child.append(ParseExpression.parse(token_source))
+        if token_source.peek(1).value == ']':
             node.child.append(ParseToken.parse(token_source))
-        elif token_source.peek(1).value == '--':
+        else:
+            raise ParseException("at %s, '%s' is not ']', expect ']'" % (
+                token_source.peek(1).cursor,
+                token_source.peek(1).value))
+
+    @staticmethod
+    def parse_call(node, token_source: TokenSource):
+        """parse the '(' [ argument_exp_list ] ')' suffix into node."""
+        node.child.append(ParseToken.parse(token_source))
+        if token_source.peek(1).kind in EXP_FIRST_KINDS:
+            node.child.append(ParseArgumentExpList.parse(token_source))
+        if token_source.peek(1).value == ')':
             node.child.append(ParseToken.parse(token_source))
+        else:
+            raise ParseException("at %s, '%s' is not ')', expect ')'" % (
+                token_source.peek(1).cursor,
+                token_source.peek(1).value))
 
-        return node
+    @staticmethod
+    def parse_increment(node, token_source: TokenSource):
+        """parse the '++' or '--' suffix into node."""
+        node.child.append(ParseToken.parse(token_source))
 
 
 class ParsePrimaryExp(ParseNode):
@@ -1219,17 +1554,23 @@ class ParsePrimaryExp(ParseNode):
                             ;
     parse primary expression.
     """
+    __slots__ = ()
+    kind = NodeKind.PRIMARY_EXP
+
+    def __init__(self, symbol: Token or str):
+        self.symbol: Token or str = symbol
+        # a leaf unless it is a bracket expression, which sets its own child list.
+        self.child: List[ParseNode] = LEAF_CHILDREN
 
     @classmethod
     def parse(cls, token_source: TokenSource):
         """parse token source to recursively construct a node."""
-        if token_source.peek(1).type in (TokenType.IDENTIFIER, TokenType.BOOL_CONST, TokenType.CHAR_CONST, TokenType.INT_CONST, TokenType.FLOAT_CONST):
+        if token_source.peek(1).kind in PRIMARY_KINDS:
             return cls(token_source.get())
         elif token_source.peek(1).value == '(':
             node = cls("bracket expression")
-            node.child.append(ParseToken.parse(token_source))
-            node.child.append(ParseExpression.parse(token_source))
-            node.child.append(ParseToken.parse(token_source))
+            node.child = [ParseToken.parse(token_source), ParseExpression.parse(token_source),
+                          ParseToken.parse(token_source)]
             return node
         else:
             raise ParseException(
@@ -1247,6 +1588,8 @@ class ParseArgumentExpList(ParseNode):
                             ;
     parse argument expression.
     """
+    __slots__ = ()
+    kind = NodeKind.ARGUMENT_EXP_LIST
 
     @classmethod
     def parse(cls, token_source: TokenSource):
@@ -1260,6 +1603,124 @@ class ParseArgumentExpList(ParseNode):
 
         return node
 
+class ParseBinaryExp(object):
+    """
+    EBNF:
+    logical_or_exp          : cast_exp { binary_operator cast_exp }
+                            ;
+
+    precedence climbing over BINARY_BINDING_POWER, one loop instead of the
+    six recursive levels from logical_or_exp down to mult_exp. it still
+    builds one node per level per operand, so the tree is exactly the one
+    the descent chain builds, compact or not.
+    """
+
+    @classmethod
+    def parse(cls, token_source: TokenSource):
+        """parse token source to construct a logical or expression node."""
+        # open_nodes[level] is the node of that level taking the next operand.
+        open_nodes: List[ParseNode] = [None] * len(BINARY_LEVELS)
+        cls.parse_operand(token_source, cls.open_levels(open_nodes, 0))
+        power: int = BINARY_BINDING_POWER.get(token_source.peek(1).kind)
+        while power is not None:
+            if token_source.compact:
+                cls.close_levels(open_nodes, power)
+            open_nodes[power - 1].child.append(ParseToken.parse(token_source))
+            cls.parse_operand(token_source, cls.open_levels(open_nodes, power))
+            power = BINARY_BINDING_POWER.get(token_source.peek(1).kind)
+
+        if token_source.compact:
+            cls.close_levels(open_nodes, 1)
+        return ParseNode.collapse(open_nodes[0], token_source)
+
+    @staticmethod
+    def close_levels(open_nodes: List[ParseNode], power: int):
+        """
+        compact mode, collapse the levels from power on that are done, the
+        innermost first, into the last child of the level above.
+        """
+        for level in range(len(BINARY_LEVELS) - 1, power - 1, -1):
+            node = open_nodes[level]
+            if len(node.child) == 1:
+                open_nodes[level - 1].child[-1] = node.child[0]
+
+    @staticmethod
+    def open_levels(open_nodes: List[ParseNode], power: int) -> ParseNode:
+        """
+        open new nodes for the levels binding tighter than power under the
+        node of power, return the innermost one.
+
+        nodes are created parents first like the descent does, the garbage
+        collector walks a tree allocated children first much slower.
+        """
+        parent: ParseNode = open_nodes[power - 1] if power else None
+        for level in range(power, len(BINARY_LEVELS)):
+            level_class, symbol = BINARY_LEVELS[level]
+            node = level_class(symbol)
+            if parent is not None:
+                parent.child.append(node)
+            open_nodes[level] = node
+            parent = node
+        return parent
+
+    @staticmethod
+    def parse_operand(token_source: TokenSource, parent: ParseNode):
+        """parse a cast_exp into parent, a plain operand gets its cast, unary and postfix nodes without the descent."""
+        if token_source.peek(1).kind not in PRIMARY_KINDS:
+            parent.child.append(ParseCastExp.parse(token_source))
+            return
+        if token_source.compact:
+            if token_source.peek(2).kind not in POSTFIX_SUFFIX_DISPATCH:
+                parent.child.append(ParsePrimaryExp(token_source.get()))
+                return
+            postfix = ParsePostfixExp("postfix expression")
+            parent.child.append(postfix)
+            postfix.child.append(ParsePrimaryExp(token_source.get()))
+            POSTFIX_SUFFIX_DISPATCH[token_source.peek(1).kind](postfix, token_source)
+            return
+        cast = ParseCastExp("cast expression")
+        parent.child.append(cast)
+        unary = ParseUnaryExp("unary expression")
+        cast.child.append(unary)
+        postfix = ParsePostfixExp("postfix expression")
+        unary.child.append(postfix)
+        postfix.child.append(ParsePrimaryExp(token_source.get()))
+        suffix = POSTFIX_SUFFIX_DISPATCH.get(token_source.peek(1).kind)
+        if suffix is not None:
+            suffix(postfix, token_source)
+
+
+# dispatch tables keyed by the FIRST set of each alternative, built once the
+# parse routines exist. an identifier starts a labeled statement only when
+# followed by ':', ParseStatement.dispatch checks that before the table.
+STATEMENT_DISPATCH = {kind: routine
+                      for kinds, routine in ((EXP_STAT_FIRST_KINDS, ParseExpStat),
+                                             (LABEL_KINDS, ParseLabeledStat),
+                                             ((TokenKind.LEFT_BRACE,), ParseCompoundStat),
+                                             (SELECTION_KINDS, ParseSelectionStat),
+                                             (ITERATION_KINDS, ParseIterationStat),
+                                             (JUMP_KINDS, ParseJumpStat))
+                      for kind in kinds}
+
+POSTFIX_SUFFIX_DISPATCH = {TokenKind.LEFT_BRACKET: ParsePostfixExp.parse_index,
+                           TokenKind.LEFT_PAREN: ParsePostfixExp.parse_call,
+                           TokenKind.INCREMENT: ParsePostfixExp.parse_increment,
+                           TokenKind.DECREMENT: ParsePostfixExp.parse_increment}
+
+# binary_exp levels from the loosest to the tightest, an operator's binding
+# power is its level + 1.
+BINARY_LEVELS = ((ParseLogicalOrExp, "logical or expression"),
+                 (ParseLogicalAndExp, "logical and expression"),
+                 (ParseEqualityExp, "equality expression"),
+                 (ParseRelationalExp, "relational expression"),
+                 (ParseAdditiveExp, "additive expression"),
+                 (ParseMultExp, "multiple expression"))
+BINARY_BINDING_POWER = {kind: power
+                        for power, kinds in enumerate((LOGICAL_OR_OPERATOR_KINDS, LOGICAL_AND_OPERATOR_KINDS,
+                                                       EQUALITY_OPERATOR_KINDS, RELATIONAL_OPERATOR_KINDS,
+                                                       ADDITIVE_OPERATOR_KINDS, MULTIPLICATIVE_OPERATOR_KINDS), 1)
+                        for kind in kinds}
+
 # NOTE: I don't think I need the class below.
 # class ParseConst(ParseNode):
 #     """
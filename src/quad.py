@@ -1,197 +1,194 @@
 """
 travel AST and generate quad, contians several visitor.
 """
+from typing import Callable, Dict, List
 import src.ast as ast
-from symbol_table import SymbolTable
+from src.exceptions import SemanticException
+from src.parser import NodeKind
+from src.symbol_table import SymbolTable
 from src.token import TokenType
 
 
+# every AST node class a visitor can have a handler for.
+AST_NODE_CLASSES: List[type] = [value for value in vars(ast).values() if isinstance(value, type) and
+                                issubclass(value, ast.AbstractSyntaxTreeNode) and value.visit_key]
+
+
 class ASTVisitor(object):
-    """base abstrace class of Visitors"""
+    """
+    base abstrace class of Visitors.
+
+    a visitor handles a node class by defining the method named by its
+    visit_key, e.g. _var_declarator for VarDeclarator. a handler owns the
+    subtree of its node, it calls visit_children to go on below it. nodes
+    without a handler, including the CST nodes kept in the AST like the
+    type spec, are walked through to their children. handlers are looked
+    up by the kind of the node, so the NodeRef views of an arena dispatch
+    like node objects.
+
+    a handler calling visit_children recurses once per level of handled
+    nodes, so a walk driven by handlers is limited by the recursion limit,
+    e.g. on a long chain of binary expressions. a node class can instead
+    get a leave handler, the visit_key with "_leave" appended. its subtree
+    is then walked by traverse itself: the handler, if any, runs first and
+    must not visit the children, the leave handler runs after the last
+    node of the subtree, and no call recurses.
+    """
+    # node kind -> handler, built once per visitor class.
+    dispatch_table: Dict[NodeKind, Callable] = {}
+    # node kind -> leave handler, built once per visitor class.
+    leave_table: Dict[NodeKind, Callable] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch_table = cls.build_dispatch_table()
+        cls.leave_table = cls.build_leave_table()
+
+    @classmethod
+    def build_dispatch_table(cls) -> Dict[NodeKind, Callable]:
+        return {node_class.kind: getattr(cls, node_class.visit_key) for node_class in AST_NODE_CLASSES
+                if hasattr(cls, node_class.visit_key)}
+
+    @classmethod
+    def build_leave_table(cls) -> Dict[NodeKind, Callable]:
+        return {node_class.kind: getattr(cls, node_class.visit_key + "_leave") for node_class in AST_NODE_CLASSES
+                if hasattr(cls, node_class.visit_key + "_leave")}
+
+    def traverse(self, ast_node: ast.AbstractSyntaxTreeNode):
+        """
+        visit ast_node and, below nodes without a handler, their children
+        in preorder.
+
+        the walk keeps its own stack instead of recursing through accept, so
+        the depth of the tree is not limited by the recursion limit, only
+        handlers visiting their children recurse. the leave handler of a
+        node waits on the stack below its children as a (handler, node)
+        pair.
+        """
+        dispatch_table: Dict[NodeKind, Callable] = self.dispatch_table
+        leave_table: Dict[NodeKind, Callable] = self.leave_table
+        stack: list = [ast_node]
+        while stack:
+            node = stack.pop()
+            if node.__class__ is tuple:
+                node[0](self, node[1])
+                continue
+            handler: Callable = dispatch_table.get(node.kind)
+            leave: Callable = leave_table.get(node.kind) if leave_table else None
+            if leave is not None:
+                if handler is not None:
+                    handler(self, node)
+                stack.append((leave, node))
+                stack.extend(reversed(node.child))
+            elif handler is None:
+                stack.extend(reversed(node.child))
+            else:
+                handler(self, node)
+
+    def visit_children(self, ast_node: ast.AbstractSyntaxTreeNode):
+        """traverse every child of ast_node in order"""
+        for child in ast_node.child:
+            self.traverse(child)
 
     def semantic_analyze(self, ast_node: ast.AbstractSyntaxTreeNode):
-        """double dispatch method"""
-        if isinstance(ast_node, ast.SourceRoot):
-            self._init_declarator_list(ast_node)
-        elif isinstance(ast_node, ast.ExternalDecl):
-            self._init_declarator_list(ast_node)
-        elif isinstance(ast_node, ast.InitDeclaratorList):
-            self._init_declarator_list(ast_node)
-        elif isinstance(ast_node, ast.InitDeclarator):
-            self._init_declarator(ast_node)
-        elif isinstance(ast_node, ast.VarDeclarator):
-            self._var_declarator(ast_node)
-        elif isinstance(ast_node, ast.Initializer):
-            self._initializer(ast_node)
-        elif isinstance(ast_node, ast.FunctionDefinition):
-            self._function_defination(ast_node)
-        elif isinstance(ast_node, ast.ParamList):
-            self._param_list(ast_node)
-        elif isinstance(ast_node, ast.ParamDecl):
-            self._param_decl(ast_node)
-        elif isinstance(ast_node, ast.LocalDeclList):
-            self._local_decl_list(ast_node)
-        elif isinstance(ast_node, ast.CompoundStat):
-            self._compound_stat(ast_node)
-        elif isinstance(ast_node, ast.LabeledStat):
-            self._labeled_stat(ast_node)
-        elif isinstance(ast_node, ast.ExpStat):
-            self._exp_stat(ast_node)
-        elif isinstance(ast_node, ast.SelectionStat):
-            self._selection_stat(ast_node)
-        elif isinstance(ast_node, ast.IterationStat):
-            self._iteration_stat(ast_node)
-        elif isinstance(ast_node, ast.JumpStat):
-            self._jump_stat(ast_node)
-        elif isinstance(ast_node, ast.Expression):
-            self._comma_exp(ast_node)
-        elif isinstance(ast_node, ast.LogicalOrExp):
-            self._logical_or_exp(ast_node)
-        elif isinstance(ast_node, ast.LogicalAndExp):
-            self._logical_and_exp(ast_node)
-        elif isinstance(ast_node, ast.EqualityExp):
-            self._equality_exp(ast_node)
-        elif isinstance(ast_node, ast.RelationalExp):
-            self._relational_exp(ast_node)
-        elif isinstance(ast_node, ast.AdditiveExp):
-            self._additive_exp(ast_node)
-        elif isinstance(ast_node, ast.MultExp):
-            self._mult_exp(ast_node)
-        elif isinstance(ast_node, ast.CastExp):
-            self._cast_exp(ast_node)
-        elif isinstance(ast_node, ast.PostfixExp):
-            self._postfix_exp(ast_node)
-        elif isinstance(ast_node, ast.PrimaryExp):
-            self._primary_exp(ast_node)
+        """double dispatch method, one dict lookup for the handler of the node kind"""
+        if ast_node.kind in self.leave_table:
+            self.traverse(ast_node)
+            return
+        handler: Callable = self.dispatch_table.get(ast_node.kind)
+        if handler is None:
+            self.visit_children(ast_node)
         else:
-            pass
-
-    def _source_root(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _external_decl(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _init_declarator_list(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _init_declarator(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _var_declarator(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _initializer(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _function_defination(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _stat_list(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _param_list(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _param_decl(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _local_decl_list(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _compound_stat(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _labeled_stat(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _exp_stat(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _selection_stat(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _iteration_stat(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _jump_stat(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _comma_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _assignment_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _logical_or_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _logical_and_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _equality_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _relational_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _additive_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _mult_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _cast_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _unary_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _postfix_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
-
-    def _primary_exp(self, ast_node: ast.AbstractSyntaxTreeNode):
-        raise NotImplementedError
+            handler(self, ast_node)
 
 
 class AttrCalculateVisitor(ASTVisitor):
-    """visitor for calculate attribute"""
+    """
+    visitor for calculate attribute.
+
+    a function is declared in the enclosing scope and enters a scope that
+    starts a frame, its params and the declarations of its body are in it,
+    and every nested compound statement enters a block scope. the scope a
+    node is in is set on it, later passes look names up from there. kinds
+    are compared with ==, the kind of an arena NodeRef is a plain int.
+    """
 
     def __init__(self, symbol_table: SymbolTable):
         self.symbol_table: SymbolTable = symbol_table
 
     def _source_root(self, ast_node):
-        ast_node.scope = "global"
-        for external_decl in ast_node.child:
-            external_decl.accept(self)
+        ast_node.scope = self.symbol_table.global_scope
+        self.visit_children(ast_node)
 
     def _external_decl(self, ast_node):
-        ast_node.scope = ast_node.father_node.scope
-        ast.child[0].accept(self)
+        ast_node.scope = self.symbol_table.scope
+        self.visit_children(ast_node)
+
+    def _function_defination(self, ast_node):
+        ast_node.type = ast_node.child[0].symbol.value
+        # the name of "function decl".
+        name: str = ast_node.child[1].child[0].symbol.value
+        # declared in the enclosing scope, so calls resolve from anywhere after it.
+        self.symbol_table.create_function(name, ast_node.type)
+        ast_node.scope = self.symbol_table.enter_scope(name, frame=True)
+
+    def _function_defination_leave(self, ast_node):
+        self.symbol_table.exit_scope()
+
+    def _compound_stat(self, ast_node):
+        if ast_node.father_node.kind == NodeKind.AST_FUNCTION_DEFINITION:
+            # the body shares the scope of the function with the params.
+            ast_node.scope = self.symbol_table.scope
+        else:
+            ast_node.scope = self.symbol_table.enter_scope("block")
+
+    def _compound_stat_leave(self, ast_node):
+        if ast_node.father_node.kind != NodeKind.AST_FUNCTION_DEFINITION:
+            self.symbol_table.exit_scope()
+
+    def _param_decl(self, ast_node):
+        ast_node.type = ast_node.child[0].symbol.value
+        ast_node.scope = self.symbol_table.scope
+        self.visit_children(ast_node)
 
     def _init_declarator_list(self, ast_node):
         var_type = ast_node.child[0].symbol.value
         ast_node.type = var_type
-        ast_node.scope = ast_node.father_node.scope
-        for init_declarator in ast_node.child[1:]:
-            init_declarator.accept(self)
+        ast_node.scope = self.symbol_table.scope
+        # the type spec first, it has no handler and is walked through to its token.
+        self.visit_children(ast_node)
 
     def _init_declarator(self, ast_node):
         ast_node.type = ast_node.father_node.type
-        ast_node.scope = ast_node.father_node.scope
-        for child in ast_node.child:
-            child.accept(self)
-        ast_node.value = ast_node.child[1].value
+        ast_node.scope = self.symbol_table.scope
+        self.visit_children(ast_node)
+        initializer = ast_node.child[1]
+        # only a constant initializer has a value at compile time, any other leaves it unset.
+        if initializer.kind == NodeKind.AST_PRIMARY_EXP and initializer.symbol.type is not TokenType.IDENTIFIER:
+            ast_node.value = initializer.symbol.value
 
     def _var_declarator(self, ast_node):
         ast_node.type = ast_node.father_node.type
-        ast_node.scope = ast_node.father_node.scope
-        if ast_node.child:
-            ast_node.child[1].accept(self)
-            ast_node.array_dimension = (ast_node.child[0], ) + ast_node.child[1].array_dimension
+        ast_node.scope = self.symbol_table.scope
+        if ast_node.symbol == "function decl":
+            # the name is the one of the function scope, only the params are declared.
+            if len(ast_node.child) > 1:
+                self.traverse(ast_node.child[1])
+        elif ast_node.symbol == "array decl":
+            # the outermost array decl holds the last size.
+            size_nodes: List = []
+            node = ast_node
+            while node.symbol == "array decl":
+                size_nodes.append(node.child[0])
+                node = node.child[1]
+            for size in size_nodes:
+                if size.kind != NodeKind.AST_PRIMARY_EXP or size.symbol.type is not TokenType.INT_CONST:
+                    raise SemanticException("the size of array '%s' is not an int const" % node.symbol.value)
+            ast_node.array_dimension = tuple(int(size.symbol.value) for size in reversed(size_nodes))
+            self.symbol_table.create_item(node.symbol.value, ast_node.type, ast_node.array_dimension)
         else:
-            self.symbol_table.create_item(ast_node.symbol.value, ast_node.type, ast_node.scope)
-        # TODO: finish this.
+            self.symbol_table.create_item(ast_node.symbol.value, ast_node.type)
+
     def _initializer(self, ast_node):
         pass
 
@@ -220,6 +217,7 @@ class QuadGeneratingVisitor(ASTVisitor):
     def __init__(self, symbol_table: SymbolTable):
         self.symbol_table: SymbolTable = symbol_table
 
+    # the declarations are not walked until quads are generated for them, AttrCalculateVisitor declares the symbols.
     def _init_declarator_list(self, ast_node):
         var_type = ast_node.child[0].symbol.value
         ast_node.type = var_type
@@ -227,7 +225,3 @@ class QuadGeneratingVisitor(ASTVisitor):
     def _init_declarator(self, ast_node):
         ast_node.type = ast_node.father_node.type
 
-    def _var_declarator(self, ast_node):
-        ast_node.type = ast_node.father_node.type
-        self.symbol_table.create_item(ast_node.symbol.value)
-
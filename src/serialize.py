@@ -0,0 +1,244 @@
+"""
+Versioned binary format of CST and AST trees.
+
+a tree is written in preorder as parallel columns, the class of every node
+as an index into the class table, its child count, and its symbol, either
+an index into the interned string table or a token. tokens are columns of
+kind, value, line and col, the values interned in the same table. every
+column is a little endian array aligned to 4 bytes behind a fixed header:
+
+    magic, version, flags, node count, token count, class count, string count
+    node classes     u16 * nodes      node child counts u32 * nodes
+    node symbols     i32 * nodes      >= 0 a string, < 0 the token ~symbol
+    token kinds      u8 * tokens      token values      u32 * tokens
+    token lines      i32 * tokens     token cols        i32 * tokens
+    class names      u32 * classes    string index of every class name
+    string tags      u8 * strings     0 text, 1 bool
+    string offsets   u32 * (strings + 1) into the utf-8 bytes that follow
+
+TreeFile reads the columns straight out of a bytes object or an mmap, so a
+tool can e.g. count node classes without building a node.
+
+    data = dumps(SourceRoot.parse(token_source))
+    root = loads(data)
+"""
+import struct
+import sys
+import weakref
+from array import array
+from typing import Dict, List, Tuple
+from src import ast, parser
+from src.ast import AbstractSyntaxTreeNode
+from src.parser import ParseNode
+from src.source import Cursor
+from src.token import KIND_TYPES, TOKEN_KINDS, Token
+from src.util.gc_control import paused_gc
+
+MAGIC = b"TLTR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIII")
+# array typecodes of the columns, in file order.
+NODE_COLUMNS = ('H', 'I', 'i')
+TOKEN_COLUMNS = ('B', 'I', 'i', 'i')
+STRING_TEXT, STRING_BOOL = 0, 1
+# class name -> class of every CST and AST node a tree can hold.
+NODE_CLASSES: Dict[str, type] = {name: value for module in (parser, ast) for name, value in vars(module).items()
+                                 if isinstance(value, type) and issubclass(value, ParseNode)}
+
+_BIG_ENDIAN: bool = sys.byteorder == 'big'
+
+
+def _align(size: int) -> int:
+    return (size + 3) & ~3
+
+
+def _column_bytes(column: array) -> bytes:
+    if _BIG_ENDIAN and column.itemsize > 1:
+        column = array(column.typecode, column)
+        column.byteswap()
+    data: bytes = column.tobytes()
+    return data + b"\0" * (_align(len(data)) - len(data))
+
+
+class TreeFile(object):
+    """the columns of a serialized tree, read in place from any buffer"""
+
+    def __init__(self, buffer):
+        self.buffer: memoryview = memoryview(buffer).cast('B')
+        if len(self.buffer) < HEADER.size:
+            raise ValueError("not a serialized tree, too short")
+        magic, version, _, self.node_count, self.token_count, self.class_count, self.string_count = \
+            HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError("not a serialized tree, bad magic %r" % magic)
+        if version != VERSION:
+            raise ValueError("unsupported tree format version %d, expect %d" % (version, VERSION))
+
+        # (offset, typecode, length) of every column.
+        self.columns: List[Tuple[int, str, int]] = []
+        offset: int = HEADER.size
+        for typecode, length in [(typecode, self.node_count) for typecode in NODE_COLUMNS] + \
+                [(typecode, self.token_count) for typecode in TOKEN_COLUMNS] + \
+                [('I', self.class_count), ('B', self.string_count), ('I', self.string_count + 1)]:
+            self.columns.append((offset, typecode, length))
+            offset += _align(length * array(typecode).itemsize)
+        self.strings_offset: int = offset
+        if len(self.buffer) < offset:
+            raise ValueError("serialized tree truncated")
+
+    def column(self, index: int):
+        """column index as a memoryview of the buffer, copied into an array on big endian hosts"""
+        offset, typecode, length = self.columns[index]
+        view = self.buffer[offset:offset + length * array(typecode).itemsize].cast(typecode)
+        if _BIG_ENDIAN and view.itemsize > 1:
+            view = array(typecode, view)
+            view.byteswap()
+        return view
+
+    @property
+    def node_classes(self):
+        return self.column(0)
+
+    @property
+    def child_counts(self):
+        return self.column(1)
+
+    @property
+    def symbols(self):
+        return self.column(2)
+
+    def strings(self) -> List[str or bool]:
+        tags = self.column(8).tolist()
+        offsets = self.column(9).tolist()
+        if len(self.buffer) < self.strings_offset + offsets[-1]:
+            raise ValueError("serialized tree truncated")
+        text: str = bytes(self.buffer[self.strings_offset:self.strings_offset + offsets[-1]]).decode('utf-8')
+        if len(text) != offsets[-1]:
+            # offsets count bytes, only non-ascii text needs to be cut as bytes.
+            blob: bytes = text.encode('utf-8')
+            values = [blob[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+        else:
+            values = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+        return [value == "1" if tag == STRING_BOOL else value for tag, value in zip(tags, values)]
+
+    def class_names(self, strings: List[str or bool] = None) -> List[str]:
+        strings = self.strings() if strings is None else strings
+        return [strings[index] for index in self.column(7).tolist()]
+
+    def tokens(self, strings: List[str or bool] = None) -> List[Token]:
+        strings = self.strings() if strings is None else strings
+        with paused_gc():
+            return [Token(KIND_TYPES[kind], strings[value], Cursor(line, col), TOKEN_KINDS[kind])
+                    for kind, value, line, col in zip(*(self.column(index).tolist() for index in range(3, 7)))]
+
+
+def dumps(root: ParseNode) -> bytes:
+    """serialize the tree under root, a CST or an AST"""
+    classes: Dict[type, int] = {}
+    strings: Dict[Tuple[type, str or bool], int] = {}
+    token_ids: Dict[int, int] = {}
+    node_columns = [array(typecode) for typecode in NODE_COLUMNS]
+    token_columns = [array(typecode) for typecode in TOKEN_COLUMNS]
+    node_classes, child_counts, symbols = node_columns
+    token_kinds, token_values, token_lines, token_cols = token_columns
+
+    def intern(value: str or bool) -> int:
+        index: int = strings.get((value.__class__, value))
+        if index is None:
+            index = strings[(value.__class__, value)] = len(strings)
+        return index
+
+    stack: List[ParseNode] = [root]
+    with paused_gc():
+        while stack:
+            node = stack.pop()
+            class_index: int = classes.get(node.__class__)
+            if class_index is None:
+                class_index = classes[node.__class__] = len(classes)
+            node_classes.append(class_index)
+            child_counts.append(len(node.child))
+            symbol = node.symbol
+            if symbol.__class__ is str:
+                symbols.append(intern(symbol))
+            else:
+                token_id: int = token_ids.get(id(symbol))
+                if token_id is None:
+                    token_id = token_ids[id(symbol)] = len(token_kinds)
+                    token_kinds.append(symbol.kind)
+                    token_values.append(intern(symbol.value))
+                    token_lines.append(symbol.cursor.line)
+                    token_cols.append(symbol.cursor.col)
+                symbols.append(~token_id)
+            stack.extend(reversed(node.child))
+        class_names = array('I', [intern(node_class.__name__) for node_class in classes])
+
+        tags = array('B')
+        offsets = array('I', [0])
+        texts: List[bytes] = []
+        for value_class, value in strings:
+            if value_class is bool:
+                tags.append(STRING_BOOL)
+                value = "1" if value else "0"
+            else:
+                tags.append(STRING_TEXT)
+            texts.append(value.encode('utf-8'))
+            offsets.append(offsets[-1] + len(texts[-1]))
+
+    header: bytes = HEADER.pack(MAGIC, VERSION, 0, len(node_classes), len(token_kinds), len(class_names),
+                                len(tags))
+    return b"".join([header] + [_column_bytes(column) for column in node_columns + token_columns] +
+                    [_column_bytes(class_names), _column_bytes(tags), _column_bytes(offsets)] + texts)
+
+
+def loads(buffer) -> ParseNode:
+    """rebuild the tree of dumps from bytes or an mmap, AST nodes get their father_node back"""
+    tree_file = TreeFile(buffer)
+    strings: List[str or bool] = tree_file.strings()
+    names: List[str] = tree_file.class_names(strings)
+    unknown: List[str] = [name for name in names if name not in NODE_CLASSES]
+    if unknown:
+        raise ValueError("unknown node classes %s" % ", ".join(unknown))
+    classes: List[type] = [NODE_CLASSES[name] for name in names]
+    ast_classes: List[bool] = [issubclass(node_class, AbstractSyntaxTreeNode) for node_class in classes]
+    tokens: List[Token] = tree_file.tokens(strings)
+
+    with paused_gc():
+        symbols: List[Token or str] = [strings[symbol] if symbol >= 0 else tokens[~symbol]
+                                       for symbol in tree_file.symbols.tolist()]
+        node_classes: List[int] = tree_file.node_classes.tolist()
+        if all(ast_classes):
+            nodes: List[ParseNode] = [classes[class_index](symbol, None)
+                                      for class_index, symbol in zip(node_classes, symbols)]
+        elif not any(ast_classes):
+            nodes = [classes[class_index](symbol) for class_index, symbol in zip(node_classes, symbols)]
+        else:
+            nodes = [classes[class_index](symbol, None) if ast_classes[class_index] else classes[class_index](symbol)
+                     for class_index, symbol in zip(node_classes, symbols)]
+
+        # backwards, the children of a node are the last ones built, its first child on top.
+        stack: List[ParseNode] = []
+        for node, count in zip(reversed(nodes), reversed(tree_file.child_counts.tolist())):
+            if count:
+                node.child = stack[:-count - 1:-1]
+                del stack[-count:]
+                if isinstance(node, AbstractSyntaxTreeNode):
+                    # the children share one weakref, set past the father_node setter.
+                    father_ref = weakref.ref(node)
+                    for child in node.child:
+                        # CST nodes kept in the AST, like the type spec, have no father_node.
+                        if isinstance(child, AbstractSyntaxTreeNode):
+                            child._father_ref = father_ref
+            stack.append(node)
+    if len(stack) != 1:
+        raise ValueError("serialized tree is not one tree, %d roots" % len(stack))
+    return stack[0]
+
+
+def dump(root: ParseNode, file_obj):
+    """write dumps(root) to a binary file"""
+    file_obj.write(dumps(root))
+
+
+def load(file_obj) -> ParseNode:
+    """read a tree written by dump from a binary file"""
+    return loads(file_obj.read())
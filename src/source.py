@@ -1,12 +1,20 @@
 """
 this is a tool set for source code process.
 """
+import mmap
+import os
+from array import array
+from bisect import bisect_right
 from typing import Tuple, List, IO
 # TODO: replace all -1 with EOF
 
+_LATIN1: Tuple[str, ...] = tuple(chr(byte) for byte in range(256))
+_BLANKS: Tuple[int, ...] = (9, 13, 32)
+
 
 class Cursor(object):
     """mark token's position in the source code."""
+    __slots__ = ('line', 'col')
 
     def __init__(self, line: int, col: int):
         self.line: int = line
@@ -44,6 +52,18 @@ class BaseSource(object):
         """return next char to process"""
         raise NotImplementedError
 
+    def peek_n(self, n: int) -> str:
+        """return the next n characters without consuming them"""
+        raise NotImplementedError
+
+    def slice(self, start: int, end: int) -> str:
+        """return the source text between two offsets"""
+        raise NotImplementedError
+
+    def scan_buffer(self) -> Tuple[str or bytes, int]:
+        """hand the unread text and its start offset to a bulk scanner, the source is exhausted afterwards"""
+        raise NotImplementedError
+
 
 class FileSource(BaseSource):
     """character peeker for files."""
@@ -64,36 +84,199 @@ class FileSource(BaseSource):
             self.line_buffer = list(self.pretreatment(self.file_obj.readline()))
 
     def next_char(self, peek=False) -> str:
+        self.reload_buffer()
         if self.line_buffer:
-            self.cursor.col += 1 if not peek else 0
-            return self.line_buffer.pop(0) if not peek else self.line_buffer[0]
+            if peek:
+                return self.line_buffer[0]
+            next_char: str = self.line_buffer.pop(0)
+            self.cursor.col += 1
+            self.cursor.line += 1 if self.is_line_end(next_char) else 0
+            return next_char
         else:
-            self.reload_buffer()
-            if self.line_buffer:
-                self.cursor.line += 1 if not peek else 0
-                return self.line_buffer.pop(0) if not peek else self.line_buffer[0]
+            self.file_obj.close()
+            return -1
+
+    def scan_buffer(self) -> Tuple[str, int]:
+        text: str = ''.join(self.line_buffer) + ''.join(
+            [self.pretreatment(line) for line in self.file_obj])
+        self.line_buffer = []
+        self.file_obj.close()
+        self.cursor.col += len(text)
+        self.cursor.line += text.count('\n')
+        return text, 0
+
+
+class MmapFileSource(BaseSource):
+    """
+    character peeker for files backed by a memory map.
+
+    the file is mapped once and read through an offset, characters are the
+    latin-1 decoding of its bytes. tabs, carriage returns and redundant spaces
+    are skipped on the fly so the character stream and cursor values are the
+    same as FileSource produces, without copying the text line by line.
+    """
+
+    def __init__(self, file_name: str):
+        super(MmapFileSource, self).__init__()
+        with open(file_name, 'rb') as file_obj:
+            if os.fstat(file_obj.fileno()).st_size:
+                self.buffer = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.buffer = b''
+        self.cursor: Cursor = Cursor(0, 0)
+        self.length: int = len(self.buffer)
+        self.line_offsets: array = self.index_lines(self.buffer)
+        self.offset: int = 0
+        self._skip_redundant('\n')
+
+    @staticmethod
+    def index_lines(buffer) -> array:
+        """return the offset of each line start in one pass over buffer"""
+        line_offsets: array = array('Q', [0])
+        position: int = buffer.find(b'\n')
+        while position != -1:
+            line_offsets.append(position + 1)
+            position = buffer.find(b'\n', position + 1)
+        return line_offsets
+
+    def pretreatment(self, string: str) -> str:
+        """reduce redundant whitespace and return the str"""
+        string: str = string.replace('\t', '').replace('\r', '')
+        return ' '.join([ch for ch in string.split(' ') if ch != ''])
+
+    def _skip_redundant(self, previous: str):
+        """move offset past the bytes pretreatment would have dropped after previous"""
+        buffer = self.buffer
+        offset: int = self.offset
+        while offset < self.length:
+            byte: int = buffer[offset]
+            if byte == 9 or byte == 13:
+                offset += 1
+            elif byte == 32:
+                if previous == '\n' or previous == ' ':
+                    offset += 1
+                    continue
+                end: int = offset + 1
+                while end < self.length and buffer[end] in _BLANKS:
+                    end += 1
+                if end == self.length:
+                    offset = end
+                break
             else:
-                self.file_obj.close()
-                return -1
+                break
+        self.offset = offset
+
+    def next_char(self, peek=False) -> str:
+        offset: int = self.offset
+        if offset >= self.length:
+            return -1
+        next_char: str = _LATIN1[self.buffer[offset]]
+        if peek:
+            return next_char
+        self.offset = offset = offset + 1
+        cursor: Cursor = self.cursor
+        cursor.col += 1
+        if next_char == '\n':
+            cursor.line += 1
+        if offset < self.length and self.buffer[offset] in _BLANKS:
+            self._skip_redundant(next_char)
+        return next_char
+
+    def peek_n(self, n: int) -> str:
+        """return the next n raw characters without consuming them"""
+        return self.slice(self.offset, self.offset + n)
+
+    def slice(self, start: int, end: int) -> str:
+        """return the raw text between two byte offsets"""
+        return self.buffer[start:end].decode('latin-1')
+
+    def scan_buffer(self) -> Tuple[bytes, int]:
+        start: int = self.offset
+        self.cursor.col += self.length - start
+        self.cursor.line += len(self.line_offsets) - bisect_right(self.line_offsets, start)
+        self.offset = self.length
+        return self.buffer, start
+
+    def locate(self, offset: int) -> Tuple[int, int]:
+        """return the line and the column in that line of a byte offset"""
+        line: int = bisect_right(self.line_offsets, offset) - 1
+        return line, offset - self.line_offsets[line]
+
+    def close(self):
+        """release the memory map"""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
 
 
 class StringSource(BaseSource):
-    """character peeker for files."""
+    """
+    character peeker for strings.
+
+    the normalized text is kept as one str and consumed by moving an offset
+    forward, so reading a whole program is linear in its length.
+    """
 
     def __init__(self, string_source: str):
         super(StringSource, self).__init__()
         self.cursor: Cursor = Cursor(0, 0)
-        self.buffer: List[str] = list(self.pretreatment(string_source))
+        self.text: str = self.pretreatment(string_source)
+        self.offset: int = 0
+        self.length: int = len(self.text)
 
     def pretreatment(self, string: str) -> str:
         """reduce redundant whitespace and return the str"""
         string: str = string.replace('\t', '').replace('\r', '')
         return ' '.join([ch for ch in string.split(' ') if ch != ''])
 
+    def pretreat_edit(self, start: int, end: int, new_text: str) -> Tuple[int, int, str]:
+        """
+        pretreatment of text[start:end] replaced by new_text, done on the
+        edited region only. the region is widened over the blanks next to
+        it, so a run of blanks across its bounds is collapsed as a whole.
+        return the widened (start, end) and the text replacing
+        text[start:end], the edited text is then the one pretreatment gives
+        for the whole edited source.
+        """
+        region_start, region_end = start, end
+        while region_start > 0 and self.text[region_start - 1] == ' ':
+            region_start -= 1
+        while region_end < self.length and self.text[region_end] == ' ':
+            region_end += 1
+        region: str = self.text[region_start:start] + new_text.replace('\t', '').replace('\r', '') + \
+            self.text[end:region_end]
+        pretreated: str = ' '.join([ch for ch in region.split(' ') if ch != ''])
+        # a blank between the region and the text around it stays, one at the start or end of source does not.
+        leading: bool = region_start > 0 and region.startswith(' ')
+        trailing: bool = region_end < self.length and region.endswith(' ')
+        if not pretreated:
+            pretreated = ' ' if leading and trailing else ''
+        else:
+            pretreated = (' ' if leading else '') + pretreated + (' ' if trailing else '')
+        return region_start, region_end, pretreated
+
     def next_char(self, peek=False):
-        if self.buffer:
-            self.cursor.col += 1 if not peek else 0
-            self.cursor.line += 1 if not peek and self.buffer[0] == '\n' else 0
-            return self.buffer.pop(0) if not peek else self.buffer[0]
+        if self.offset < self.length:
+            next_char: str = self.text[self.offset]
+            if not peek:
+                self.offset += 1
+                self.cursor.col += 1
+                if next_char == '\n':
+                    self.cursor.line += 1
+            return next_char
         else:
             return -1
+
+    def peek_n(self, n: int) -> str:
+        """return the next n characters without consuming them, shorter at the end of source."""
+        return self.text[self.offset:self.offset + n]
+
+    def slice(self, start: int, end: int) -> str:
+        """return the normalized text between two offsets."""
+        return self.text[start:end]
+
+    def scan_buffer(self) -> Tuple[str, int]:
+        start: int = self.offset
+        self.cursor.col += self.length - start
+        self.cursor.line += self.text.count('\n', start)
+        self.offset = self.length
+        return self.text, start
@@ -1,8 +1,63 @@
 """
 this module contains the util class for symbol table.
+
+the table is a tree of scopes, each a dict of its own symbols with a link
+to the enclosing scope. entering a scope links a new one under the current
+scope and exiting goes back to its parent, both O(1), and a name is looked
+up scope by scope outwards, so a lookup costs at most the nesting depth.
+the scopes stay reachable from the symbols and from the AST nodes they are
+set on, so a later pass looks names up from the scope of a node.
+
+addresses are per frame. the global scope and every function scope start a
+frame at address 0, a block scope goes on from the address of its parent,
+so sibling blocks reuse the same addresses and every function reuses the
+same frame space. the frame size is the highest address any of its scopes
+reached.
+
+    table = SymbolTable()
+    table.create_item("a", "int")
+    table.enter_scope("main", frame=True)
+    table.create_item("a", "bool", (3, ))   # shadows the global a
+    table.lookup("a").size                   # 3
+    table.exit_scope()
 """
 from typing import Dict, Tuple
 from functools import reduce
+from src.exceptions import SemanticException
+
+
+class Symbol(object):
+    """one declared name, its address is relative to the frame of its scope"""
+    __slots__ = ('name', 'type', 'scope', 'addr', 'size')
+
+    def __init__(self, name: str, value_type: str, scope, addr: int, size: int):
+        self.name: str = name
+        self.type: str = value_type
+        self.scope: Scope = scope
+        self.addr: int = addr
+        self.size: int = size
+
+    def __repr__(self):
+        return "Symbol(%r, %r, %s, addr=%d, size=%d)" % (self.name, self.type, self.scope.name, self.addr, self.size)
+
+
+class Scope(object):
+    """the symbols declared in one scope, parent is the enclosing scope"""
+    __slots__ = ('name', 'parent', 'symbols', 'depth', 'frame', 'next_addr', 'frame_size')
+
+    def __init__(self, name: str, parent=None, frame: bool = False):
+        self.name: str = name
+        self.parent: Scope = parent
+        self.symbols: Dict[str, Symbol] = {}
+        self.depth: int = 0 if parent is None else parent.depth + 1
+        # the scope that starts the frame of this one.
+        self.frame: Scope = self if frame or parent is None else parent.frame
+        self.next_addr: int = 0 if self.frame is self else parent.next_addr
+        # only kept on the scope that starts the frame.
+        self.frame_size: int = 0
+
+    def __repr__(self):
+        return "Scope(%r, depth=%d, %d symbols)" % (self.name, self.depth, len(self.symbols))
 
 
 class SymbolTable(object):
@@ -10,24 +65,58 @@ class SymbolTable(object):
     _var_size: Dict[str, int] = {"int": 2, "bool": 1, "char": 1, "float": 4}
 
     def __init__(self):
-        self._symbol_table: Dict[str, Dict[str, str or int]] = dict()
-        self._addr: int = 0
+        self.global_scope: Scope = Scope("global")
+        # the innermost scope entered, where create_item declares.
+        self.scope: Scope = self.global_scope
 
     def __repr__(self):
-        pass
+        return "SymbolTable(%r)" % self.scope
 
-    def create_item(self, name: str, value_type: str,
-                    scope: str, array: Tuple[int, ...] or None=None):
-        """create a symbol item"""
-        self._symbol_table[name] = {
-            "addr": self._addr, "type": value_type, "scope": scope}
+    def enter_scope(self, name: str, frame: bool = False) -> Scope:
+        """enter a new scope inside the current one, frame starts a new frame like a function does"""
+        self.scope = Scope(name, self.scope, frame)
+        return self.scope
+
+    def exit_scope(self) -> Scope:
+        """go back to the enclosing scope and return it"""
+        if self.scope.parent is None:
+            raise SemanticException("can not exit the global scope")
+        self.scope = self.scope.parent
+        return self.scope
+
+    def create_item(self, name: str, value_type: str, array: Tuple[int, ...] or None=None) -> Symbol:
+        """declare a symbol in the current scope"""
+        scope: Scope = self.scope
+        if name in scope.symbols:
+            raise SemanticException("'%s' is already declared in scope %s" % (name, scope.name))
+        size: int = self._var_size[value_type]
         if array:
-            size: int = reduce(lambda curr, last: curr * last, array)
-            self._symbol_table[name]["size"] = size
-            self._addr += size
-        else:
-            self._addr += self._var_size[value_type]
+            size *= reduce(lambda curr, last: curr * last, array)
+        symbol = scope.symbols[name] = Symbol(name, value_type, scope, scope.next_addr, size)
+        scope.next_addr += size
+        if scope.next_addr > scope.frame.frame_size:
+            scope.frame.frame_size = scope.next_addr
+        return symbol
+
+    def create_function(self, name: str, return_type: str) -> Symbol:
+        """declare a function in the current scope, it takes no storage so its symbol has size 0"""
+        scope: Scope = self.scope
+        if name in scope.symbols:
+            raise SemanticException("'%s' is already declared in scope %s" % (name, scope.name))
+        symbol = scope.symbols[name] = Symbol(name, return_type, scope, scope.next_addr, 0)
+        return symbol
+
+    def lookup(self, name: str, scope: Scope = None) -> Symbol or None:
+        """the symbol name refers to from scope, default to the current scope, None if it is not declared"""
+        if scope is None:
+            scope = self.scope
+        while scope is not None:
+            symbol: Symbol = scope.symbols.get(name)
+            if symbol is not None:
+                return symbol
+            scope = scope.parent
+        return None
 
-    def validate(self, name: str, scope: str) -> bool:
+    def validate(self, name: str, scope: Scope = None) -> bool:
         """validate an variable"""
-        return self._symbol_table.get(name) is not None and self._symbol_table[name]["scope"] in ("global", scope)
+        return self.lookup(name, scope) is not None
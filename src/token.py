@@ -1,7 +1,9 @@
 """Define some meta component of lexer.
 """
-from typing import List
-from enum import Enum, auto
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List
+from enum import Enum, IntEnum, auto
 from src.source import Cursor
 
 
@@ -19,17 +21,127 @@ class TokenType(Enum):
     EOF = -1
 
 
+class TokenKind(IntEnum):
+    """small-int kind of a token, each keyword, operator and delimiter has its own."""
+    EOF = 0
+    IDENTIFIER = auto()
+    STRING = auto()
+    CHAR_CONST = auto()
+    INT_CONST = auto()
+    FLOAT_CONST = auto()
+    BOOL_CONST = auto()
+    # keywords
+    IF = auto()
+    ELSE = auto()
+    CASE = auto()
+    WHILE = auto()
+    DO = auto()
+    BREAK = auto()
+    CONTINUE = auto()
+    RETURN = auto()
+    SWITCH = auto()
+    DEFAULT = auto()
+    INT = auto()
+    FLOAT = auto()
+    CHAR = auto()
+    BOOL = auto()
+    # operators
+    PLUS = auto()
+    INCREMENT = auto()
+    MINUS = auto()
+    DECREMENT = auto()
+    STAR = auto()
+    SLASH = auto()
+    LESS = auto()
+    LESS_EQUAL = auto()
+    GREATER = auto()
+    GREATER_EQUAL = auto()
+    ASSIGN = auto()
+    EQUAL = auto()
+    NOT = auto()
+    NOT_EQUAL = auto()
+    AMPERSAND = auto()
+    LOGICAL_AND = auto()
+    PIPE = auto()
+    LOGICAL_OR = auto()
+    PLUS_ASSIGN = auto()
+    MINUS_ASSIGN = auto()
+    STAR_ASSIGN = auto()
+    SLASH_ASSIGN = auto()
+    # delimiters
+    COMMA = auto()
+    SEMICOLON = auto()
+    COLON = auto()
+    LEFT_PAREN = auto()
+    RIGHT_PAREN = auto()
+    LEFT_BRACKET = auto()
+    RIGHT_BRACKET = auto()
+    LEFT_BRACE = auto()
+    RIGHT_BRACE = auto()
+
+
+# kind of every keyword, operator and delimiter lexeme.
+LEXEME_KINDS: Dict[str, TokenKind] = {
+    "if": TokenKind.IF, "else": TokenKind.ELSE, "case": TokenKind.CASE,
+    "while": TokenKind.WHILE, "do": TokenKind.DO, "break": TokenKind.BREAK,
+    "continue": TokenKind.CONTINUE, "return": TokenKind.RETURN,
+    "switch": TokenKind.SWITCH, "default": TokenKind.DEFAULT,
+    "int": TokenKind.INT, "float": TokenKind.FLOAT, "char": TokenKind.CHAR,
+    "bool": TokenKind.BOOL,
+    "+": TokenKind.PLUS, "++": TokenKind.INCREMENT, "-": TokenKind.MINUS,
+    "--": TokenKind.DECREMENT, "*": TokenKind.STAR, "/": TokenKind.SLASH,
+    "<": TokenKind.LESS, "<=": TokenKind.LESS_EQUAL, ">": TokenKind.GREATER,
+    ">=": TokenKind.GREATER_EQUAL, "=": TokenKind.ASSIGN, "==": TokenKind.EQUAL,
+    "!": TokenKind.NOT, "!=": TokenKind.NOT_EQUAL, "&": TokenKind.AMPERSAND,
+    "&&": TokenKind.LOGICAL_AND, "|": TokenKind.PIPE, "||": TokenKind.LOGICAL_OR,
+    "+=": TokenKind.PLUS_ASSIGN, "-=": TokenKind.MINUS_ASSIGN,
+    "*=": TokenKind.STAR_ASSIGN, "/=": TokenKind.SLASH_ASSIGN,
+    ",": TokenKind.COMMA, ";": TokenKind.SEMICOLON, ":": TokenKind.COLON,
+    "(": TokenKind.LEFT_PAREN, ")": TokenKind.RIGHT_PAREN,
+    "[": TokenKind.LEFT_BRACKET, "]": TokenKind.RIGHT_BRACKET,
+    "{": TokenKind.LEFT_BRACE, "}": TokenKind.RIGHT_BRACE,
+}
+# kind of the tokens whose lexeme is free form.
+TYPE_KINDS: Dict[TokenType, TokenKind] = {
+    TokenType.IDENTIFIER: TokenKind.IDENTIFIER,
+    TokenType.STRING: TokenKind.STRING,
+    TokenType.CHAR_CONST: TokenKind.CHAR_CONST,
+    TokenType.INT_CONST: TokenKind.INT_CONST,
+    TokenType.FLOAT_CONST: TokenKind.FLOAT_CONST,
+    TokenType.BOOL_CONST: TokenKind.BOOL_CONST,
+    TokenType.EOF: TokenKind.EOF,
+}
+# token type of every kind.
+KIND_TYPES: Dict[TokenKind, TokenType] = dict(
+    [(kind, t_type) for t_type, kind in TYPE_KINDS.items()] +
+    [(kind, TokenType.KEYWORD) for kind in TokenKind if TokenKind.IF <= kind <= TokenKind.BOOL] +
+    [(kind, TokenType.OPERATOR) for kind in TokenKind if TokenKind.PLUS <= kind <= TokenKind.SLASH_ASSIGN] +
+    [(kind, TokenType.DELIMITER) for kind in TokenKind if TokenKind.COMMA <= kind <= TokenKind.RIGHT_BRACE])
+# every kind indexed by its int value, kinds stored as plain ints are turned
+# back with one list index instead of a call to the IntEnum.
+TOKEN_KINDS: List[TokenKind] = sorted(TokenKind)
+
+
+def token_kind(t_type: TokenType, value: str or bool) -> TokenKind:
+    """return the kind of a token"""
+    if t_type in TYPE_KINDS:
+        return TYPE_KINDS[t_type]
+    return LEXEME_KINDS[value]
+
+
 class Token(object):
     """
     token is the output of lexer.
 
     which purpose is to make parse work easier.
     """
+    __slots__ = ('type', 'value', 'cursor', 'kind')
 
-    def __init__(self, t_type: str, value: str or bool or int, cursor: Cursor):
+    def __init__(self, t_type: str, value: str or bool or int, cursor: Cursor, kind: TokenKind=None):
         self.type: str = t_type
         self.value: str or bool or int = value
         self.cursor: Cursor = cursor
+        self.kind: TokenKind = token_kind(t_type, value) if kind is None else kind
 
     def __str__(self):
         return '("%s", %s)' % (self.value, self.type)
@@ -38,16 +150,106 @@ class Token(object):
         return '("%s", %s)' % (self.value, self.type)
 
 
+class TokenBuffer(object):
+    """
+    compact token storage, one array column per token field.
+
+    identifier, keyword and other lexemes are interned in lexeme_table, so a
+    token costs four array slots. indexing returns a lightweight TokenView,
+    so a buffer can be handed to TokenSource in place of a token list.
+    """
+
+    def __init__(self):
+        self.kinds: array = array('B')
+        self.lexemes: array = array('I')
+        self.lines: array = array('I')
+        self.cols: array = array('I')
+        self.lexeme_table: List[str or bool] = []
+        self._lexeme_ids: Dict[str or bool, int] = {}
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[Token]):
+        """build a buffer from tokens, e.g. Lexer.iter_tokens()"""
+        token_buffer = cls()
+        for token in tokens:
+            token_buffer.append(token.kind, token.value, token.cursor.line, token.cursor.col)
+        return token_buffer
+
+    def intern(self, value: str or bool) -> int:
+        """return the lexeme id of value"""
+        lexeme_id: int = self._lexeme_ids.get(value)
+        if lexeme_id is None:
+            lexeme_id = self._lexeme_ids[value] = len(self.lexeme_table)
+            self.lexeme_table.append(value)
+        return lexeme_id
+
+    def append(self, kind: TokenKind, value: str or bool, line: int, col: int):
+        """append one token"""
+        self.kinds.append(kind)
+        self.lexemes.append(self.intern(value))
+        self.lines.append(line)
+        self.cols.append(col)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self.kinds)
+        if not 0 <= index < len(self.kinds):
+            raise IndexError("token buffer index out of range")
+        return TokenView(self, index)
+
+
+class TokenView(Token):
+    """a token stored in a TokenBuffer, fields are read from the buffer columns."""
+    __slots__ = ('buffer', 'index')
+
+    def __init__(self, token_buffer: TokenBuffer, index: int):
+        self.buffer: TokenBuffer = token_buffer
+        self.index: int = index
+
+    @property
+    def kind(self) -> int:
+        return self.buffer.kinds[self.index]
+
+    @property
+    def type(self) -> TokenType:
+        return KIND_TYPES[self.buffer.kinds[self.index]]
+
+    @property
+    def value(self) -> str or bool:
+        return self.buffer.lexeme_table[self.buffer.lexemes[self.index]]
+
+    @value.setter
+    def value(self, value: str or bool):
+        self.buffer.lexemes[self.index] = self.buffer.intern(value)
+
+    @property
+    def cursor(self) -> Cursor:
+        return Cursor(self.buffer.lines[self.index], self.buffer.cols[self.index])
+
+
+# returned by every peek past the end of a token source.
+EOF_TOKEN: Token = Token("EOF", -1, Cursor(-1, -1), TokenKind.EOF)
+
+
 class TokenSource(object):
     """
     processed source.
     basiclly its a list of token with handle method.
+
+    it also carries the options of the parse reading it, expression_engine
+    one of src.parser.EXPRESSION_ENGINES and compact, see
+    ParseTranslationUnit.parse.
     """
 
-    def __init__(self, token_list: List[Token]):
+    def __init__(self, token_list: List[Token], expression_engine: str = "descent", compact: bool = False):
         self.token_list: List[Token] = token_list
         self.source_len = len(self.token_list)
         self.token_pointer: int = 0
+        self.expression_engine: str = expression_engine
+        self.compact: bool = compact
 
     def get(self):
         self.token_pointer += 1
@@ -55,5 +257,46 @@ class TokenSource(object):
 
     def peek(self, seq: int=1):
         if self.token_pointer + seq - 1 >= self.source_len:
-            return Token("EOF", -1, Cursor(-1, -1))
+            return EOF_TOKEN
         return self.token_list[self.token_pointer + seq - 1]
+
+
+class StreamingTokenSource(object):
+    """
+    processed source over a lazy token iterable, e.g. Lexer.iter_tokens().
+
+    only the tokens within lookahead are held, in a bounded deque, so lexing
+    and parsing interleave and token memory does not grow with the file.
+    the parser options are carried like on TokenSource.
+    """
+
+    def __init__(self, tokens: Iterable[Token], lookahead: int=2, expression_engine: str = "descent",
+                 compact: bool = False):
+        self.tokens = iter(tokens)
+        self.lookahead: int = lookahead
+        self.buffer = deque(maxlen=lookahead)
+        self.token_pointer: int = 0
+        self.expression_engine: str = expression_engine
+        self.compact: bool = compact
+
+    def _fill(self, seq: int) -> bool:
+        """pull tokens until seq of them are buffered, return False if the source runs out"""
+        while len(self.buffer) < seq:
+            token: Token = next(self.tokens, None)
+            if token is None:
+                return False
+            self.buffer.append(token)
+        return True
+
+    def get(self):
+        if not self.buffer and not self._fill(1):
+            raise IndexError("no token left in token source")
+        self.token_pointer += 1
+        return self.buffer.popleft()
+
+    def peek(self, seq: int=1):
+        if seq > self.lookahead:
+            raise ValueError("can not peek %d tokens ahead, lookahead is %d" % (seq, self.lookahead))
+        if len(self.buffer) < seq and not self._fill(seq):
+            return EOF_TOKEN
+        return self.buffer[seq - 1]
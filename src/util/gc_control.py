@@ -0,0 +1,42 @@
+"""
+Control of the cyclic gc around code that builds many long lived objects.
+"""
+import gc
+from contextlib import contextmanager
+
+
+@contextmanager
+def paused_gc(pause: bool = True):
+    """
+    keep the cyclic gc off in the block, unless pause is false. building a
+    tree or decoding tokens allocates objects that all stay alive, a
+    collection would only rescan them.
+    """
+    enabled: bool = gc.isenabled()
+    if pause:
+        gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+@contextmanager
+def frozen_gc(freeze: bool = True):
+    """
+    move every object the gc tracks to the permanent generation with
+    gc.freeze for the block, so the collections in it do not scan them, and
+    thaw them on leaving. gc.freeze acts on the whole process, not on one
+    tree. nothing is done without freeze, on python before 3.7, which has no
+    gc.freeze, and when objects are frozen already, thawing on leaving would
+    also thaw the ones the caller froze.
+    """
+    if freeze and hasattr(gc, 'freeze') and not gc.get_freeze_count():
+        gc.freeze()
+        try:
+            yield
+        finally:
+            gc.unfreeze()
+    else:
+        yield
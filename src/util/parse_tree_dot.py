@@ -8,30 +8,36 @@ from src.parser import ParseNode, ParseTranslationUnit
 from src.ast import SourceRoot
 from src.lexer import Lexer
 from src.source import FileSource
-from src.token import TokenSource
+from src.token import StreamingTokenSource
 # TODO: add CLI.
 
 
 def convert_parse_tree_to_dot(graph: pydot.Dot, parse_node: ParseNode, father_node: pydot.Node):
-    """function to convert parse tree to dot language."""
-    node_label: str = str(parse_node.symbol if isinstance(
-        parse_node.symbol, str) else parse_node.symbol.value) + " "
-    node: pydot.Node = pydot.Node(
-        name=str(id(parse_node)), label=node_label, shape="box")
-    graph.add_node(node)
-    if father_node:
-        graph.add_edge(pydot.Edge(father_node, node))
-    for child in parse_node.child:
-        convert_parse_tree_to_dot(graph, child, node)
-
-
-def generate_cst_dot(source_file: str, output_file: str):
-    """parse and generate the dot file."""
+    """
+    function to convert parse tree to dot language, walking it with an explicit stack.
+
+    any tree goes, a full or compact CST as well as an AST.
+    """
+    stack = [(parse_node, father_node)]
+    while stack:
+        parse_node, father_node = stack.pop()
+        node_label: str = str(parse_node.symbol if isinstance(
+            parse_node.symbol, str) else parse_node.symbol.value) + " "
+        node: pydot.Node = pydot.Node(
+            name=str(id(parse_node)), label=node_label, shape="box")
+        graph.add_node(node)
+        if father_node:
+            graph.add_edge(pydot.Edge(father_node, node))
+        stack.extend((child, node) for child in reversed(parse_node.child))
+
+
+def generate_cst_dot(source_file: str, output_file: str, compact: bool = False):
+    """parse and generate the dot file, compact leaves out the single child wrapper nodes."""
     parse_tree_graph: pydot.Dot = pydot.Dot(graph_type='digraph')
     source: FileSource = FileSource(source_file)
     lexer: Lexer = Lexer(source)
-    token_source = TokenSource(lexer.match())
-    parse_tree = ParseTranslationUnit.parse(token_source)
+    token_source = StreamingTokenSource(lexer.iter_tokens())
+    parse_tree = ParseTranslationUnit.parse(token_source, compact=compact)
     convert_parse_tree_to_dot(parse_tree_graph, parse_tree, None)
     parse_tree_graph.write(output_file)
 
@@ -41,9 +47,8 @@ def generate_ast_dot(source_file: str, output_file: str):
     ast_graph: pydot.Dot = pydot.Dot(graph_type='digraph')
     source: FileSource = FileSource(source_file)
     lexer: Lexer = Lexer(source)
-    token_source = TokenSource(lexer.match())
-    parse_tree = ParseTranslationUnit.parse(token_source)
-    ast = SourceRoot.transform(parse_tree)
+    token_source = StreamingTokenSource(lexer.iter_tokens())
+    ast = SourceRoot.parse(token_source)
     convert_parse_tree_to_dot(ast_graph, ast, None)
     ast_graph.write(output_file)
 
@@ -0,0 +1,51 @@
+"""
+Work of this module is to dump a parse tree of a source file as json.
+
+the text is written to the file in chunks while the tree is walked, see
+ParseNode.write_json, so dumping a large file does not build the json
+string or the nested dicts of parse_dict first.
+
+usage: python -m src.util.parse_tree_json [--emit {ast,cst}] [--compact] [--ndjson] [--indent N] source.tl output.json
+"""
+import argparse
+from src.parser import ParseNode, ParseTranslationUnit
+from src.ast import SourceRoot
+from src.lexer import Lexer
+from src.source import FileSource
+from src.token import StreamingTokenSource
+
+
+def generate_cst_json(source_file: str, output_file: str, compact: bool = False, ndjson: bool = False,
+                      indent: int = None):
+    """parse and write the json file of the CST"""
+    token_source = StreamingTokenSource(Lexer(FileSource(source_file)).iter_tokens())
+    parse_tree = ParseTranslationUnit.parse(token_source, compact=compact)
+    with open(output_file, 'w') as file_obj:
+        ParseNode.write_json(parse_tree, file_obj, indent=indent, ndjson=ndjson)
+
+
+def generate_ast_json(source_file: str, output_file: str, ndjson: bool = False, indent: int = None):
+    """parse and write the json file of the AST"""
+    token_source = StreamingTokenSource(Lexer(FileSource(source_file)).iter_tokens())
+    ast = SourceRoot.parse(token_source)
+    with open(output_file, 'w') as file_obj:
+        ParseNode.write_json(ast, file_obj, indent=indent, ndjson=ndjson)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source_file', help='thrilang source file')
+    parser.add_argument('output_file', help='json file to write')
+    parser.add_argument('--emit', choices=("ast", "cst"), default="ast", help='tree to dump')
+    parser.add_argument('--compact', action='store_true', help='collapse single child CST nodes')
+    parser.add_argument('--ndjson', action='store_true', help='one {"id", "parent", "symbol"} line per node')
+    parser.add_argument('--indent', type=int, default=None, help='indent of the nested json')
+    args = parser.parse_args(argv)
+    if args.emit == "cst":
+        generate_cst_json(args.source_file, args.output_file, args.compact, args.ndjson, args.indent)
+    else:
+        generate_ast_json(args.source_file, args.output_file, args.ndjson, args.indent)
+
+
+if __name__ == '__main__':
+    main()
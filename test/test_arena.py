@@ -0,0 +1,79 @@
+"""test case for the arena tree"""
+import pytest
+from src.arena import NO_NODE, ArenaTree, NodeRef
+from src.ast import SourceRoot
+from src.lexer import Lexer
+from src.parser import NodeKind, ParseNode, ParseTranslationUnit
+from src.quad import ASTVisitor
+from src.source import StringSource
+from src.token import TokenSource
+from benchmark.corpus import ProgramGenerator
+
+
+class CallVisitor(ASTVisitor):
+    """collect the names of the called functions and mark every call"""
+
+    def __init__(self):
+        self.called = []
+
+    def _postfix_exp(self, ast_node):
+        if ast_node.symbol == "call":
+            self.called.append(ast_node.child[0].symbol.value)
+            ast_node.type = "call"
+        self.visit_children(ast_node)
+
+
+class TestArena:
+    """
+    test the arena tree and its node views
+    """
+
+    @pytest.fixture()
+    def tokens(self):
+        return Lexer(StringSource(ProgramGenerator(0, "ast").generate(8192))).match()
+
+    def test_from_tree(self, tokens):
+        cst = ParseTranslationUnit.parse(TokenSource(tokens))
+        ast = SourceRoot.transform(cst)
+        for tree in (cst, ast):
+            arena = ArenaTree.from_tree(tree)
+            assert ParseNode.to_json(arena.root) == ParseNode.to_json(tree)
+            nodes = []
+            stack = [tree]
+            while stack:
+                nodes.append(stack.pop())
+                stack.extend(reversed(nodes[-1].child))
+            assert len(arena) == len(nodes) and list(arena.kinds) == [node.kind for node in nodes]
+        assert ParseNode.to_json(ArenaTree.parse(TokenSource(tokens)).root) == ParseNode.to_json(ast)
+
+        # the subtree of a node is its preorder range, its children link back to it.
+        for index in arena.subtree(0):
+            children = arena.children(index)
+            assert all(arena.parents[child] == index for child in children)
+            assert arena.ends[index] == (arena.ends[children[-1]] if children else index + 1)
+        assert arena.parents[0] == NO_NODE and arena.root.father_node is None
+
+    @pytest.mark.parametrize("use_numpy", [False, True])
+    def test_queries(self, tokens, use_numpy):
+        if use_numpy:
+            pytest.importorskip("numpy")
+        ast = SourceRoot.parse(TokenSource(tokens))
+        arena = ArenaTree.from_tree(ast)
+        counts = arena.kind_counts(use_numpy)
+        assert sum(counts.values()) == len(arena) and counts[NodeKind.AST_SOURCE_ROOT] == 1
+        calls = arena.find(NodeKind.AST_POSTFIX_EXP, "call", use_numpy)
+        assert calls and all(arena.symbol(index) == "call" for index in calls)
+        assert set(calls) < set(arena.find(NodeKind.AST_POSTFIX_EXP, use_numpy=use_numpy))
+        assert not arena.find(NodeKind.AST_POSTFIX_EXP, "no such symbol", use_numpy)
+
+    def test_visitor(self, tokens):
+        ast = SourceRoot.parse(TokenSource(tokens))
+        arena = ArenaTree.from_tree(ast)
+        visitor, arena_visitor = CallVisitor(), CallVisitor()
+        visitor.traverse(ast)
+        arena_visitor.traverse(arena.root)
+        assert arena_visitor.called == visitor.called
+        calls = arena.find(NodeKind.AST_POSTFIX_EXP, "call")
+        assert len(calls) == len(visitor.called) and all(NodeRef(arena, index).type == "call" for index in calls)
+        with pytest.raises(AttributeError):
+            NodeRef(arena, 0).scope
@@ -1,10 +1,14 @@
 """test module for transform concrete syntax tree to abstract syntax tree."""
+import gc
+import weakref
 import pytest
 from src.token import TokenSource
 from src.lexer import Lexer
-from src.parser import ParseTranslationUnit
-from src.ast import SourceRoot
-from src.source import FileSource
+from src.parser import LEAF_CHILDREN, NodeKind, ParseNode, ParsePrimaryExp, ParseToken, ParseTranslationUnit
+from src.ast import PrimaryExp, SourceRoot
+from src.exceptions import ParseException, TransformException
+from src.source import FileSource, StringSource
+from benchmark.corpus import ProgramGenerator
 
 class TestParser:
     """
@@ -21,7 +25,99 @@ class TestParser:
         print(lexer.token_list)
         token_source = TokenSource(lexer.token_list)
         self.cst = ParseTranslationUnit.parse(token_source)
+        self.tokens = Lexer(FileSource(test_source_file)).match()
 
     def test_transform(self):
         ast = SourceRoot.transform(self.cst)
         print(ast)
+
+    def test_transform_keeps_cst(self):
+        cst = str(self.cst)
+        first = ParseNode.parse_dict(SourceRoot.transform(self.cst))
+        assert str(self.cst) == cst
+        assert ParseNode.parse_dict(SourceRoot.transform(self.cst)) == first
+
+    def test_long_chain(self):
+        string = "int main ( ) { a = %s ; }" % " - ".join("v%d" % index for index in range(5000))
+        ast = SourceRoot.transform(ParseTranslationUnit.parse(TokenSource(Lexer(StringSource(string)).match())))
+        node, depth = ast.child[0].child[0].child[2].child[0].child[0].child[0].child[1], 0
+        assert node.child[1].symbol.value == "v4999"
+        while len(node.child) == 2:
+            assert node.symbol.value == '-' and node.child[0].father_node is node
+            node, depth = node.child[0], depth + 1
+        assert depth == 4999 and node.symbol.value == "v0"
+
+        # deeper than the recursion limit, the walkers must not recurse.
+        direct = SourceRoot.parse(TokenSource(Lexer(StringSource(string)).match()))
+        assert ParseNode.to_json(direct) == ParseNode.to_json(ast)
+        assert len(ParseNode.parse_dict(ast)['child']) == 1
+        assert str(ast).count('"-"') == 4999
+
+    @pytest.mark.parametrize("engine", ["descent", "pratt"])
+    def test_transform_compact(self, engine):
+        compact_tree = ParseTranslationUnit.parse(TokenSource(self.tokens), expression_engine=engine, compact=True)
+        assert ParseNode.parse_dict(SourceRoot.transform(compact_tree)) == \
+            ParseNode.parse_dict(SourceRoot.transform(self.cst))
+        tokens = Lexer(StringSource(ProgramGenerator(0, "ast").generate(8192))).match()
+        compact_tree = ParseTranslationUnit.parse(TokenSource(tokens), expression_engine=engine, compact=True)
+        assert ParseNode.parse_dict(SourceRoot.transform(compact_tree)) == \
+            ParseNode.parse_dict(SourceRoot.parse(TokenSource(tokens)))
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_direct_parse(self, seed):
+        ast = SourceRoot.parse(TokenSource(self.tokens))
+        assert ParseNode.parse_dict(ast) == ParseNode.parse_dict(SourceRoot.transform(self.cst))
+
+        text = ProgramGenerator(seed, "ast").generate(8192)
+        two_pass = SourceRoot.transform(ParseTranslationUnit.parse(TokenSource(Lexer(StringSource(text)).match())))
+        ast = SourceRoot.parse(TokenSource(Lexer(StringSource(text)).match()))
+        assert ParseNode.parse_dict(ast) == ParseNode.parse_dict(two_pass)
+        assert ast.child[-1].child[0].father_node is ast.child[-1]
+
+    @pytest.mark.parametrize("string, exception", [
+        ("int main ( ) { if ( a ) b ; else c ; }", TransformException),
+        ("int main ( ) { a = ( int ) b ; }", TransformException),
+        ("int main ( ) { a = ( int b ; }", ParseException),
+        ("int main ( ) { a = b ; ", ParseException),
+        ("int ; int main ( ) { }", ParseException),
+    ])
+    def test_direct_parse_error(self, string, exception):
+        with pytest.raises(exception):
+            SourceRoot.parse(TokenSource(Lexer(StringSource(string)).match()))
+        if exception is TransformException:
+            cst = ParseTranslationUnit.parse(TokenSource(Lexer(StringSource(string)).match()))
+            with pytest.raises(TransformException):
+                SourceRoot.transform(cst)
+
+    def test_node_slots(self):
+        ast = SourceRoot.transform(self.cst)
+        for tree in (self.cst, ast):
+            stack = [tree]
+            while stack:
+                node = stack.pop()
+                assert not hasattr(node, '__dict__') and isinstance(node.kind, NodeKind)
+                if isinstance(node, (ParseToken, PrimaryExp)) or (isinstance(node, ParsePrimaryExp) and
+                                                                  not isinstance(node.symbol, str)):
+                    assert node.child is LEAF_CHILDREN
+                stack.extend(node.child)
+        assert ast.kind is NodeKind.AST_SOURCE_ROOT and self.cst.kind is NodeKind.TRANSLATION_UNIT
+        ast.scope = "global"
+        with pytest.raises(AttributeError):
+            ast.scopes = "global"
+
+    def test_weak_father(self):
+        expected = ParseNode.parse_dict(SourceRoot.transform(self.cst))
+        ast = SourceRoot.transform(self.cst, release=True)
+        assert ParseNode.parse_dict(ast) == expected and not self.cst.child
+        declaration = ast.child[0]
+        assert declaration.father_node is ast
+        # without reference cycles refcounting frees the tree, the cyclic gc is not needed.
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            root = weakref.ref(ast)
+            del ast
+            assert root() is None and declaration.father_node is None
+        finally:
+            if enabled:
+                gc.enable()
@@ -0,0 +1,80 @@
+"""test case for the compile cache"""
+import os
+import pytest
+import src.cache
+import src.compiler
+from src.cache import CompileCache, decode_tokens, encode_tokens
+from src.compiler import compile_file, main
+from src.exceptions import ParseException
+from src.lexer import Lexer
+from src.source import StringSource
+from .testConfig import source_str
+
+
+class TestCache:
+    """
+    test the content addressed compile cache
+    """
+
+    @pytest.fixture()
+    def source_files(self, tmpdir):
+        paths = []
+        for index, source in enumerate(source_str):
+            path = tmpdir.join("sample%d.tl" % index)
+            path.write(source)
+            paths.append(str(path))
+        return paths
+
+    def test_encode(self):
+        tokens = Lexer(StringSource("int main ( ) { bool a = true ; }")).match()
+        assert [(token.kind, token.value, token.cursor.get_position()) for token in decode_tokens(encode_tokens(tokens))] \
+            == [(token.kind, token.value, token.cursor.get_position()) for token in tokens]
+
+    def test_hit(self, source_files, tmpdir, monkeypatch):
+        cache_dir = str(tmpdir.join("cache"))
+        expected = {emit: compile_file(source_files[0], emit=emit) for emit in ("ast", "cst")}
+        assert compile_file(source_files[0], cache_dir=cache_dir) == expected["ast"]
+        with pytest.raises(ParseException):
+            compile_file(source_files[2], cache_dir=cache_dir)
+
+        def lexer(*args, **kwargs):
+            raise AssertionError("a cached source must not be lexed")
+        monkeypatch.setattr(src.compiler, "Lexer", lexer)
+        assert compile_file(source_files[0], cache_dir=cache_dir) == expected["ast"]
+        # the cst is parsed from the cached tokens.
+        assert compile_file(source_files[0], emit="cst", cache_dir=cache_dir) == expected["cst"]
+        with pytest.raises(ParseException):
+            compile_file(source_files[2], cache_dir=cache_dir)
+        assert len(os.listdir(cache_dir)) == 2
+
+    def test_evict(self, tmpdir, monkeypatch):
+        cache = CompileCache(str(tmpdir))
+        cache.store(cache.key(b"a", "char"), {'tokens': []})
+        assert cache.load(cache.key(b"a", "char")) == {'tokens': []}
+        # another engine or entry format is another entry.
+        assert cache.load(cache.key(b"a", "regex")) == {}
+        monkeypatch.setattr(src.cache, "FORMAT_VERSION", src.cache.FORMAT_VERSION + 1)
+        assert cache.load(cache.key(b"a", "char")) == {}
+        monkeypatch.undo()
+        # room for one entry, the older one goes.
+        cache.max_bytes = os.path.getsize(cache.path(cache.key(b"a", "char")))
+        os.utime(cache.path(cache.key(b"a", "char")), (0, 0))
+        cache.store(cache.key(b"b", "char"), {'tokens': []})
+        assert cache.load(cache.key(b"a", "char")) == {} and cache.load(cache.key(b"b", "char")) == {'tokens': []}
+        cache.max_bytes *= 2
+        cache.store(cache.key(b"a", "char"), {'tokens': []})
+        assert len(os.listdir(str(tmpdir))) == 2
+
+        # a broken entry is a miss, not an error.
+        with open(cache.path(cache.key(b"a", "char")), 'r+b') as file_obj:
+            file_obj.truncate(8)
+        assert cache.load(cache.key(b"a", "char")) == {}
+
+    def test_cli(self, source_files, tmpdir, monkeypatch):
+        monkeypatch.setenv("THRIVE_CACHE_DIR", str(tmpdir.join("default")))
+        assert main(["--no-cache", "-o", str(tmpdir)] + source_files[:1]) == 0
+        assert not tmpdir.join("default").check()
+        assert main(["-o", str(tmpdir)] + source_files[:1]) == 0
+        assert len(tmpdir.join("default").listdir()) == 1
+        assert main(["--cache-dir", str(tmpdir.join("other")), "-o", str(tmpdir)] + source_files[:2]) == 0
+        assert len(tmpdir.join("other").listdir()) == 2
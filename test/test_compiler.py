@@ -0,0 +1,62 @@
+"""test case for compiler"""
+import gc
+import json
+import sys
+import pytest
+from src.compiler import compile_file, compile_many, main
+from .testConfig import source_str
+
+
+class TestCompiler:
+    """
+    test multi-file compilation
+    """
+
+    @pytest.fixture()
+    def source_files(self, tmpdir):
+        paths = []
+        for index, source in enumerate(source_str):
+            path = tmpdir.join("sample%d.tl" % index)
+            path.write(source)
+            paths.append(str(path))
+        return paths
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_compile_many(self, source_files, jobs):
+        results = compile_many(source_files, jobs=jobs)
+        assert [result.path for result in results] == source_files
+        assert results[0].output == compile_file(source_files[0])
+        assert json.loads(results[1].output)['symbol'] == "source root"
+        # the third sample is not valid thrilang, it must not abort the batch.
+        assert results[2].output is None and results[2].error.startswith("ParseException")
+
+    def test_emit_cst(self, source_files):
+        result = compile_many(source_files[:1], emit="cst")[0]
+        assert json.loads(result.output)['symbol'] == "translation Unit"
+        with pytest.raises(ValueError):
+            compile_many(source_files, emit="quad")
+
+    def test_gc_pause(self, source_files):
+        assert compile_file(source_files[0], gc_mode="pause") == compile_file(source_files[0])
+        assert gc.isenabled()
+        with pytest.raises(ValueError):
+            compile_many(source_files, gc_mode="off")
+
+    @pytest.mark.skipif(sys.version_info < (3, 7), reason="gc.freeze is new in python 3.7")
+    def test_gc_freeze(self, source_files):
+        assert compile_file(source_files[0], gc_mode="freeze") == compile_file(source_files[0])
+        assert gc.isenabled() and not gc.get_freeze_count()
+        # objects the caller froze stay frozen.
+        gc.freeze()
+        try:
+            frozen = gc.get_freeze_count()
+            compile_file(source_files[0], gc_mode="freeze")
+            assert gc.get_freeze_count() == frozen
+        finally:
+            gc.unfreeze()
+
+    def test_cli(self, source_files, tmpdir, monkeypatch):
+        monkeypatch.setenv("THRIVE_CACHE_DIR", str(tmpdir.join("cache")))
+        assert main(["-j", "2", "-o", str(tmpdir)] + source_files[:2]) == 0
+        assert tmpdir.join("sample0.json").read() == compile_file(source_files[0])
+        assert main(source_files) == 1
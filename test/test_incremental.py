@@ -0,0 +1,78 @@
+"""test case for incremental parsing"""
+import pytest
+from src.ast import SourceRoot
+from src.exceptions import ParseException
+from src.incremental import IncrementalParser
+from src.lexer import Lexer
+from src.parser import ParseNode, ParseTranslationUnit
+from src.source import StringSource
+from src.token import TokenSource
+from benchmark.corpus import ProgramGenerator
+
+
+class TestIncremental:
+    """
+    test reparsing after edits
+    """
+
+    @pytest.fixture()
+    def lexer(self):
+        return Lexer(StringSource(ProgramGenerator(0, "ast").generate(8192)))
+
+    @staticmethod
+    def check_tree(incremental):
+        cst = ParseTranslationUnit.parse(TokenSource(list(incremental.tokens)), compact=incremental.compact)
+        assert ParseNode.parse_dict(incremental.cst) == ParseNode.parse_dict(cst)
+        assert ParseNode.parse_dict(incremental.ast) == ParseNode.parse_dict(SourceRoot.transform(cst))
+        assert len(incremental.spans) == len(incremental.cst.child) == len(incremental.ast.child)
+
+    def test_relex_edits(self, lexer):
+        incremental = IncrementalParser()
+        result = incremental.parse(lexer.match())
+        declarations = len(incremental.spans)
+        assert result.changed == list(range(declarations)) and result.reused == 0
+
+        # a new function between the first two declarations.
+        position = lexer.src.text.index("\n", incremental.tokens[incremental.spans[0][1] - 1].cursor.col) + 1
+        result = incremental.reparse(*lexer.relex(incremental.tokens, position, position,
+                                                  "int g ( ) { return 12345 ; }\n"))
+        # relex takes the '}' before the edit again, the first function is parsed again but unchanged.
+        assert result.changed == [1] and not result.removed and result.reused == declarations - 1
+        self.check_tree(incremental)
+
+        # a rename inside its body, then a line break that leaves the tokens as they are.
+        position = lexer.src.text.index("return 12345")
+        result = incremental.reparse(*lexer.relex(incremental.tokens, position + 7, position + 12, "v0"))
+        assert result.changed == [1] and result.removed == [1] and result.reused == declarations
+        self.check_tree(incremental)
+        result = incremental.reparse(*lexer.relex(incremental.tokens, position + 6, position + 7, "\n"))
+        assert not result.changed and not result.removed and result.reused == declarations
+        self.check_tree(incremental)
+
+    def test_token_diff(self, lexer):
+        incremental = IncrementalParser(compact=True)
+        incremental.parse(lexer.match())
+        reused = incremental.cst.child[-1]
+        text = "\n\nint g ;\n" + lexer.src.text
+        tokens = Lexer(StringSource(text)).match()
+        result = incremental.reparse(tokens)
+        assert result.changed == [0] and incremental.cst.child[-1] is reused
+        assert [token.cursor.get_position() for token in incremental.tokens] == \
+            [token.cursor.get_position() for token in tokens]
+        self.check_tree(incremental)
+
+    def test_parse_error(self, lexer):
+        incremental = IncrementalParser()
+        incremental.parse(lexer.match())
+        tokens, spans = incremental.tokens, incremental.spans
+        position = lexer.src.text.index("{")
+        with pytest.raises(ParseException):
+            incremental.reparse(*lexer.relex(list(tokens), position, position + 1, "("))
+        assert incremental.tokens is tokens and incremental.spans is spans
+
+        # an edit that moves the tokens after it, the kept tokens keep their positions.
+        positions = [token.cursor.get_position() for token in tokens]
+        text = lexer.src.text[:position] + "( (" + lexer.src.text[position + 1:]
+        with pytest.raises(ParseException):
+            incremental.reparse(Lexer(StringSource(text)).match())
+        assert incremental.tokens is tokens and [token.cursor.get_position() for token in tokens] == positions
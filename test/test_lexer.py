@@ -1,7 +1,10 @@
 """test case for lexer"""
+import random
 import pytest
 from src.lexer import Lexer
-from src.source import FileSource, StringSource
+from src.source import FileSource, MmapFileSource, StringSource
+from src.exceptions import InvalidTokenException
+from .testConfig import source_str
 
 class TestLexer:
     """
@@ -24,3 +27,69 @@ class TestLexer:
         lexer = Lexer(source)
         lexer.match()
         print(lexer.token_list)
+
+    @pytest.mark.parametrize("source_index", [0, 1, 2])
+    def test_regex_engine(self, source_index):
+        char_tokens = Lexer(StringSource(source_str[source_index])).match()
+        regex_tokens = Lexer(StringSource(source_str[source_index]), engine="regex").match()
+        assert [(token.type, token.value) for token in char_tokens] == \
+            [(token.type, token.value) for token in regex_tokens]
+
+    def test_regex_engine_mmap(self, test_source_file):
+        file_tokens = Lexer(FileSource(test_source_file)).match()
+        mmap_tokens = Lexer(MmapFileSource(test_source_file), engine="regex").match()
+        assert [(token.type, token.value) for token in file_tokens] == \
+            [(token.type, token.value) for token in mmap_tokens]
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_regex_engine_mmap_cursor(self, tmpdir, seed):
+        # blanks pretreatment drops, between tokens and inside comments.
+        rng = random.Random(seed)
+        # a tab alone would join two tokens, pretreatment drops it without a space.
+        blanks = [" ", "  ", "\t ", " \t ", "\r\n", "\n  ", "\n\t\n", "  # a  comment\t here \n "]
+        program = "int main ( ) { float b [ 2 ] ; int i = 0 , j = 100 ; while ( i < j ) { i ++ ; j = j + i ; } } int c ;"
+        text = "".join(token + rng.choice(blanks) for token in program.split()) + "\n"
+        path = tmpdir.join("blanks.tl")
+        path.write_binary(text.encode())
+        expected = [(token.value, token.cursor.get_position()) for token in Lexer(FileSource(str(path))).match()]
+        for engine in ("char", "regex"):
+            assert [(token.value, token.cursor.get_position())
+                    for token in Lexer(MmapFileSource(str(path)), engine=engine).match()] == expected
+
+    @pytest.mark.parametrize("engine", ["char", "regex"])
+    @pytest.mark.parametrize("string", ["int a = b$;\n", "a = 1-2;\n", "a = b"])
+    def test_invalid_token(self, engine, string):
+        with pytest.raises(InvalidTokenException):
+            Lexer(StringSource(string), engine=engine).match()
+
+    @pytest.mark.parametrize("engine", ["char", "regex"])
+    def test_token_buffer(self, test_source_string, engine):
+        tokens = Lexer(StringSource(test_source_string), engine=engine).match()
+        token_buffer = Lexer(StringSource(test_source_string), engine=engine).match_buffer()
+        assert len(token_buffer) == len(tokens)
+        assert [(token.type, token.value, token.cursor.get_position()) for token in tokens] == \
+            [(token.type, token.value, token.cursor.get_position()) for token in token_buffer]
+        assert len(token_buffer.lexeme_table) < len(tokens)
+
+    @pytest.mark.parametrize("engine", ["char", "regex"])
+    @pytest.mark.parametrize("edit", [("fact(10)", "fact(b +\n 2)"), ("== 0", "== b"),
+                                      ("return 1;", ""), ("\n}", "}"), ("# recursive", "#"),
+                                      ("== 0", " ==  0 "), ("return 1;", "\treturn  1 ; "), ("fact(10)", " ")])
+    def test_relex(self, engine, edit):
+        lexer = Lexer(StringSource(source_str[0]), engine=engine)
+        old_tokens = lexer.match()
+        positions = [token.cursor.get_position() for token in old_tokens]
+        text = lexer.src.text
+        edit_start = text.index(edit[0])
+        edit_end = edit_start + len(edit[0])
+        tokens, (first, old_stop, new_stop) = lexer.relex(list(old_tokens), edit_start, edit_end, edit[1])
+        expected = Lexer(StringSource(text[:edit_start] + edit[1] + text[edit_end:]), engine=engine).match()
+        assert [(token.kind, token.value, token.cursor.get_position()) for token in tokens] == \
+            [(token.kind, token.value, token.cursor.get_position()) for token in expected]
+        assert tokens[:first] == old_tokens[:first]
+        assert tokens[new_stop:] == old_tokens[old_stop:]
+        assert old_stop - first <= 5 and new_stop - first <= 7
+        # the tail of old_tokens is shifted in place, the head keeps its positions.
+        assert [token.cursor.get_position() for token in old_tokens[:first]] == positions[:first]
+        assert [token.cursor.get_position() for token in old_tokens[old_stop:]] == \
+            [token.cursor.get_position() for token in expected[new_stop:]]
@@ -1,9 +1,16 @@
 """test module for parser"""
+import io
+import json
 import pytest
-from src.token import TokenSource
+from src.token import TokenSource, StreamingTokenSource, TokenBuffer, EOF_TOKEN, LEXEME_KINDS, TYPE_KINDS
 from src.lexer import Lexer
-from src.parser import ParseTranslationUnit
-from src.source import FileSource
+from src.parser import (ParseNode, ParseTranslationUnit, ParseStatement, ParseLabeledStat, ParseExpStat, ParseJumpStat,
+                        ParseExpression)
+from src.exceptions import ParseException
+from src.ast import SourceRoot
+from src.source import FileSource, StringSource
+from src.util.parse_tree_json import generate_ast_json
+from benchmark.corpus import ProgramGenerator
 
 class TestParser:
     """
@@ -23,3 +30,95 @@ class TestParser:
     def test_parsing(self, test_source_file):
         cst = ParseTranslationUnit.parse(self.token_source)
         # print(cst)
+
+    @pytest.mark.parametrize("engine", ["char", "regex"])
+    def test_streaming_parsing(self, test_source_file, engine):
+        cst = ParseTranslationUnit.parse(self.token_source)
+        lexer = Lexer(FileSource(test_source_file), engine=engine)
+        token_source = StreamingTokenSource(lexer.iter_tokens())
+        assert str(ParseTranslationUnit.parse(token_source)) == str(cst)
+        assert not lexer.token_list
+        assert token_source.peek(1) is token_source.peek(2) is EOF_TOKEN
+
+    def test_token_kinds(self, test_source_file):
+        tokens = Lexer(FileSource(test_source_file)).match()
+        assert all(LEXEME_KINDS.get(token.value, TYPE_KINDS.get(token.type)) == token.kind for token in tokens)
+        token_buffer = TokenBuffer.from_tokens(tokens)
+        assert [token.kind for token in token_buffer] == [token.kind for token in tokens]
+        assert str(ParseTranslationUnit.parse(TokenSource(token_buffer))) == \
+            str(ParseTranslationUnit.parse(self.token_source))
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_generated_corpus(self, seed):
+        full = ProgramGenerator(seed, "full").generate(8192)
+        assert full == ProgramGenerator(seed, "full").generate(8192)
+        ParseTranslationUnit.parse(TokenSource(Lexer(StringSource(full)).match()))
+        program = ProgramGenerator(seed, "ast").generate(8192)
+        SourceRoot.transform(ParseTranslationUnit.parse(TokenSource(Lexer(StringSource(program)).match())))
+
+    @pytest.mark.parametrize("string, routine", [("l1 : a = 1 ;", ParseLabeledStat), ("a = 1 ;", ParseExpStat),
+                                                 ("case 1 : ;", ParseLabeledStat), ("return ;", ParseJumpStat),
+                                                 ("int a ;", None)])
+    def test_statement_dispatch(self, string, routine):
+        assert ParseStatement.dispatch(TokenSource(Lexer(StringSource(string)).match())) is routine
+
+    @pytest.mark.parametrize("string", ["int main ( ) { a [ 1 ; }", "int main ( ) { f ( 1 ; }"])
+    def test_postfix_error(self, string):
+        with pytest.raises(ParseException):
+            ParseTranslationUnit.parse(TokenSource(Lexer(StringSource(string)).match()))
+
+    @pytest.mark.parametrize("seed", [0, 1])
+    def test_pratt_engine(self, seed):
+        tokens = Lexer(StringSource(ProgramGenerator(seed, "full").generate(8192))).match()
+        pratt_tree = ParseTranslationUnit.parse(TokenSource(tokens), expression_engine="pratt")
+        assert ParseNode.parse_dict(pratt_tree) == ParseNode.parse_dict(ParseTranslationUnit.parse(TokenSource(tokens)))
+        pratt_tree = ParseTranslationUnit.parse(self.token_source, expression_engine="pratt")
+        assert ParseNode.parse_dict(pratt_tree) == \
+            ParseNode.parse_dict(ParseTranslationUnit.parse(TokenSource(self.token_source.token_list)))
+        # the options stay with the token source, a source made with them needs no arguments.
+        assert self.token_source.expression_engine == "pratt" and TokenSource(tokens).expression_engine == "descent"
+        assert ParseNode.parse_dict(ParseTranslationUnit.parse(TokenSource(tokens, "pratt"))) == \
+            ParseNode.parse_dict(ParseTranslationUnit.parse(TokenSource(tokens)))
+        with pytest.raises(ValueError):
+            ParseTranslationUnit.parse(TokenSource(tokens), expression_engine="lalr")
+
+    @pytest.mark.parametrize("seed", [0, 1])
+    def test_compact(self, seed):
+        tokens = Lexer(StringSource(ProgramGenerator(seed, "full").generate(8192))).match()
+        full_tree = ParseTranslationUnit.parse(TokenSource(tokens))
+        compact_tree = ParseTranslationUnit.parse(TokenSource(tokens), compact=True)
+        assert ParseNode.parse_dict(compact_tree) == ParseNode.parse_dict(
+            ParseTranslationUnit.parse(TokenSource(tokens), expression_engine="pratt", compact=True))
+        full_str, compact_str = str(full_tree), str(compact_tree)
+        assert len(compact_str) < len(full_str)
+        assert '"statement"' in full_str and '"statement"' not in compact_str
+        assert '"additive expression"' in compact_str
+        # routines called directly follow the options of their token source.
+        expression = Lexer(StringSource("a = b + 1 ;")).match()
+        for engine in ("descent", "pratt"):
+            assert ParseExpression.parse(TokenSource(expression, engine)).child[0].child[2].symbol == \
+                "logical or expression"
+            compact_expression = ParseExpression.parse(TokenSource(expression, engine, compact=True))
+            assert compact_expression.symbol == "assignment expression"
+            assert compact_expression.child[2].symbol == "additive expression"
+
+    def test_write_json(self, test_source_file, tmpdir):
+        cst = ParseTranslationUnit.parse(self.token_source)
+        file_obj = io.StringIO()
+        assert ParseNode.write_json(cst, file_obj, indent=2, chunk_size=100) == len(file_obj.getvalue())
+        assert file_obj.getvalue() == json.dumps(ParseNode.parse_dict(cst), indent=2) == str(cst)
+
+        # the ndjson records rebuild the same tree.
+        file_obj = io.StringIO()
+        ParseNode.write_json(cst, file_obj, ndjson=True, chunk_size=100)
+        records = [json.loads(line) for line in file_obj.getvalue().splitlines()]
+        assert [record['id'] for record in records] == list(range(len(records))) and records[0]['parent'] is None
+        nodes = []
+        for record in records:
+            nodes.append({'symbol': record['symbol'], 'child': []})
+            if record['parent'] is not None:
+                nodes[record['parent']]['child'].append(nodes[-1])
+        assert nodes[0] == ParseNode.parse_dict(cst)
+
+        generate_ast_json(test_source_file, str(tmpdir.join("ast.json")))
+        assert tmpdir.join("ast.json").read() == ParseNode.to_json(SourceRoot.transform(cst))
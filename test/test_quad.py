@@ -0,0 +1,114 @@
+"""test module for the AST visitors"""
+import pytest
+from src.arena import ArenaTree
+from src.ast import SourceRoot
+from src.exceptions import SemanticException
+from src.lexer import Lexer
+from src.parser import NodeKind
+from src.quad import AST_NODE_CLASSES, ASTVisitor, AttrCalculateVisitor, QuadGeneratingVisitor
+from src.source import StringSource
+from src.symbol_table import SymbolTable
+from src.token import TokenSource
+
+
+class RecordingVisitor(ASTVisitor):
+    """record the symbols of the handled nodes"""
+
+    def __init__(self):
+        self.visited = []
+
+    def _init_declarator_list(self, ast_node):
+        self.visited.append(ast_node.symbol)
+        self.visit_children(ast_node)
+
+    def _primary_exp(self, ast_node):
+        self.visited.append(ast_node.symbol.value)
+
+
+class LeavingVisitor(RecordingVisitor):
+    """record the compound statements around the handled nodes"""
+
+    def _compound_stat(self, ast_node):
+        self.visited.append("{")
+
+    def _compound_stat_leave(self, ast_node):
+        self.visited.append("}")
+
+
+class TestVisitor:
+    """
+    test dispatch and traversal of ASTVisitor
+    """
+
+    def test_dispatch_table(self):
+        assert not ASTVisitor.dispatch_table
+        assert set(RecordingVisitor.dispatch_table) == {NodeKind.AST_INIT_DECLARATOR_LIST, NodeKind.AST_PRIMARY_EXP}
+        assert all(node_class.visit_key for node_class in AST_NODE_CLASSES)
+
+    def test_traverse(self):
+        ast = SourceRoot.parse(TokenSource(Lexer(StringSource("int a = b + 1 ; int main ( ) { return %s ; }" %
+                                                              " + ".join(["c"] * 5000))).match()))
+        visitor = RecordingVisitor()
+        visitor.traverse(ast)
+        assert visitor.visited[:3] == ["init declarator list", "b", "1"]
+        # the return expression is deeper than the recursion limit, the nodes without a handler are walked.
+        assert len(visitor.visited) == 3 + 5000
+        visitor = RecordingVisitor()
+        ast.child[0].child[0].accept(visitor)
+        assert visitor.visited == ["init declarator list", "b", "1"]
+
+    def test_leave(self):
+        ast = SourceRoot.parse(TokenSource(Lexer(StringSource(
+            "int main ( ) { int a = 1 ; { int b = 2 ; } return a ; }")).match()))
+        assert set(LeavingVisitor.leave_table) == {NodeKind.AST_COMPOUND_STAT}
+        visitor = LeavingVisitor()
+        visitor.traverse(ast)
+        assert visitor.visited == ["{", "init declarator list", "1", "{", "init declarator list", "2", "}", "a", "}"]
+        visitor = LeavingVisitor()
+        # a visit of the node from a handler walks its subtree the same way.
+        ast.child[0].child[0].child[2].accept(visitor)
+        assert visitor.visited[0] == "{" and visitor.visited[-1] == "}" and len(visitor.visited) == 9
+
+    def test_quad_generating(self):
+        ast = SourceRoot.parse(TokenSource(Lexer(StringSource(
+            "int a ; int b [ 2 ] = 1 ; int f ( int x ) { int i = 1 ; }")).match()))
+        table = SymbolTable()
+        # the declarations are left to AttrCalculateVisitor.
+        QuadGeneratingVisitor(table).traverse(ast)
+        assert not table.global_scope.symbols and ast.child[1].child[0].type == "int"
+
+
+class TestAttrCalculateVisitor:
+    """
+    test the scopes AttrCalculateVisitor declares in
+    """
+
+    @staticmethod
+    def parse(text, arena):
+        token_source = TokenSource(Lexer(StringSource(text)).match())
+        return ArenaTree.parse(token_source).root if arena else SourceRoot.parse(token_source)
+
+    @pytest.mark.parametrize("arena", [False, True])
+    def test_scopes(self, arena):
+        ast = self.parse("char g [ 2 ] [ 3 ] ; int f ( int x ) { int i = 1 ; { bool i ; } } int main ( ) { int i ; }",
+                         arena)
+        table = SymbolTable()
+        AttrCalculateVisitor(table).traverse(ast)
+        assert table.scope is table.global_scope and table.lookup("g").size == 6 and not table.validate("i")
+        # the functions take no storage in the global frame.
+        assert table.lookup("main").type == "int" and table.lookup("f").size == 0 and table.global_scope.frame_size == 6
+        f, main = ast.child[1].child[0], ast.child[2].child[0]
+        # both functions declare their own i, each at the start of its frame after the params.
+        assert f.scope is not main.scope and f.scope.frame is f.scope
+        assert table.lookup("i", f.scope).addr == 2 and table.lookup("i", main.scope).addr == 0
+        assert table.lookup("x", f.scope).type == "int" and not table.validate("x", main.scope)
+        # the body shares the scope of the params, the nested block shadows i.
+        block = f.child[2].child[1].child[0]
+        assert f.child[2].scope is f.scope and block.scope.parent is f.scope
+        assert table.lookup("i", block.scope).type == "bool" and f.child[2].child[0].child[0].child[1].value == "1"
+        # a param is redeclared in the scope of the function.
+        with pytest.raises(SemanticException):
+            AttrCalculateVisitor(SymbolTable()).traverse(self.parse("int h ( int x ) { int x ; }", arena))
+        # the error of an inner size names the array.
+        with pytest.raises(SemanticException, match="'a'"):
+            AttrCalculateVisitor(SymbolTable()).traverse(self.parse("int n ; int a [ 2 ] [ n ] ;", arena))
@@ -0,0 +1,42 @@
+"""test case for the statistics of the benchmark runner"""
+import pytest
+from benchmark.runner import compare, mann_whitney_greater, percentile
+
+
+def baseline(**samples):
+    return {'benchmarks': {name: {'median': sorted(values)[len(values) // 2], 'samples': values}
+                           for name, values in samples.items()}}
+
+
+class TestRunner:
+    """
+    test percentile, the Mann-Whitney U test and compare of the benchmark runner
+    """
+
+    def test_percentile(self):
+        samples = [float(value) for value in range(10, 0, -1)]
+        # nearest rank, the smallest sample at or above the fraction of the samples.
+        assert percentile(samples, 0.95) == 10.0 and percentile(samples, 0.9) == 9.0
+        assert percentile(samples, 0.5) == 5.0 and percentile(samples, 0.51) == 6.0
+        assert percentile(samples, 0.0) == 1.0 and percentile([3.0], 0.95) == 3.0
+
+    def test_mann_whitney_greater(self):
+        # U = 1.5 + 3 + 3 = 7.5 with the tie counted half, mean 4.5 and deviation sqrt(5.25),
+        # z = (7.5 - 4.5 - 0.5) / sqrt(5.25) = 1.0911.
+        assert mann_whitney_greater([1.0, 2.0, 3.0], [2.0, 4.0, 5.0]) == pytest.approx(0.137617, abs=1e-6)
+        # U = 1.5, z = (1.5 - 4.5 - 0.5) / sqrt(5.25) = -1.5275.
+        assert mann_whitney_greater([2.0, 4.0, 5.0], [1.0, 2.0, 3.0]) == pytest.approx(0.936685, abs=1e-6)
+        assert mann_whitney_greater([], [1.0]) == 1.0
+
+    def test_compare(self):
+        fast = [1.0 + index / 100 for index in range(10)]
+        slow = [value * 1.5 for value in fast]
+        rows = compare(baseline(lex=fast, parse=fast, only_old=fast),
+                       baseline(lex=slow, parse=fast, only_new=slow), 0.05, 0.01)
+        assert [(row[0], row[-1]) for row in rows] == [("lex", "slower"), ("parse", "same")]
+        assert rows[0][3] == pytest.approx(1.5) and rows[0][4] < 0.01
+        assert compare(baseline(lex=slow), baseline(lex=fast), 0.05, 0.01)[0][-1] == "faster"
+        # a large median change on too few samples is not significant.
+        assert compare(baseline(lex=fast[:2]), baseline(lex=slow[:2]), 0.05, 0.01)[0][-1] == "same"
+        # a significant change below the threshold is not flagged.
+        assert compare(baseline(lex=fast), baseline(lex=[value + 0.02 for value in fast]), 0.05, 0.01)[0][-1] == "same"
@@ -0,0 +1,66 @@
+"""test case for the binary tree format"""
+import mmap
+import pytest
+from src import serialize
+from src.ast import AbstractSyntaxTreeNode, SourceRoot
+from src.lexer import Lexer
+from src.parser import ParseNode, ParseTranslationUnit
+from src.source import StringSource
+from src.token import TokenSource
+from .testConfig import source_str
+
+
+class TestSerialize:
+    """
+    test dumps and loads of CST and AST trees
+    """
+
+    @staticmethod
+    def token_fields(root):
+        stack, fields = [root], []
+        while stack:
+            node = stack.pop()
+            if not isinstance(node.symbol, str):
+                fields.append((node.symbol.type, node.symbol.kind, node.symbol.value, node.symbol.cursor.get_position()))
+            stack.extend(node.child)
+        return fields
+
+    @pytest.mark.parametrize("source", [source_str[0], "int main ( ) { bool a = true ; a = %s ; }" %
+                                        " - ".join(["false"] * 3000)], ids=["sample", "deep"])
+    def test_round_trip(self, source):
+        cst = ParseTranslationUnit.parse(TokenSource(Lexer(StringSource(source)).match()))
+        for tree in (cst, SourceRoot.transform(cst)):
+            loaded = serialize.loads(serialize.dumps(tree))
+            assert ParseNode.to_json(loaded) == ParseNode.to_json(tree)
+            assert self.token_fields(loaded) == self.token_fields(tree)
+            assert [type(node) for node in (loaded, loaded.child[0], loaded.child[0].child[0])] == \
+                [type(node) for node in (tree, tree.child[0], tree.child[0].child[0])]
+        stack = [loaded]
+        while stack:
+            node = stack.pop()
+            for child in node.child:
+                assert not isinstance(child, AbstractSyntaxTreeNode) or child.father_node is node
+            stack.extend(node.child)
+
+    def test_tree_file(self, tmpdir):
+        root = SourceRoot("source rööt", None)
+        root.adopt(SourceRoot("é", None))
+        path = tmpdir.join("tree.bin")
+        with open(str(path), 'wb') as file_obj:
+            serialize.dump(root, file_obj)
+        with open(str(path), 'rb') as file_obj:
+            assert ParseNode.to_json(serialize.load(file_obj)) == ParseNode.to_json(root)
+            file_map = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        tree_file = serialize.TreeFile(file_map)
+        assert tree_file.class_names() == ["SourceRoot"]
+        assert tree_file.node_classes.tolist() == [0, 0] and tree_file.child_counts.tolist() == [1, 0]
+        assert tree_file.strings() == ["source rööt", "é", "SourceRoot"]
+
+    def test_bad_data(self):
+        data = serialize.dumps(SourceRoot("source root", None))
+        with pytest.raises(ValueError):
+            serialize.loads(b"TLAS" + data[4:])
+        with pytest.raises(ValueError):
+            serialize.loads(data[:4] + b"\x02" + data[5:])
+        with pytest.raises(ValueError):
+            serialize.loads(data[:-8])
@@ -0,0 +1,50 @@
+"""test case for source"""
+import pytest
+from src.source import FileSource, MmapFileSource, StringSource
+
+
+class TestStringSource:
+    """
+    test string source
+    """
+
+    def test_peek_and_consume(self, test_source_string):
+        source = StringSource(test_source_string)
+        assert source.next_char(True) == '#'
+        assert source.peek_n(3) == '# r'
+        assert source.next_char() == '#'
+        assert source.offset == 1
+        assert source.cursor.get_position() == (0, 1)
+
+    def test_slice(self, test_source_string):
+        source = StringSource(test_source_string)
+        chars = []
+        while source.next_char(True) != -1:
+            chars.append(source.next_char())
+        assert ''.join(chars) == source.slice(0, source.length)
+        assert source.cursor.line == source.text.count('\n')
+        assert source.peek_n(5) == ''
+
+
+class TestMmapFileSource:
+    """
+    test memory mapped file source
+    """
+
+    def test_same_as_file_source(self, test_source_file):
+        streams = []
+        for source in (FileSource(test_source_file), MmapFileSource(test_source_file)):
+            stream = []
+            while source.next_char(True) != -1:
+                stream.append((source.next_char(), source.cursor.get_position()))
+            streams.append(stream)
+        assert streams[0] == streams[1]
+
+    def test_line_offsets(self, test_source_file):
+        source = MmapFileSource(test_source_file)
+        with open(test_source_file, 'r') as file_obj:
+            lines = file_obj.readlines()
+        assert len(source.line_offsets) == len(lines) + 1
+        assert source.slice(source.line_offsets[2], source.line_offsets[3]) == lines[2]
+        assert source.locate(source.line_offsets[2] + 3) == (2, 3)
+        source.close()
@@ -0,0 +1,49 @@
+"""test case for the symbol table"""
+import pytest
+from src.exceptions import SemanticException
+from src.symbol_table import SymbolTable
+
+
+class TestSymbolTable:
+    """
+    test scopes, lookup and frame addresses of SymbolTable
+    """
+
+    def test_scopes(self):
+        table = SymbolTable()
+        global_a = table.create_item("a", "int")
+        table.create_item("b", "char", (2, 3))
+        main = table.enter_scope("main", frame=True)
+        local_a = table.create_item("a", "bool")
+        assert table.lookup("a") is local_a and table.lookup("b").size == 6
+        assert table.lookup("a", table.global_scope) is global_a and not table.validate("c")
+        with pytest.raises(SemanticException):
+            table.create_item("a", "int")
+        assert table.exit_scope() is table.global_scope and table.lookup("a") is global_a
+        # the scope is kept, a later pass looks names up from it.
+        assert table.lookup("a", main) is local_a and main.depth == 1
+        with pytest.raises(SemanticException):
+            table.exit_scope()
+
+    def test_frames(self):
+        table = SymbolTable()
+        table.create_item("g", "float")
+        for name in ("f", "g"):
+            function = table.enter_scope(name, frame=True)
+            assert table.create_item("a", "int").addr == 0
+            for block in range(2):
+                table.enter_scope("block%d" % block)
+                # sibling blocks reuse the addresses after the ones of the function.
+                assert table.create_item("b%d" % block, "float").addr == 2
+                table.exit_scope()
+            table.exit_scope()
+            assert function.frame_size == 6 and table.validate("g") and not table.validate("b0")
+        assert table.global_scope.frame_size == 4
+
+    def test_sizes(self):
+        table = SymbolTable()
+        # an element is as large as a variable of the type.
+        assert table.create_item("a", "int", (2, 3)).size == 12 and table.create_item("b", "int").addr == 12
+        assert table.create_function("f", "int").size == 0 and table.create_item("c", "int").addr == 14
+        with pytest.raises(SemanticException):
+            table.create_function("a", "int")